@@ -0,0 +1,372 @@
+import re
+import time
+from dataclasses import dataclass, field
+
+# Diagnostic codes: E* are structural errors that stop the script from loading, W* are warnings
+CODES = {
+    "E001": "Unexpected closing brace",
+    "E002": "Unclosed brace",
+    "E003": "Unbalanced parentheses or brackets",
+    "E004": "Unterminated string",
+    "E005": "Undefined label",
+    "E006": "Duplicate hotkey",
+    "E007": "Duplicate label",
+    "E008": "Duplicate function",
+    "E009": "Unterminated comment or continuation section",
+    "W101": "Mixed AutoHotkey v1 and v2 syntax",
+    "W102": "Syntax from a different AutoHotkey version than declared",
+}
+
+MAX_VERSION_WARNINGS = 20
+
+KEYWORDS = {
+    "if", "else", "loop", "while", "for", "try", "catch", "finally", "return", "global", "local",
+    "static", "class", "until", "switch", "case", "default", "throw", "break", "continue", "not",
+    "and", "or", "in", "is", "contains", "new", "super", "this",
+}
+
+# Built-ins that are commands in v1 (called with a comma) and functions in v2 (called with parentheses)
+COMMAND_FUNCTIONS = (
+    "MsgBox|Sleep|Send|SendInput|SendEvent|SendPlay|SendRaw|SendText|SendMode|ToolTip|Click|"
+    "WinActivate|WinWait|WinWaitActive|WinClose|WinMove|WinGetPos|WinSetTitle|MouseMove|MouseClick|"
+    "MouseGetPos|PixelSearch|PixelGetColor|ImageSearch|SetTimer|Hotkey|FileAppend|FileRead|FileDelete|"
+    "FileCopy|IniRead|IniWrite|CoordMode|SetTitleMatchMode|Run|RunWait|KeyWait|SetKeyDelay|"
+    "SetMouseDelay|SetWinDelay|SetControlDelay|ControlSend|ControlClick|Reload|ExitApp|Gui|Menu"
+)
+V1_ONLY = re.compile(
+    r"^\s*(#NoEnv|#If(WinActive|WinNotActive|WinExist|WinNotExist)?\b|SetBatchLines|StringReplace|StringSplit|"
+    r"StringLeft|StringRight|StringMid|StringLen|StringTrimLeft|StringTrimRight|IfWinExist|IfWinNotExist|"
+    r"IfWinActive|IfWinNotActive|IfExist|IfNotExist|IfInString|IfEqual|IfNotEqual|EnvAdd|EnvSub|SetEnv|"
+    r"Transform|SplashTextOn|Gosub)(?=\s|,|$)(?!\s*[:+\-*/.]?=)"
+    rf"|^\s*({COMMAND_FUNCTIONS})\s*,"
+    r"|^\s*[A-Za-z_]\w*\s*=(?![=>])",
+    re.IGNORECASE,
+)
+# %var% is a v1 deref, but also valid v2 double-deref syntax, so it only counts towards v1 in undeclared scripts
+V1_DEREF = re.compile(r"(?<![.\w])%\w+%(?!\.)")
+V2_ONLY = re.compile(
+    r"^\s*#(Requires\s+AutoHotkey\s+v2|HotIf)\b"
+    rf"|(?<![\w.])({COMMAND_FUNCTIONS})\("
+    r"|=>"
+    r"|\.OnEvent\(",
+    re.IGNORECASE,
+)
+
+REQUIRES = re.compile(r"^\s*#Requires\s+AutoHotkey\s+v?(\d)", re.IGNORECASE)
+HOTSTRING = re.compile(r"^\s*:[^:\s]*:[^:]+::")
+HOTKEY = re.compile(r"^\s*([#!^+<>*~$]*[^\s:;\"'(),]+?(?:\s+&\s+[#!^+<>*~$]*[^\s:;\"'(),]+?)?(?:\s+up)?)::(.*)$",
+                    re.IGNORECASE)
+LABEL = re.compile(r"^\s*([^\s,:(){}\"'`;=%.]+):\s*$")
+FUNCTION_DEF = re.compile(r"^\s*(?:static\s+)?([A-Za-z_]\w*)\((.*)\)\s*(\{|=>.*)?\s*$")
+CONTINUATION_START = re.compile(r"^\s*\((?![^)]*\))")
+V1_COMMAND = re.compile(r"^\s*([A-Za-z_]\w*)(\s*,|\s+(?![\s]*(:=|\+=|-=|\*=|/=|\.=|//=|=|\(|\.|\[|\?|\+\+|--)))")
+V1_LEGACY_ASSIGN = re.compile(r"^\s*[A-Za-z_]\w*\s*=(?![=>])")
+LABEL_REFERENCE = re.compile(r"^\s*(Gosub|Goto)\s*,?\s*([^\s,%;]+)\s*$", re.IGNORECASE)
+TIMER_REFERENCE = re.compile(r"^\s*(SetTimer|OnExit)\s*,\s*([^\s,%;]+)", re.IGNORECASE)
+HOTKEY_COMMAND = re.compile(r"^\s*Hotkey\s*,\s*(?!\s|If)[^,]+,\s*([^\s,%;]+)", re.IGNORECASE)
+GUI_ADD = re.compile(r"^\s*Gui\s*,\s*(?:[^,]*:)?\s*Add\s*,\s*\w+\s*,\s*([^,]*)", re.IGNORECASE)
+G_LABEL = re.compile(r"(?:^|\s)g([A-Za-z_]\w*)")
+
+@dataclass
+class Diagnostic:
+    line: int
+    column: int
+    severity: str
+    code: str
+    message: str
+
+@dataclass
+class AnalysisResult:
+    version: str
+    line_count: int
+    elapsed_ms: float
+    diagnostics: list = field(default_factory=list)
+
+    @property
+    def errors(self) -> list:
+        return [d for d in self.diagnostics if d.severity == "error"]
+
+    @property
+    def warnings(self) -> list:
+        return [d for d in self.diagnostics if d.severity == "warning"]
+
+def _strip_comment(line: str) -> str:
+    """Drop a trailing ; comment from raw (non-expression) text"""
+    for match in re.finditer(r"(?<!`);", line):
+        start = match.start()
+        if start == 0 or line[start - 1] in " \t":
+            return line[:start]
+    return line
+
+def _scan_expression(line: str, version: str):
+    """Blank out string contents and strip comments from an expression line.
+
+    Returns the cleaned text and the column of an unterminated quote, if any.
+    """
+    quotes = "\"'" if version == "2" else "\""
+    out = []
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if char == ";" and (i == 0 or line[i - 1] in " \t"):
+            break
+        if char in quotes:
+            start = i
+            i += 1
+            while i < len(line):
+                if line[i] == "`" and version == "2":
+                    i += 2
+                    continue
+                if line[i] == char:
+                    # v1 escapes a quote by doubling it
+                    if version != "2" and i + 1 < len(line) and line[i + 1] == char:
+                        i += 2
+                        continue
+                    break
+                i += 1
+            if i >= len(line):
+                return "".join(out) + char + char, start
+            out.append(char + char)
+            i += 1
+            continue
+        out.append(char)
+        i += 1
+    return "".join(out), None
+
+def detect_version(lines: list) -> str:
+    """Return the declared version from #Requires, or the one whose syntax dominates"""
+    v1_hits = v2_hits = 0
+    for line in lines:
+        match = REQUIRES.match(line)
+        if match:
+            return match.group(1)
+        stripped = line.strip()
+        if not stripped or stripped.startswith(";"):
+            continue
+        if V1_ONLY.search(stripped) or V1_DEREF.search(stripped):
+            v1_hits += 1
+        if V2_ONLY.search(stripped):
+            v2_hits += 1
+    return "2" if v2_hits > v1_hits else "1"
+
+def _logical_lines(lines: list, diagnostics: list):
+    """Yield (line number, text) pairs with block comments and continuation sections folded away"""
+    pending = None
+    i = 0
+    while i < len(lines):
+        number, line = i + 1, lines[i]
+        stripped = line.strip()
+
+        if stripped.startswith("/*"):
+            end = i
+            while end < len(lines) and "*/" not in lines[end][(2 if end == i else 0):]:
+                end += 1
+            if end >= len(lines):
+                diagnostics.append(Diagnostic(number, 1, "error", "E009", "Block comment is never closed with */"))
+                return
+            i = end + 1
+            continue
+
+        if CONTINUATION_START.match(line) and pending is not None:
+            end = i + 1
+            while end < len(lines) and not lines[end].lstrip().startswith(")"):
+                end += 1
+            if end >= len(lines):
+                diagnostics.append(Diagnostic(number, 1, "error", "E009", "Continuation section is never closed with )"))
+                return
+            # Join the line that opened the section, a stand-in for its body and whatever follows the closing parenthesis
+            closing = lines[end].lstrip()[1:]
+            pending = (pending[0], pending[1] + " (...)" + closing)
+            i = end + 1
+            continue
+
+        if pending is not None:
+            yield pending
+        pending = (number, line)
+        i += 1
+
+    if pending is not None:
+        yield pending
+
+def analyze(code: str, version: str = None) -> AnalysisResult:
+    """Run the structural checks over an AutoHotkey script and return line-numbered diagnostics"""
+    started = time.perf_counter()
+    lines = code.lstrip("﻿").splitlines()
+    version = (version or "").lstrip("v")[:1] or detect_version(lines)
+    diagnostics = []
+
+    openers = []
+    labels = {}
+    hotkeys = {}
+    functions = {}
+    label_refs = []
+    callable_refs = []
+    v1_lines, v2_lines = [], []
+    context = ""
+    candidate = None
+
+    def close(char: str, number: int, column: int):
+        expected = {")": "(", "]": "[", "}": "{"}[char]
+        if not any(opener == expected for _, _, opener in openers):
+            code = "E001" if char == "}" else "E003"
+            diagnostics.append(Diagnostic(number, column, "error", code, f"Closing {char} has no matching {expected}"))
+            return
+        while openers[-1][2] != expected:
+            unclosed(*openers.pop())
+        openers.pop()
+
+    def unclosed(number: int, column: int, char: str):
+        code = "E002" if char == "{" else "E003"
+        diagnostics.append(Diagnostic(number, column, "error", code, f"Opening {char} is never closed"))
+
+    def define_function(name: str, number: int):
+        if name.lower() in functions:
+            diagnostics.append(Diagnostic(number, 1, "error", "E008",
+                                          f"Function {name} is already defined on line {functions[name.lower()]}"))
+        else:
+            functions[name.lower()] = number
+
+    for number, line in _logical_lines(lines, diagnostics):
+        stripped = line.strip()
+        if not stripped or stripped.startswith(";"):
+            continue
+
+        # A bare "Name(params)" line is a definition only when the next line opens its body
+        if candidate is not None and stripped.startswith("{"):
+            define_function(*candidate)
+        candidate = None
+
+        raw = _strip_comment(stripped)
+        scanned = _scan_expression(stripped, version)[0]
+        if V1_ONLY.search(raw if version == "1" else scanned) or (version == "1" and V1_DEREF.search(raw)):
+            v1_lines.append(number)
+        v2_match = V2_ONLY.search(scanned)
+        if v2_match:
+            v2_lines.append((number, (v2_match.group(2) or "").lower()))
+
+        if stripped.startswith("#"):
+            if re.match(r"#(If|HotIf)\b", stripped, re.IGNORECASE):
+                context = raw.strip().lower()
+            continue
+
+        if HOTSTRING.match(stripped):
+            continue
+
+        hotkey = HOTKEY.match(stripped)
+        if hotkey and not re.match(r"^\s*(case|default)\b", stripped, re.IGNORECASE):
+            key = (context, hotkey.group(1).strip().lower())
+            if key in hotkeys:
+                diagnostics.append(Diagnostic(number, 1, "error", "E006",
+                                              f"Hotkey {hotkey.group(1).strip()} is already defined on line {hotkeys[key]}"))
+            else:
+                hotkeys[key] = number
+            labels.setdefault(hotkey.group(1).strip().lower(), number)
+            stripped = hotkey.group(2).strip()
+            if not stripped:
+                continue
+
+        label = LABEL.match(raw)
+        if label and label.group(1).lower() not in KEYWORDS:
+            name = label.group(1).lower()
+            if name in labels and labels[name] != number:
+                diagnostics.append(Diagnostic(number, 1, "error", "E007",
+                                              f"Label {label.group(1)} is already defined on line {labels[name]}"))
+            labels[name] = number
+            continue
+
+        # Peel off leading closing braces and block keywords so the rest classifies normally
+        column = len(line) - len(line.lstrip()) + 1
+        while True:
+            if stripped.startswith("}"):
+                close("}", number, column)
+                stripped = stripped[1:].lstrip()
+                column += 1
+                continue
+            keyword = re.match(r"(else|try|finally)\b\s*", stripped, re.IGNORECASE)
+            if keyword and stripped[keyword.end():].strip():
+                stripped = stripped[keyword.end():]
+                continue
+            break
+        if not stripped:
+            continue
+
+        if version == "1":
+            raw = _strip_comment(stripped)
+            command = V1_COMMAND.match(raw)
+            if (command and command.group(1).lower() not in KEYWORDS) or V1_LEGACY_ASSIGN.match(raw):
+                # v1 command arguments are literal text: braces and quotes there are not syntax
+                reference = LABEL_REFERENCE.match(raw)
+                if reference:
+                    label_refs.append((number, reference.group(2)))
+                for pattern in (TIMER_REFERENCE, HOTKEY_COMMAND):
+                    reference = pattern.match(raw)
+                    if reference and reference.group(reference.lastindex).lower() not in ("on", "off", "delete", "toggle"):
+                        callable_refs.append((number, reference.group(reference.lastindex)))
+                gui = GUI_ADD.match(raw)
+                if gui:
+                    for g_label in G_LABEL.findall(gui.group(1)):
+                        callable_refs.append((number, g_label))
+                if raw.rstrip().endswith(" {") and command and command.group(1).lower() in ("loop",):
+                    openers.append((number, len(line.rstrip()), "{"))
+                continue
+
+        text, unterminated = _scan_expression(stripped, version)
+        if unterminated is not None:
+            diagnostics.append(Diagnostic(number, unterminated + 1, "error", "E004", "String is never closed"))
+
+        if version == "2":
+            reference = re.match(r"^\s*Goto\s*\(?\s*[\"']([^\"']+)[\"']", stripped, re.IGNORECASE)
+            if reference:
+                label_refs.append((number, reference.group(1)))
+
+        definition = FUNCTION_DEF.match(text)
+        if definition and definition.group(1).lower() not in KEYWORDS and not any(c == "{" for _, _, c in openers):
+            if definition.group(3):
+                define_function(definition.group(1), number)
+            else:
+                candidate = (definition.group(1), number)
+
+        indent = len(line) - len(line.lstrip()) + (len(line.strip()) - len(stripped))
+        for offset, char in enumerate(text):
+            if char in "{([":
+                openers.append((number, indent + offset + 1, char))
+            elif char in "})]":
+                close(char, number, indent + offset + 1)
+
+    for opened in openers:
+        unclosed(*opened)
+
+    for number, name in label_refs:
+        if name.lower() not in labels:
+            diagnostics.append(Diagnostic(number, 1, "error", "E005", f"Label {name} is not defined"))
+    for number, name in callable_refs:
+        if name.lower() not in labels and name.lower() not in functions:
+            diagnostics.append(Diagnostic(number, 1, "error", "E005", f"Label or function {name} is not defined"))
+
+    # A v1 script may define its own function named like a v2 built-in
+    v2_lines = [number for number, name in v2_lines if name not in functions]
+    declared = any(REQUIRES.match(line) for line in lines[:50])
+    other_lines = v1_lines if version == "2" else v2_lines
+    if declared and other_lines:
+        for number in other_lines[:MAX_VERSION_WARNINGS]:
+            diagnostics.append(Diagnostic(number, 1, "warning", "W102",
+                                          f"Uses AutoHotkey v{'1' if version == '2' else '2'} syntax in a v{version} script"))
+    elif not declared and v1_lines and v2_lines:
+        sample = ", ".join(str(n) for n in (v1_lines[:3] + v2_lines[:3]))
+        diagnostics.append(Diagnostic(min(v1_lines[0], v2_lines[0]), 1, "warning", "W101",
+                                      f"Script mixes v1 syntax ({len(v1_lines)} lines) and v2 syntax "
+                                      f"({len(v2_lines)} lines), e.g. lines {sample}"))
+
+    diagnostics.sort(key=lambda d: (d.line, d.column))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    return AnalysisResult(f"v{version}", len(lines), elapsed_ms, diagnostics)
+
+def format_report(result: AnalysisResult) -> str:
+    """Render an analysis result as markdown for the Validate panel"""
+    heading = (f"### 🔍 Local Static Analysis\n"
+               f"AutoHotkey {result.version} · {result.line_count} lines · {result.elapsed_ms:.1f} ms · "
+               f"{len(result.errors)} error(s), {len(result.warnings)} warning(s)")
+    if not result.diagnostics:
+        return heading + "\n\n✅ No structural problems found."
+    items = [f"- **Line {d.line}:{d.column}** · {d.severity} `{d.code}` · {d.message}" for d in result.diagnostics]
+    return heading + "\n\n" + "\n".join(items)
@@ -0,0 +1,122 @@
+import re
+from dataclasses import dataclass, field
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+_DIFF_FENCE = re.compile(r"```(?:diff|patch)[^\n]*\n(.*?)```", re.S)
+
+class PatchError(ValueError):
+    """A suggested patch is malformed or does not match the code it should apply to"""
+
+@dataclass
+class Hunk:
+    """One @@ section of a unified diff: the lines it expects and what replaces them"""
+    old_start: int
+    old_lines: list = field(default_factory=list)
+    new_lines: list = field(default_factory=list)
+    added: int = 0
+    removed: int = 0
+
+def extract_diff(text: str):
+    """Return the unified diff in a model response (a ```diff block or bare @@ hunks), or None"""
+    fenced = _DIFF_FENCE.findall(text or "")
+    for block in fenced:
+        if "@@" in block:
+            return block
+    lines = (text or "").splitlines()
+    span = _bare_diff_span(lines)
+    if span is None:
+        return None
+    return "\n".join(lines[span[0]:span[1]]) + "\n"
+
+def _bare_diff_span(lines: list):
+    """(start, end) of the first unfenced diff in lines, including ---/+++ file headers before it"""
+    for index, line in enumerate(lines):
+        if _HUNK_HEADER.match(line):
+            start = index
+            if start >= 2 and lines[start - 1].startswith("+++") and lines[start - 2].startswith("---"):
+                start -= 2
+            # Unfenced hunks end at the first line that is not part of a diff
+            end = index + 1
+            while end < len(lines) and (not lines[end] or lines[end][0] in " +-@\\"):
+                end += 1
+            return start, end
+    return None
+
+def strip_diff(text: str) -> str:
+    """The response with its diff removed (a ```diff block or bare hunks), leaving the explanation"""
+    text = text or ""
+    if _DIFF_FENCE.search(text):
+        return _DIFF_FENCE.sub("", text).strip()
+    lines = text.splitlines()
+    span = _bare_diff_span(lines)
+    if span is not None:
+        lines = lines[:span[0]] + lines[span[1]:]
+    return "\n".join(lines).strip()
+
+def parse_unified_diff(diff: str) -> list:
+    """Parse hunks from a unified diff.
+
+    Hunk line counts are not trusted (models often get them wrong): a hunk runs until the
+    next @@ header. Context lines whose leading space was lost are kept as context.
+    """
+    hunks = []
+    current = None
+    lines = diff.splitlines()
+    for index, line in enumerate(lines):
+        header = _HUNK_HEADER.match(line)
+        if header:
+            current = Hunk(int(header.group(1)))
+            hunks.append(current)
+            continue
+        if line.startswith("---") and index + 1 < len(lines) and lines[index + 1].startswith("+++"):
+            # A file header ends the previous hunk; its +++ line is skipped below
+            current = None
+            continue
+        if current is None or line.startswith("\\"):
+            # File headers, prose before the first hunk and "\ No newline at end of file"
+            continue
+        if line.startswith("+"):
+            current.new_lines.append(line[1:])
+            current.added += 1
+        elif line.startswith("-"):
+            current.old_lines.append(line[1:])
+            current.removed += 1
+        else:
+            context = line[1:] if line.startswith(" ") else line
+            current.old_lines.append(context)
+            current.new_lines.append(context)
+    if not hunks:
+        raise PatchError("The patch has no @@ hunks")
+    return hunks
+
+def _matches(lines: list, position: int, expected: list, normalize) -> bool:
+    return all(normalize(lines[position + i]) == normalize(expected[i]) for i in range(len(expected)))
+
+def _locate(lines: list, hunk: Hunk, start: int) -> int:
+    """Index where hunk.old_lines occur at or after start, closest to the hunk's line number"""
+    if not hunk.old_lines:
+        return min(max(start, hunk.old_start), len(lines))
+    hint = hunk.old_start - 1
+    last = len(lines) - len(hunk.old_lines)
+    # Exact apart from trailing spaces first, then ignoring indentation
+    for normalize in (str.rstrip, str.strip):
+        first = normalize(hunk.old_lines[0])
+        positions = [p for p in range(start, last + 1)
+                     if normalize(lines[p]) == first and _matches(lines, p, hunk.old_lines, normalize)]
+        if positions:
+            return min(positions, key=lambda p: abs(p - hint))
+    raise PatchError(f"The change near line {hunk.old_start} does not match the current code")
+
+def apply_hunks(code: str, hunks: list) -> str:
+    """Apply parsed hunks in order, locating each by its context rather than its line numbers"""
+    lines = code.splitlines()
+    position = 0
+    for hunk in hunks:
+        at = _locate(lines, hunk, position)
+        lines[at:at + len(hunk.old_lines)] = hunk.new_lines
+        position = at + len(hunk.new_lines)
+    return "\n".join(lines) + ("\n" if code.endswith("\n") else "")
+
+def apply_patch(code: str, diff: str) -> str:
+    """Apply a unified diff to code; raises PatchError when it cannot be applied cleanly"""
+    return apply_hunks(code, parse_unified_diff(diff))
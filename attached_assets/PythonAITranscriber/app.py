@@ -1,28 +1,33 @@
 import os
 import streamlit as st
-from anthropic import Anthropic
 from pygments import highlight
 from pygments.lexers import PythonLexer, AutohotkeyLexer
 from pygments.formatters import HtmlFormatter
 import time
+import uuid
+import tempfile
+from datetime import datetime, timedelta
 import database
+import async_database
+import script_archive
+import script_similarity
+import llm_cache
+import llm_scheduler
+import llm_metrics
+import model_router
+import speculative
+import project_converter
+import jobs
+from jobs import job_manager, JobLimitError
+from converter import run_conversion, run_incremental_conversion, run_game_script, IncrementalConversion, DebugPatch
 
-# Initialize database (only if configured)
+# Initialize database (only if configured); init_db does its work once per process
 if database.is_database_available():
     try:
         database.init_db()
     except Exception as e:
         pass
 
-# Initialize Anthropic client using Replit AI Integrations
-AI_INTEGRATIONS_ANTHROPIC_API_KEY = os.environ.get("AI_INTEGRATIONS_ANTHROPIC_API_KEY")
-AI_INTEGRATIONS_ANTHROPIC_BASE_URL = os.environ.get("AI_INTEGRATIONS_ANTHROPIC_BASE_URL")
-
-client = Anthropic(
-    api_key=AI_INTEGRATIONS_ANTHROPIC_API_KEY,
-    base_url=AI_INTEGRATIONS_ANTHROPIC_BASE_URL
-)
-
 # Page configuration
 st.set_page_config(
     page_title="Python to AutoHotkey Converter",
@@ -39,156 +44,354 @@ if 'python_code' not in st.session_state:
     st.session_state.python_code = ""
 if 'conversion_history' not in st.session_state:
     st.session_state.conversion_history = []
+if 'speculative_run' not in st.session_state:
+    st.session_state.speculative_run = None
+if 'applied_jobs' not in st.session_state:
+    st.session_state.applied_jobs = set()
+if 'generated_script' not in st.session_state:
+    st.session_state.generated_script = None
+if 'conversion_fragments' not in st.session_state:
+    # AutoHotkey of each top-level definition from the last conversion, reused when it is unchanged
+    st.session_state.conversion_fragments = {}
+if 'pending_fix' not in st.session_state:
+    # DebugPatch from the last patch-mode debug, applied to converted_code by "Apply fix"
+    st.session_state.pending_fix = None
+if 'project_download' not in st.session_state:
+    # Zip of .ahk files from the last multi-file upload, kept on disk for the download button
+    st.session_state.project_download = None
+if 'loaded_script' not in st.session_state:
+    # id, name and version of the saved script in the editor, so saving can update it in place
+    st.session_state.loaded_script = None
 
-def convert_python_to_ahk(python_code: str) -> str:
-    """Convert Python code to AutoHotkey using Claude AI"""
-    prompt = f"""Convert the following Python code to AutoHotkey (AHK) script.
-Make sure the conversion is accurate and follows AutoHotkey best practices.
-Include comments explaining the conversion where necessary.
+# Background jobs belong to an id kept in the URL, so a browser refresh reconnects to them
+if "owner" not in st.query_params:
+    st.query_params["owner"] = uuid.uuid4().hex
+owner_id = st.query_params["owner"]
 
-Python code:
-```python
-{python_code}
-```
+JOB_LABELS = {
+    "convert": "Converting Python to AutoHotkey",
+    "validate": "Validating conversion",
+    "debug": "Debugging code",
+    "game_script": "Generating game automation script",
+    "convert_project": "Converting uploaded files",
+    "save_script": "Saving script",
+}
+# Streamed progress is shown as code for these jobs and as markdown for the rest
+JOB_LANGUAGES = {"convert": "autohotkey", "game_script": "autohotkey"}
+SCRIPTS_PAGE_SIZE = 20
+SCRIPT_TYPES = {"Conversion": "conversion", "Game Helper": "game_helper"}
 
-Provide ONLY the AutoHotkey code without any explanations or markdown formatting."""
+def highlight_code(code: str, lexer) -> str:
+    """Apply syntax highlighting to code"""
+    formatter = HtmlFormatter(style='monokai', noclasses=True, linenos=False)
+    return highlight(code, lexer, formatter)
 
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5",
-            max_tokens=8192,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
-        if message.content[0].type == "text":
-            return message.content[0].text
-        else:
-            return "Error: Unexpected response type from AI"
-    except Exception as e:
-        return f"Error during conversion: {str(e)}"
+def discard_speculative_run():
+    """Drop background validation started for code that is no longer current"""
+    if st.session_state.speculative_run is not None:
+        st.session_state.speculative_run.cancel()
+        st.session_state.speculative_run = None
 
-def validate_ahk_code(python_code: str, ahk_code: str) -> str:
-    """Validate the converted AutoHotkey code using Claude AI"""
-    prompt = f"""You are an expert in both Python and AutoHotkey. Review this code conversion and validate if it's correct.
+def enqueue_job(kind: str, func, *args, payload: dict = None, **kwargs):
+    """Hand work to the background job manager and rerun so its progress starts showing"""
+    try:
+        job_manager.submit(owner_id, kind, func, *args, payload=payload, **kwargs)
+    except JobLimitError as e:
+        st.error(str(e))
+        return
+    st.rerun()
 
-Original Python code:
-```python
-{python_code}
-```
+def describe_debug_patch(patch: DebugPatch) -> str:
+    """Markdown for the AI Analysis section; the diff itself is shown next to the Apply fix button"""
+    if patch.error:
+        return (f"{patch.explanation}\n\n⚠️ The suggested patch could not be applied: {patch.error}. "
+                f"Turn off \"Debug as a patch\" and debug again for the full corrected code.\n\n"
+                f"```diff\n{patch.diff}\n```")
+    if patch.diff is None:
+        return f"{patch.explanation}\n\n✅ No changes suggested."
+    return patch.explanation
 
-Converted AutoHotkey code:
-```ahk
-{ahk_code}
-```
+def apply_finished_jobs():
+    """Copy the results of this user's finished jobs into the session, once per job"""
+    for kind in JOB_LABELS:
+        job = job_manager.latest(owner_id, kind)
+        if job is None or job.active or job.id in st.session_state.applied_jobs:
+            continue
+        st.session_state.applied_jobs.add(job.id)
 
-Please analyze:
-1. Is the conversion accurate?
-2. Does the AutoHotkey code preserve the functionality of the Python code?
-3. Are there any syntax errors or issues?
-4. Are there any potential runtime errors?
+        if job.state == jobs.FAILED:
+            st.error(f"{JOB_LABELS[kind]} failed: {job.error}")
+        elif job.state != jobs.DONE and not (kind == "convert_project" and job.result is not None):
+            # Other cancelled jobs are not applied; a cancelled upload stops between files and
+            # offers the zip of what it converted
+            continue
+        elif kind == "convert":
+            python_code, converted = job.payload["python_code"], job.result
+            if isinstance(converted, IncrementalConversion):
+                st.session_state.conversion_fragments = converted.fragments
+                if converted.reused:
+                    st.toast(f"Reused {converted.reused} of {converted.units} unchanged parts")
+                converted = converted.code
+            st.session_state.python_code = python_code
+            st.session_state.converted_code = converted
+            st.session_state.pending_fix = None
+            discard_speculative_run()
+            if st.session_state.get("speculative_validation"):
+                st.session_state.speculative_run = speculative.start(
+                    python_code,
+                    converted,
+                    include_debug=st.session_state.get("speculative_debug", False),
+                    debug_patch=st.session_state.get("debug_patch", True)
+                )
 
-Provide a clear assessment with specific feedback."""
+            # Add to history
+            st.session_state.conversion_history.append({
+                'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
+                'python': python_code[:100] + "..." if len(python_code) > 100 else python_code,
+                'ahk': converted[:100] + "..." if len(converted) > 100 else converted
+            })
+        elif kind in ("validate", "debug"):
+            # Ignore reviews of code that has been replaced since the job was queued
+            if (job.payload["python_code"] == st.session_state.python_code
+                    and job.payload["ahk_code"] == st.session_state.converted_code):
+                if isinstance(job.result, DebugPatch):
+                    st.session_state.validation_result = describe_debug_patch(job.result)
+                    st.session_state.pending_fix = job.result if job.result.code is not None else None
+                else:
+                    st.session_state.validation_result = job.result
+        elif kind == "game_script":
+            st.session_state.generated_script = {**job.payload, "code": job.result}
+        elif kind == "convert_project":
+            previous = st.session_state.project_download
+            if previous and os.path.exists(previous.output_path):
+                os.remove(previous.output_path)
+            st.session_state.project_download = job.result
+        elif kind == "save_script":
+            load_storage_report.clear()
+            if job.result is None:
+                st.session_state.loaded_script = None
+                st.error("The loaded script has been deleted; save it as a new script instead.")
+                continue
+            if job.result.script_type == "conversion":
+                # Later saves from the Convert tab update this script in place
+                st.session_state.loaded_script = {
+                    "id": job.result.id, "name": job.result.name, "version": job.result.version
+                }
+            action = "Updated" if job.payload.get("script_id") is not None else "Saved"
+            st.success(f"✅ {action} '{job.result.name}'!")
 
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5",
-            max_tokens=8192,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
-        if message.content[0].type == "text":
-            return message.content[0].text
+@st.fragment(run_every=1.0)
+def job_progress(kinds: tuple):
+    """Poll this user's running jobs and rerun the whole app once they have finished"""
+    active = [job for job in job_manager.active_jobs(owner_id) if job.kind in kinds]
+    if not active:
+        st.rerun()
+    for job in active:
+        if job.cancel_requested:
+            status = "cancelling"
+        elif job.state == jobs.QUEUED:
+            status = "queued"
         else:
-            return "Error: Unexpected response type from AI"
-    except Exception as e:
-        return f"Error during validation: {str(e)}"
-
-def debug_ahk_code(python_code: str, ahk_code: str, issue_description: str = "") -> str:
-    """Debug the AutoHotkey code and provide fixes"""
-    prompt = f"""You are an expert debugger for Python to AutoHotkey conversions.
+            status = f"running for {job.elapsed:.0f}s"
+        status_col, cancel_col = st.columns([5, 1])
+        status_col.info(f"⏳ {JOB_LABELS[job.kind]}... ({status})")
+        if not job.cancel_requested and cancel_col.button("Cancel", key=f"cancel_{job.id}"):
+            job_manager.cancel(job.id)
+            st.rerun()
+        # Per-file progress of an upload is always shown; streamed AI output only when asked for
+        if job.progress and (job.kind == "convert_project" or st.session_state.get("stream_output", True)):
+            if job.kind in JOB_LANGUAGES:
+                st.code(job.progress, language=JOB_LANGUAGES[job.kind])
+            else:
+                st.markdown(job.progress)
 
-Original Python code:
-```python
-{python_code}
-```
+def show_job_progress(*kinds: str):
+    if any(job.kind in kinds for job in job_manager.active_jobs(owner_id)):
+        job_progress(kinds)
 
-Converted AutoHotkey code:
-```ahk
-{ahk_code}
-```
+@st.cache_data(ttl=60, show_spinner=False)
+def load_storage_report() -> dict:
+    """Storage totals change slowly, so avoid re-running the report queries on every rerun"""
+    return database.get_storage_report()
 
-{f"Issue reported: {issue_description}" if issue_description else "Please identify any potential issues in this conversion."}
+def render_saved_script(script):
+    """Show one saved script's metadata; its code is only fetched once the user asks to see it"""
+    st.checkbox(f"Select '{script.name}'", key=f"select_{script.id}", label_visibility="collapsed")
+    with st.expander(f"📄 {script.name} - {script.created_at.strftime('%Y-%m-%d %H:%M')}"):
+        if script.description:
+            st.markdown(f"**Description:** {script.description}")
+        st.markdown(f"**Type:** {script.script_type}")
+        
+        col1, col2, col3 = st.columns([1, 1, 1])
+        
+        with col1:
+            if st.button("📥 Load", key=f"load_{script.id}"):
+                full_script = database.get_script_by_id(script.id)
+                if full_script:
+                    st.session_state.python_code = full_script.python_code
+                    st.session_state.converted_code = full_script.ahk_code
+                    st.session_state.loaded_script = {
+                        "id": full_script.id, "name": full_script.name, "version": full_script.version
+                    }
+                    st.success(f"Loaded '{script.name}'!")
+                    st.rerun()
+        
+        with col3:
+            if st.button("🗑️ Delete", key=f"delete_{script.id}"):
+                try:
+                    database.delete_script(script.id, expected_version=script.version)
+                    st.success(f"Deleted '{script.name}'!")
+                    st.rerun()
+                except database.ConcurrentUpdateError:
+                    st.error(f"'{script.name}' was changed in another session; reload the list before deleting it.")
+        
+        if not st.toggle("Show code", key=f"show_code_{script.id}"):
+            return
+        full_script = database.get_script_by_id(script.id)
+        if full_script is None:
+            st.warning("This script no longer exists.")
+            return
+        
+        with col2:
+            st.download_button(
+                label="📥 Download",
+                data=full_script.ahk_code,
+                file_name=f"{script.name}.ahk",
+                mime="text/plain",
+                key=f"download_{script.id}"
+            )
+        
+        st.markdown("---")
+        code_col1, code_col2 = st.columns(2)
+        
+        with code_col1:
+            if full_script.python_code:
+                st.markdown("**Python Code:**")
+                st.code(full_script.python_code, language="python", line_numbers=True)
+        
+        with code_col2:
+            st.markdown("**AutoHotkey Code:**")
+            st.code(full_script.ahk_code, language="autohotkey", line_numbers=True)
 
-Please:
-1. Identify the problem(s)
-2. Explain why it's occurring
-3. Provide the corrected AutoHotkey code
-4. Explain what was fixed"""
+def render_bulk_actions(page_scripts):
+    """Delete or retag every selected script on the current page in one transaction"""
+    selected = [script for script in page_scripts if st.session_state.get(f"select_{script.id}")]
+    if not selected:
+        return
+    st.markdown(f"**{len(selected)} selected**")
+    bulk_col1, bulk_col2, bulk_col3 = st.columns([1, 1, 1])
+    with bulk_col1:
+        if st.button(f"🗑️ Delete selected ({len(selected)})", key="bulk_delete"):
+            deleted = database.bulk_delete_scripts([script.id for script in selected])
+            st.success(f"Deleted {len(deleted)} script(s)!")
+            st.rerun()
+    with bulk_col2:
+        new_type = st.selectbox("Change type to:", list(SCRIPT_TYPES), key="bulk_script_type")
+    with bulk_col3:
+        if st.button("🏷️ Retag selected", key="bulk_retag"):
+            try:
+                database.bulk_update([
+                    {"id": script.id, "version": script.version, "script_type": SCRIPT_TYPES[new_type]}
+                    for script in selected
+                ])
+                st.success(f"Moved {len(selected)} script(s) to {new_type}!")
+                st.rerun()
+            except database.ConcurrentUpdateError:
+                st.error("Some selected scripts were changed in another session; nothing was retagged. Reload and try again.")
 
+def render_similar_scripts(game_name: str, script_type: str, task_description: str):
+    """Offer saved game scripts resembling the request, so one can be reused instead of generated"""
+    started = time.perf_counter()
     try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5",
-            max_tokens=8192,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
-        if message.content[0].type == "text":
-            return message.content[0].text
-        else:
-            return "Error: Unexpected response type from AI"
+        similar = script_similarity.find_similar_scripts(f"{game_name} {script_type} {task_description}",
+                                                         script_type="game_helper")
     except Exception as e:
-        return f"Error during debugging: {str(e)}"
-
-def highlight_code(code: str, lexer) -> str:
-    """Apply syntax highlighting to code"""
-    formatter = HtmlFormatter(style='monokai', noclasses=True, linenos=False)
-    return highlight(code, lexer, formatter)
-
-def generate_game_script(game_name: str, task_description: str, script_type: str) -> str:
-    """Generate AutoHotkey game automation script using Claude AI"""
-    prompt = f"""You are an expert in AutoHotkey game automation. Generate a complete, working AutoHotkey script for the following task:
-
-Game: {game_name}
-Task: {task_description}
-Script Type: {script_type}
+        st.caption(f"Similar-script lookup unavailable: {str(e)}")
+        return
+    if not similar:
+        return
+    st.markdown("#### ♻️ Similar saved scripts")
+    st.caption(f"Found in {(time.perf_counter() - started) * 1000:.0f} ms · reuse one instead of generating a new script")
+    for script, score in similar:
+        sim_col1, sim_col2 = st.columns([4, 1])
+        with sim_col1:
+            st.markdown(f"**{script.name}** · {score:.0%} similar  \n{script.description or ''}")
+        with sim_col2:
+            if st.button("♻️ Reuse", key=f"reuse_{script.id}", use_container_width=True):
+                saved = database.get_script_by_id(script.id)
+                if saved is None:
+                    st.error(f"'{script.name}' has been deleted.")
+                    return
+                st.session_state.generated_script = {
+                    "game_name": game_name or script.name,
+                    "script_type": script_type,
+                    "task_description": task_description,
+                    "code": saved.ahk_code,
+                    "reused_from": script.name,
+                }
+                st.rerun()
 
-Create a production-ready AutoHotkey script that:
-1. Includes proper error handling
-2. Has clear comments explaining each section
-3. Uses efficient AutoHotkey coding practices
-4. Includes safety features (pause/exit hotkeys)
-5. Is ready to run without modifications
+def render_library_transfer(script_type: str, type_label: str):
+    """Export the (filtered) library to a file and import exports from other environments"""
+    with st.expander("📦 Export / import library"):
+        export_col, import_col = st.columns(2)
+        
+        with export_col:
+            st.markdown("**Export**")
+            export_format = st.selectbox("Format:", script_archive.FORMATS, key="export_format",
+                                         format_func=lambda fmt: {"ndjson": "NDJSON", "zip": "Zip of .py/.ahk files",
+                                                                  "tar": "Tar.gz of .py/.ahk files"}[fmt])
+            scope = f"{type_label.lower()} scripts" if script_type else "all scripts"
+            if st.button(f"Prepare export of {scope}", key="prepare_export"):
+                # Written to disk batch by batch, then handed to the download button as a file
+                previous = st.session_state.get("export_file")
+                if previous and os.path.exists(previous["path"]):
+                    os.remove(previous["path"])
+                extension = script_archive.FORMAT_EXTENSIONS[export_format]
+                with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as f:
+                    count = script_archive.export_scripts(f, export_format, script_type)
+                st.session_state.export_file = {"path": f.name, "format": export_format, "count": count,
+                                                "file_name": f"ahk_scripts{extension}"}
+            export_file = st.session_state.get("export_file")
+            if export_file and os.path.exists(export_file["path"]):
+                with open(export_file["path"], "rb") as f:
+                    st.download_button(
+                        label=f"📥 Download {export_file['count']} script(s)",
+                        data=f,
+                        file_name=export_file["file_name"],
+                        mime=script_archive.FORMAT_MIME_TYPES[export_file["format"]],
+                        key="download_export"
+                    )
+        
+        with import_col:
+            st.markdown("**Import**")
+            upload = st.file_uploader("Export file:", type=["ndjson", "jsonl", "zip", "tar", "gz", "tgz"],
+                                      key="import_upload")
+            if upload is not None and st.button("📤 Import scripts", key="import_scripts"):
+                status = st.empty()
+                try:
+                    summary = script_archive.import_scripts(
+                        upload,
+                        script_archive.detect_format(upload.name),
+                        on_progress=lambda progress: status.text(
+                            f"{progress['read']} read · {progress['imported']} imported · "
+                            f"{progress['skipped']} duplicates skipped"
+                        )
+                    )
+                    load_storage_report.clear()
+                    status.success(f"Imported {summary['imported']} of {summary['read']} script(s); "
+                                   f"{summary['skipped']} already saved were skipped.")
+                except (ValueError, UnicodeDecodeError) as e:
+                    status.error(f"Import stopped: {e}. Chunks imported before the error were kept.")
 
-Provide ONLY the AutoHotkey code without explanations or markdown formatting."""
-
-    try:
-        message = client.messages.create(
-            model="claude-sonnet-4-5",
-            max_tokens=8192,
-            messages=[{
-                "role": "user",
-                "content": prompt
-            }]
-        )
-        if message.content[0].type == "text":
-            return message.content[0].text
-        else:
-            return "Error: Unexpected response type from AI"
-    except Exception as e:
-        return f"Error during script generation: {str(e)}"
+apply_finished_jobs()
 
 # App Header
 st.title("🔄 Python to AutoHotkey Converter")
 st.markdown("Convert Python scripts to AutoHotkey with AI-powered validation and debugging")
 
 # Create tabs for different functionalities
-tab1, tab2, tab3, tab4, tab5 = st.tabs(["Convert", "Saved Scripts", "Game Helper", "History", "About"])
+tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["Convert", "Saved Scripts", "Game Helper", "History", "Metrics", "About"])
 
 with tab1:
     # Input section
@@ -205,12 +408,32 @@ with tab1:
             placeholder="# Enter your Python code here\nprint('Hello, World!')"
         )
         
-        # File upload option
-        uploaded_file = st.file_uploader("Or upload a Python file (.py)", type=['py'])
+        # File upload option: one .py file goes into the editor, several files or a zip are converted together
+        uploaded_files = st.file_uploader("Or upload Python files (.py) or a zipped project (.zip)",
+                                          type=['py', 'zip'], accept_multiple_files=True)
         
-        if uploaded_file is not None:
-            python_input = uploaded_file.read().decode('utf-8')
+        if len(uploaded_files) == 1 and uploaded_files[0].name.lower().endswith(".py"):
+            python_input = uploaded_files[0].read().decode('utf-8')
             st.session_state.python_code = python_input
+        elif uploaded_files:
+            st.caption(f"{len(uploaded_files)} upload(s): each .py file is converted separately and the results "
+                       f"are collected in one zip. Up to {project_converter.MAX_FILES} files and "
+                       f"{project_converter.MAX_TOTAL_BYTES // (1024 * 1024)} MB of Python, "
+                       f"{project_converter.MAX_FILE_BYTES // 1024} KB per file.")
+            if st.button("📦 Convert uploaded files", key="convert_project"):
+                for upload in uploaded_files:
+                    upload.seek(0)
+                enqueue_job(
+                    "convert_project",
+                    project_converter.convert_project,
+                    [(upload.name, upload) for upload in uploaded_files],
+                    payload={"files": [upload.name for upload in uploaded_files]},
+                    target=st.session_state.ahk_target
+                )
+        
+        # Speculative results only apply to the Python code they were started for
+        if python_input != st.session_state.python_code:
+            discard_speculative_run()
     
     with col2:
         st.subheader("Quick Actions")
@@ -231,10 +454,25 @@ greet("User")"""
         
         # Clear button
         if st.button("Clear All"):
+            discard_speculative_run()
             st.session_state.python_code = ""
             st.session_state.converted_code = ""
             st.session_state.validation_result = ""
+            st.session_state.conversion_fragments = {}
+            st.session_state.loaded_script = None
             st.rerun()
+        
+        st.selectbox("AutoHotkey version:", ["v2", "v1"], key="ahk_target")
+        st.toggle("Stream AI output as it is generated", value=True, key="stream_output")
+        st.toggle("Only re-convert changed functions", value=True, key="incremental_conversion",
+                  help="Reuses the previous output for parts of a large file you have not edited")
+        st.toggle("Validate in the background after converting", value=False, key="speculative_validation",
+                  help="Starts the AI review as soon as a conversion finishes so Validate returns instantly")
+        if st.session_state.speculative_validation:
+            st.checkbox("Also prepare a Debug Code pass", value=False, key="speculative_debug")
+        st.toggle("Debug as a patch", value=True, key="debug_patch",
+                  help="Debug Code asks for a diff of the changed lines and applies it here, "
+                       "instead of regenerating the whole script")
     
     # Conversion buttons
     st.markdown("---")
@@ -253,30 +491,44 @@ greet("User")"""
     if convert_button:
         if python_input.strip():
             st.session_state.python_code = python_input
-            with st.spinner("Converting Python to AutoHotkey..."):
-                converted = convert_python_to_ahk(python_input)
-                st.session_state.converted_code = converted
-                
-                # Add to history
-                st.session_state.conversion_history.append({
-                    'timestamp': time.strftime("%Y-%m-%d %H:%M:%S"),
-                    'python': python_input[:100] + "..." if len(python_input) > 100 else python_input,
-                    'ahk': converted[:100] + "..." if len(converted) > 100 else converted
-                })
-                
-                st.success("Conversion complete!")
-                st.rerun()
+            discard_speculative_run()
+            if st.session_state.incremental_conversion:
+                enqueue_job(
+                    "convert",
+                    run_incremental_conversion,
+                    python_input,
+                    st.session_state.conversion_fragments,
+                    payload={"python_code": python_input},
+                    target=st.session_state.ahk_target
+                )
+            else:
+                enqueue_job(
+                    "convert",
+                    run_conversion,
+                    python_input,
+                    payload={"python_code": python_input},
+                    target=st.session_state.ahk_target
+                )
         else:
             st.error("Please enter some Python code first!")
     
     # Validation logic
     if validate_button:
         if st.session_state.converted_code and st.session_state.python_code:
-            with st.spinner("Validating conversion..."):
-                validation = validate_ahk_code(st.session_state.python_code, st.session_state.converted_code)
-                st.session_state.validation_result = validation
-                st.success("Validation complete!")
+            python_code = st.session_state.python_code
+            ahk_code = st.session_state.converted_code
+            run = st.session_state.speculative_run
+            if run is not None and run.validation_ready(python_code, ahk_code):
+                st.session_state.validation_result = run.validation_result(python_code, ahk_code)
                 st.rerun()
+            enqueue_job(
+                "validate",
+                speculative.validate,
+                python_code,
+                ahk_code,
+                payload={"python_code": python_code, "ahk_code": ahk_code},
+                run=run
+            )
         else:
             st.error("Please convert code first before validating!")
     
@@ -286,18 +538,44 @@ greet("User")"""
             # Optional: Allow user to describe the issue
             issue_desc = st.text_input("Describe the issue (optional):", key="issue_input")
             
-            with st.spinner("Debugging code..."):
-                debug_result = debug_ahk_code(
-                    st.session_state.python_code, 
-                    st.session_state.converted_code,
-                    issue_desc
-                )
-                st.session_state.validation_result = debug_result
-                st.success("Debugging complete!")
-                st.rerun()
+            python_code = st.session_state.python_code
+            ahk_code = st.session_state.converted_code
+            enqueue_job(
+                "debug",
+                speculative.debug,
+                python_code,
+                ahk_code,
+                issue_desc,
+                payload={"python_code": python_code, "ahk_code": ahk_code},
+                run=st.session_state.speculative_run,
+                patch=st.session_state.debug_patch
+            )
         else:
             st.error("Please convert code first before debugging!")
     
+    # Saves from either tab are polled here; every tab is rendered on each run
+    show_job_progress("convert", "validate", "debug", "convert_project", "save_script")
+    
+    project = st.session_state.project_download
+    if project is not None and os.path.exists(project.output_path):
+        converted = project.count(project_converter.CONVERTED)
+        problems = {path: project.errors.get(path, "") for path, status in project.statuses.items()
+                    if status in (project_converter.FAILED, project_converter.SKIPPED)}
+        if project.stopped:
+            st.warning(f"Stopped reading the upload: {project.stopped}. Files read before that were converted.")
+        with open(project.output_path, "rb") as f:
+            st.download_button(
+                label=f"📥 Download {converted} converted file(s) (.zip)",
+                data=f,
+                file_name="ahk_project.zip",
+                mime="application/zip",
+                key="download_project"
+            )
+        if problems:
+            with st.expander(f"{len(problems)} file(s) failed or were skipped"):
+                for path, reason in problems.items():
+                    st.markdown(f"- `{path}`: {reason}")
+    
     # Output section
     if st.session_state.converted_code:
         st.markdown("---")
@@ -326,19 +604,35 @@ greet("User")"""
                 save_name = st.text_input("Script name:", key="save_conversion_name")
                 save_desc = st.text_input("Description (optional):", key="save_conversion_desc")
                 submitted = st.form_submit_button("Save Script")
+                loaded_script = st.session_state.loaded_script
+                update_submitted = loaded_script is not None and st.form_submit_button(
+                    f"Update '{loaded_script['name']}'",
+                    help="Overwrite the loaded script; blank fields keep their saved values"
+                )
                 
-                if submitted and save_name:
-                    try:
-                        database.save_script(
-                            name=save_name,
-                            python_code=st.session_state.python_code,
-                            ahk_code=st.session_state.converted_code,
-                            description=save_desc or "Python to AHK conversion",
-                            script_type="conversion"
-                        )
-                        st.success(f"✅ Saved '{save_name}' to database!")
-                    except Exception as e:
-                        st.error(f"Error saving script: {str(e)}")
+                if update_submitted:
+                    # A stale version fails the job with a ConcurrentUpdateError message
+                    enqueue_job(
+                        "save_script",
+                        async_database.store_script,
+                        name=save_name or None,
+                        description=save_desc or None,
+                        python_code=st.session_state.python_code,
+                        ahk_code=st.session_state.converted_code,
+                        script_id=loaded_script["id"],
+                        expected_version=loaded_script["version"],
+                        payload={"script_id": loaded_script["id"]}
+                    )
+                elif submitted and save_name:
+                    enqueue_job(
+                        "save_script",
+                        async_database.store_script,
+                        name=save_name,
+                        python_code=st.session_state.python_code,
+                        ahk_code=st.session_state.converted_code,
+                        description=save_desc or "Python to AHK conversion",
+                        script_type="conversion"
+                    )
                 elif submitted and not save_name:
                     st.error("Please enter a script name")
         else:
@@ -360,76 +654,126 @@ greet("User")"""
             st.markdown("---")
             st.header("AI Analysis")
             st.markdown(st.session_state.validation_result)
+        
+        fix = st.session_state.pending_fix
+        if fix is not None and fix.base_code == st.session_state.converted_code:
+            st.markdown("### 🩹 Suggested Fix")
+            st.caption(f"+{fix.added} / -{fix.removed} lines, checked against the current code")
+            if fix.errors_after > fix.errors_before:
+                st.warning(f"The patched code has {fix.errors_after} static-analysis error(s), "
+                           f"up from {fix.errors_before}. Review it before applying.")
+            st.code(fix.diff, language="diff")
+            if st.button("✅ Apply fix", type="primary", key="apply_fix"):
+                st.session_state.converted_code = fix.code
+                st.session_state.pending_fix = None
+                # The analysis described the code before the fix
+                st.session_state.validation_result = ""
+                discard_speculative_run()
+                st.toast(f"Fix applied: +{fix.added} / -{fix.removed} lines")
+                st.rerun()
 
 with tab2:
     st.header("💾 Saved Scripts")
     
     if not database.is_database_available():
-        st.warning("⚠️ Database is not configured. Please set up a PostgreSQL database to use this feature.")
+        st.warning("⚠️ Database is not configured. Set DATABASE_URL for PostgreSQL, or leave LOCAL_DATABASE_PATH unset to use a local SQLite file.")
         st.info("Scripts can still be downloaded from the Convert and Game Helper tabs.")
     else:
         try:
-            saved_scripts = database.get_all_scripts()
+            # Changing the search or the filter starts again from the first page
+            def reset_script_pages():
+                st.session_state.scripts_page_cursors = [None]
+                st.session_state.search_page = 0
             
-            if saved_scripts:
-                st.markdown(f"Total saved scripts: **{len(saved_scripts)}**")
-                
-                # Filter by type
-                filter_col1, filter_col2 = st.columns([3, 1])
-                with filter_col1:
-                    filter_type = st.selectbox(
-                        "Filter by type:",
-                        ["All", "Conversion", "Game Helper"],
-                        key="filter_type"
-                    )
-                
-                filtered_scripts = saved_scripts
-                if filter_type != "All":
-                    filtered_scripts = [s for s in saved_scripts if s.script_type == filter_type.lower().replace(" ", "_")]
+            if 'scripts_page_cursors' not in st.session_state:
+                st.session_state.scripts_page_cursors = [None]
+            if 'search_page' not in st.session_state:
+                st.session_state.search_page = 0
+            
+            search_query = st.text_input(
+                "🔍 Search scripts:",
+                placeholder="Search names, descriptions and code",
+                key="script_search",
+                on_change=reset_script_pages
+            )
+            
+            # Filter by type
+            filter_col1, filter_col2 = st.columns([3, 1])
+            with filter_col1:
+                filter_type = st.selectbox(
+                    "Filter by type:",
+                    ["All", "Conversion", "Game Helper"],
+                    key="filter_type",
+                    on_change=reset_script_pages
+                )
+            script_type_filter = None if filter_type == "All" else filter_type.lower().replace(" ", "_")
+            render_library_transfer(script_type_filter, filter_type)
+            
+            if search_query.strip():
+                search_started = time.perf_counter()
+                page_scripts, has_more = database.search_scripts(
+                    search_query,
+                    script_type=script_type_filter,
+                    limit=SCRIPTS_PAGE_SIZE,
+                    offset=st.session_state.search_page * SCRIPTS_PAGE_SIZE
+                )
+                search_ms = (time.perf_counter() - search_started) * 1000
+                page_number = st.session_state.search_page + 1
                 
-                for script in filtered_scripts:
-                    with st.expander(f"📄 {script.name} - {script.created_at.strftime('%Y-%m-%d %H:%M')}"):
-                        if script.description:
-                            st.markdown(f"**Description:** {script.description}")
-                        st.markdown(f"**Type:** {script.script_type}")
-                        
-                        col1, col2, col3 = st.columns([1, 1, 1])
-                        
-                        with col1:
-                            if st.button("📥 Load", key=f"load_{script.id}"):
-                                st.session_state.python_code = script.python_code
-                                st.session_state.converted_code = script.ahk_code
-                                st.success(f"Loaded '{script.name}'!")
-                                st.rerun()
-                        
-                        with col2:
-                            st.download_button(
-                                label="📥 Download",
-                                data=script.ahk_code,
-                                file_name=f"{script.name}.ahk",
-                                mime="text/plain",
-                                key=f"download_{script.id}"
-                            )
-                        
-                        with col3:
-                            if st.button("🗑️ Delete", key=f"delete_{script.id}"):
-                                database.delete_script(script.id)
-                                st.success(f"Deleted '{script.name}'!")
-                                st.rerun()
-                        
-                        st.markdown("---")
-                        code_col1, code_col2 = st.columns(2)
-                        
-                        with code_col1:
-                            if script.python_code:
-                                st.markdown("**Python Code:**")
-                                st.code(script.python_code, language="python", line_numbers=True)
-                        
-                        with code_col2:
-                            st.markdown("**AutoHotkey Code:**")
-                            st.code(script.ahk_code, language="autohotkey", line_numbers=True)
+                if page_scripts:
+                    st.markdown(f"Best matches for **{search_query}** · page {page_number} · {search_ms:.0f} ms")
+                    for script in page_scripts:
+                        render_saved_script(script)
+                    render_bulk_actions(page_scripts)
+                    
+                    prev_col, next_col = st.columns(2)
+                    with prev_col:
+                        if page_number > 1 and st.button("⬅️ Previous page", key="search_prev_page"):
+                            st.session_state.search_page -= 1
+                            st.rerun()
+                    with next_col:
+                        if has_more and st.button("Next page ➡️", key="search_next_page"):
+                            st.session_state.search_page += 1
+                            st.rerun()
+                elif page_number > 1:
+                    st.session_state.search_page = 0
+                    st.rerun()
+                else:
+                    st.info(f"No saved scripts match '{search_query}'.")
             else:
-                st.info("No saved scripts yet. Convert some code and save it to get started!")
+                total_scripts = database.count_scripts(script_type_filter)
+                page_scripts, next_cursor = database.list_scripts(
+                    script_type=script_type_filter,
+                    limit=SCRIPTS_PAGE_SIZE,
+                    after=st.session_state.scripts_page_cursors[-1]
+                )
+                
+                if page_scripts:
+                    # Cursors of every page visited so far; the last one is the page being shown
+                    page_number = len(st.session_state.scripts_page_cursors)
+                    st.markdown(f"Total saved scripts: **{total_scripts}** · page {page_number}")
+                    
+                    for script in page_scripts:
+                        render_saved_script(script)
+                    render_bulk_actions(page_scripts)
+                    
+                    prev_col, next_col = st.columns(2)
+                    with prev_col:
+                        if page_number > 1 and st.button("⬅️ Previous page", key="scripts_prev_page"):
+                            st.session_state.scripts_page_cursors.pop()
+                            st.rerun()
+                    with next_col:
+                        if next_cursor and st.button("Next page ➡️", key="scripts_next_page"):
+                            st.session_state.scripts_page_cursors.append(next_cursor)
+                            st.rerun()
+                elif len(st.session_state.scripts_page_cursors) > 1:
+                    # The page emptied out (e.g. after deletes); go back to the first page
+                    st.session_state.scripts_page_cursors = [None]
+                    st.rerun()
+                elif script_type_filter:
+                    st.info(f"No saved {filter_type.lower()} scripts yet.")
+                else:
+                    st.info("No saved scripts yet. Convert some code and save it to get started!")
         except Exception as e:
             st.error(f"Error loading scripts: {str(e)}")
 
@@ -485,61 +829,80 @@ with tab3:
             st.session_state["task_desc"] = "Repeat a sequence: Press 'E' to collect, wait 2 seconds, move mouse in a circle pattern, wait 1 second, repeat. F1 to start/stop."
             st.rerun()
     
+    if database.is_database_available() and task_description:
+        render_similar_scripts(game_name, script_type, task_description)
+    
     if st.button("🤖 Generate Game Script", type="primary", use_container_width=True):
         if game_name and task_description:
-            with st.spinner("Generating game automation script..."):
-                generated_script = generate_game_script(game_name, task_description, script_type)
-                
-                st.markdown("---")
-                st.subheader("Generated AutoHotkey Script")
-                
-                save_col1, save_col2, save_col3 = st.columns([2, 1, 1])
+            enqueue_job(
+                "game_script",
+                run_game_script,
+                game_name,
+                task_description,
+                script_type,
+                payload={"game_name": game_name, "script_type": script_type, "task_description": task_description}
+            )
+        else:
+            st.error("Please provide both game name and task description!")
+    
+    show_job_progress("game_script")
+    
+    if st.session_state.generated_script:
+        generated = st.session_state.generated_script
+        generated_script = generated["code"]
+        
+        st.markdown("---")
+        st.subheader("Generated AutoHotkey Script")
+        if generated.get("reused_from"):
+            st.info(f"♻️ Reused saved script '{generated['reused_from']}' instead of generating a new one")
+        
+        save_col1, save_col2, save_col3 = st.columns([2, 1, 1])
+        
+        with save_col2:
+            st.download_button(
+                label="📥 Download",
+                data=generated_script,
+                file_name=f"{generated['game_name'].replace(' ', '_')}_bot.ahk",
+                mime="text/plain",
+                use_container_width=True
+            )
+        
+        
+        st.code(generated_script, language="autohotkey", line_numbers=True)
+        
+        # Save to database form
+        if database.is_database_available():
+            with st.form("save_game_script_form", clear_on_submit=True):
+                st.markdown("### 💾 Save to Database")
+                default_desc = f"{generated['script_type']} for {generated['game_name']}"
+                if generated.get("task_description"):
+                    # The task text lets similar future requests find this script
+                    default_desc += f": {generated['task_description']}"
+                game_save_name = st.text_input("Script name:", key="game_script_name")
+                game_save_desc = st.text_input("Description (optional):", key="game_script_desc", value=default_desc)
+                game_submitted = st.form_submit_button("Save Script")
                 
-                with save_col2:
-                    st.download_button(
-                        label="📥 Download",
-                        data=generated_script,
-                        file_name=f"{game_name.replace(' ', '_')}_bot.ahk",
-                        mime="text/plain",
-                        use_container_width=True
+                if game_submitted and game_save_name:
+                    enqueue_job(
+                        "save_script",
+                        async_database.store_script,
+                        name=game_save_name,
+                        python_code="",
+                        ahk_code=generated_script,
+                        description=game_save_desc or default_desc,
+                        script_type="game_helper"
                     )
-                
-                
-                st.code(generated_script, language="autohotkey", line_numbers=True)
-                
-                # Save to database form
-                if database.is_database_available():
-                    with st.form("save_game_script_form", clear_on_submit=True):
-                        st.markdown("### 💾 Save to Database")
-                        game_save_name = st.text_input("Script name:", key="game_script_name")
-                        game_save_desc = st.text_input("Description (optional):", key="game_script_desc", value=f"{script_type} for {game_name}")
-                        game_submitted = st.form_submit_button("Save Script")
-                        
-                        if game_submitted and game_save_name:
-                            try:
-                                database.save_script(
-                                    name=game_save_name,
-                                    python_code="",
-                                    ahk_code=generated_script,
-                                    description=game_save_desc or f"{script_type} for {game_name}",
-                                    script_type="game_helper"
-                                )
-                                st.success(f"✅ Saved '{game_save_name}' to database!")
-                            except Exception as e:
-                                st.error(f"Error saving script: {str(e)}")
-                        elif game_submitted and not game_save_name:
-                            st.error("Please enter a script name")
-                else:
-                    st.info("💡 Database not configured. Scripts can only be downloaded.")
-                
-                st.markdown("---")
-                st.warning("⚠️ **Important Safety Notes:**\n"
-                          "- Test scripts in a safe environment first\n"
-                          "- Many games have anti-cheat systems that may detect automation\n"
-                          "- Use automation responsibly and check game terms of service\n"
-                          "- Always include pause/exit hotkeys for safety")
+                elif game_submitted and not game_save_name:
+                    st.error("Please enter a script name")
         else:
-            st.error("Please provide both game name and task description!")
+            st.info("💡 Database not configured. Scripts can only be downloaded.")
+        
+        st.markdown("---")
+        st.warning("⚠️ **Important Safety Notes:**\n"
+                  "- Test scripts in a safe environment first\n"
+                  "- Many games have anti-cheat systems that may detect automation\n"
+                  "- Use automation responsibly and check game terms of service\n"
+                  "- Always include pause/exit hotkeys for safety")
 
 with tab4:
     st.header("Conversion History")
@@ -560,6 +923,59 @@ with tab4:
         st.info("No conversions yet. Start converting Python code to AutoHotkey!")
 
 with tab5:
+    st.header("AI Call Metrics")
+    st.markdown("Latency, token use and truncation for every request sent to Claude, grouped by operation.")
+
+    sources = ["This server process"]
+    if database.is_database_available():
+        sources.append("Database")
+    source = st.radio("Source", sources, horizontal=True, key="metrics_source")
+    if source == "Database":
+        hours = st.number_input("Last N hours", min_value=1, max_value=24 * llm_metrics.METRICS_RETENTION_DAYS,
+                                value=24, key="metrics_hours")
+        try:
+            call_records = database.get_llm_calls(since=datetime.utcnow() - timedelta(hours=hours))
+        except Exception as e:
+            st.error(f"Could not load call metrics: {str(e)}")
+            call_records = []
+    else:
+        call_records = llm_metrics.recorder.recent()
+        st.caption(f"The most recent {llm_metrics.METRICS_WINDOW} calls made by this process")
+
+    call_summary = llm_metrics.summarize(call_records)
+    if call_summary:
+        def fmt_ms(value):
+            return "–" if value is None else f"{value:,}"
+
+        st.table([
+            {
+                "Operation": operation,
+                "Calls": stats["calls"],
+                "p50 (ms)": fmt_ms(stats["p50_ms"]),
+                "p95 (ms)": fmt_ms(stats["p95_ms"]),
+                "p99 (ms)": fmt_ms(stats["p99_ms"]),
+                "First token p50 (ms)": fmt_ms(stats["ttft_p50_ms"]),
+                "Input tokens / call": f"{stats['input_tokens'] // stats['calls']:,}",
+                "Output tokens / call": f"{stats['output_tokens'] // stats['calls']:,}",
+                "Cache-read tokens": f"{stats['cache_read_input_tokens']:,}",
+                "Truncated": f"{stats['truncation_rate']:.1%}",
+                "Errors": f"{stats['error_rate']:.1%}",
+            }
+            for operation, stats in call_summary.items()
+        ])
+        st.caption("Each attempt counts separately, including retries; time to first token is only measured "
+                   f"for streamed responses · {llm_metrics.recorder.errors} metrics write error(s)")
+        st.download_button(
+            label="📥 Download Prometheus metrics",
+            data=llm_metrics.prometheus_text(call_records),
+            file_name="llm_metrics.prom",
+            mime="text/plain",
+            key="download_prometheus"
+        )
+    else:
+        st.info("No AI calls recorded yet.")
+
+with tab6:
     st.header("About This App")
     
     st.markdown("""
@@ -607,4 +1023,72 @@ with tab5:
     - Use the validation feature to catch potential issues
     - Save your favorite scripts for reuse
     - Check game terms of service before using automation
-    """)
\ No newline at end of file
+    """)    
+    st.markdown("### ⚡ Response Cache")
+    cache_stats = llm_cache.response_cache.stats()
+    cache_col1, cache_col2, cache_col3, cache_col4 = st.columns(4)
+    cache_col1.metric("Memory hits", cache_stats["memory_hits"])
+    cache_col2.metric("Database hits", cache_stats["persistent_hits"])
+    cache_col3.metric("Misses", cache_stats["misses"])
+    cache_col4.metric("Hit rate", f"{cache_stats['hit_rate']:.0%}")
+    flight_stats = llm_cache.single_flight.stats()
+    st.caption(f"{cache_stats['memory_entries']} responses held in memory · "
+               f"{cache_stats['evictions']} evictions · {cache_stats['errors']} cache errors · "
+               f"{flight_stats['coalesced']} duplicate in-flight requests joined")
+
+    st.markdown("### 🧩 Prompt Cache")
+    usage = llm_metrics.recorder.usage()
+    prompt_col1, prompt_col2, prompt_col3, prompt_col4 = st.columns(4)
+    prompt_col1.metric("AI requests", usage["requests"])
+    prompt_col2.metric("Cache-read tokens", f"{usage['cache_read_input_tokens']:,}")
+    prompt_col3.metric("Cache-write tokens", f"{usage['cache_creation_input_tokens']:,}")
+    # Cache reads are billed at a tenth of the normal input price
+    prompt_col4.metric("Input tokens saved", f"{int(usage['cache_read_input_tokens'] * 0.9):,}")
+    st.caption(f"{usage['input_tokens']:,} uncached input tokens · {usage['output_tokens']:,} output tokens")
+    routing = model_router.stats()
+    if routing["requests_by_model"]:
+        by_model = " · ".join(f"{count} to {model}" for model, count in sorted(routing["requests_by_model"].items()))
+        st.caption(f"Model routing: {by_model} · {routing['truncated']} response(s) hit max_tokens")
+
+    st.markdown("### 🚦 AI Request Scheduler")
+    scheduler_stats = llm_scheduler.scheduler.metrics()
+    sched_col1, sched_col2, sched_col3 = st.columns(3)
+    sched_col1.metric("In flight", f"{scheduler_stats['in_flight']}/{scheduler_stats['max_concurrency']}")
+    sched_col2.metric("Rate-limited responses", scheduler_stats["rate_limited"])
+    sched_col3.metric("Backing off", f"{scheduler_stats['paused_for']:.0f}s")
+    st.table([
+        {
+            "Lane": lane,
+            "Queued": stats["queued"],
+            "Completed": stats["completed"],
+            "Failed": stats["failed"],
+            "Retries": stats["retries"],
+            "Queue wait p50 (ms)": f"{stats['wait_p50_ms']:.0f}",
+            "Queue wait p95 (ms)": f"{stats['wait_p95_ms']:.0f}",
+        }
+        for lane, stats in scheduler_stats["lanes"].items()
+    ])
+
+    st.markdown("### 🧵 Background Jobs")
+    job_stats = job_manager.metrics()
+    job_col1, job_col2, job_col3, job_col4 = st.columns(4)
+    job_col1.metric("Queue depth", job_stats["queue_depth"])
+    job_col2.metric("Running", f"{job_stats['running']}/{job_stats['workers']}")
+    job_col3.metric("Active users", job_stats["active_users"])
+    job_col4.metric("Rejected (over limit)", job_stats["rejected"])
+    st.caption(f"{job_stats['completed']} completed · {job_stats['failed']} failed · "
+               f"up to {job_stats['per_user_limit']} active job(s) per user")
+
+    if database.is_database_available():
+        st.markdown("### 💽 Script Storage")
+        try:
+            storage = load_storage_report()
+            storage_col1, storage_col2, storage_col3, storage_col4 = st.columns(4)
+            storage_col1.metric("Scripts", storage["scripts"])
+            storage_col2.metric("Unique code blobs", storage["blobs"])
+            storage_col3.metric("Stored", f"{storage['stored_bytes'] / 1024:,.1f} KB")
+            storage_col4.metric("Saved", f"{storage['saved_bytes'] / 1024:,.1f} KB")
+            st.caption(f"{storage['logical_bytes'] / 1024:,.1f} KB of code as saved · "
+                       f"{storage['dedup_ratio']:.1f}x deduplication · {storage['compression_ratio']:.1f}x compression")
+        except Exception as e:
+            st.error(f"Error loading storage report: {str(e)}")
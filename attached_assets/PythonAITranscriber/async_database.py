@@ -0,0 +1,158 @@
+import asyncio
+import threading
+from importlib.util import find_spec
+from contextlib import asynccontextmanager
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+import database
+
+# The async drivers (sqlalchemy[asyncio], asyncpg, aiosqlite) are an optional install,
+# so they are only imported once the async engine is first needed.
+async_engine = None
+AsyncSessionLocal = None
+
+_engine_lock = threading.Lock()
+# Pooled async connections belong to the event loop that opened them, so sync callers such as
+# job worker threads all run their coroutines on this one loop instead of asyncio.run each time
+_loop = None
+_loop_lock = threading.Lock()
+
+# Driver each backend needs on the async path
+ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+def is_available() -> bool:
+    """Whether the database is configured and the async extra's drivers for it are installed"""
+    if not database.is_database_available():
+        return False
+    driver = ASYNC_DRIVERS.get(make_url(database.DATABASE_URL).get_backend_name())
+    return driver is not None and find_spec(driver) is not None and find_spec("greenlet") is not None
+
+def async_database_url(url: str) -> str:
+    """Map a sync database URL onto its asyncio driver (asyncpg for Postgres, aiosqlite for SQLite)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        # asyncpg spells libpq's sslmode as ssl
+        query = dict(parsed.query)
+        sslmode = query.pop("sslmode", None)
+        if sslmode:
+            query["ssl"] = sslmode
+        parsed = parsed.set(drivername="postgresql+asyncpg", query=query)
+    elif backend == "sqlite":
+        parsed = parsed.set(drivername="sqlite+aiosqlite")
+    else:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    return parsed.render_as_string(hide_password=False)
+
+def get_async_engine():
+    """Lazy initialization of the async database engine"""
+    global async_engine, AsyncSessionLocal
+    if async_engine is None:
+        if not database.is_database_available():
+            raise ValueError("Database is not configured. DATABASE_URL environment variable is not set.")
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        with _engine_lock:
+            if async_engine is None:
+                url = async_database_url(database.DATABASE_URL)
+                async_engine = create_async_engine(url, **database.engine_options(database.DATABASE_URL))
+                if async_engine.dialect.name == "sqlite":
+                    event.listen(async_engine.sync_engine, "connect", database.configure_sqlite_connection)
+                AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return async_engine
+
+def _get_loop():
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="async-db", daemon=True).start()
+    return _loop
+
+def run(coro):
+    """Run a coroutine from this module on the shared loop and wait for its result from sync code"""
+    return asyncio.run_coroutine_threadsafe(coro, _get_loop()).result()
+
+@asynccontextmanager
+async def async_session_scope():
+    """Yield an AsyncSession that commits on success, rolls back on error and is always closed"""
+    get_async_engine()
+    db = AsyncSessionLocal()
+    try:
+        yield db
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
+
+async def init_db():
+    """Create the schema and run migrations; shared with the sync path and done once per process"""
+    await asyncio.to_thread(database.init_db)
+
+async def save_script(name: str, python_code: str, ahk_code: str, description: str = "", script_type: str = "conversion"):
+    """Save a script to the database"""
+    async with async_session_scope() as db:
+        return await db.run_sync(database._save_script, name, python_code, ahk_code, description, script_type)
+
+async def get_all_scripts(script_type: str = None):
+    """Get all saved scripts, optionally filtered by type"""
+    async with async_session_scope() as db:
+        return await db.run_sync(database._get_all_scripts, script_type)
+
+async def get_script_by_id(script_id: int):
+    """Get a specific script by ID"""
+    async with async_session_scope() as db:
+        return await db.run_sync(database._get_script_by_id, script_id)
+
+async def update_script(script_id: int, name: str = None, description: str = None, python_code: str = None,
+                        ahk_code: str = None, expected_version: int = None):
+    """Update an existing script; raises ConcurrentUpdateError if expected_version is stale"""
+    async with async_session_scope() as db:
+        return await db.run_sync(database._update_script, script_id, name, description, python_code, ahk_code,
+                                 expected_version)
+
+async def delete_script(script_id: int, expected_version: int = None):
+    """Delete a script by ID; raises ConcurrentUpdateError if expected_version is stale"""
+    async with async_session_scope() as db:
+        return await db.run_sync(database._delete_script, script_id, expected_version)
+
+async def bulk_save_scripts(scripts):
+    """Save many scripts in one transaction and return their ids in input order"""
+    async with async_session_scope() as db:
+        return await db.run_sync(database._bulk_save_scripts, scripts)
+
+async def bulk_delete_scripts(script_ids):
+    """Delete many scripts at once; returns the ids that existed"""
+    async with async_session_scope() as db:
+        return await db.run_sync(database._bulk_delete_scripts, script_ids)
+
+async def bulk_update(updates):
+    """Change name, description or script_type of many scripts in one transaction"""
+    async with async_session_scope() as db:
+        return await db.run_sync(database._bulk_update, updates)
+
+def store_script(name: str, python_code: str, ahk_code: str, description: str = "",
+                 script_type: str = "conversion", script_id: int = None, expected_version: int = None,
+                 on_text=None):
+    """Background-job entry point: save a new script, or update script_id when it is given.
+
+    Returns the saved script, or None when script_id has been deleted. Raises
+    ConcurrentUpdateError if expected_version is stale. Without the async extra the
+    sync functions in database do the same work.
+    """
+    if script_id is None:
+        if not is_available():
+            return database.save_script(name, python_code, ahk_code, description, script_type)
+        return run(save_script(name, python_code, ahk_code, description, script_type))
+    if not is_available():
+        return database.update_script(script_id, name, description, python_code, ahk_code, expected_version)
+    return run(update_script(script_id, name, description, python_code, ahk_code, expected_version))
+
+async def dispose():
+    """Close pooled async connections, e.g. before the event loop shuts down"""
+    global async_engine, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+        async_engine = None
+        AsyncSessionLocal = None
@@ -0,0 +1,306 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import platform
+import tempfile
+import subprocess
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+# Approximate line counts of the generated conversion corpus, smallest first
+CORPUS_SIZES = (20, 80, 320, 1280)
+RESULTS_FORMAT = 1
+# Metrics compared against a baseline, and whether a higher value is better
+COMPARED_METRICS = {"throughput_rps": True, "p50_ms": False, "p95_ms": False, "p99_ms": False, "ops_per_second": True}
+
+# Top-level units the generated modules are built from. Some the local transpiler handles
+# and some it cannot, so larger modules exercise both paths and chunked conversion.
+_UNIT_TEMPLATES = (
+    '''def count_up_{n}(limit):
+    for i in range(limit):
+        print(i)
+''',
+    '''class Counter{n}:
+    def __init__(self, start=0):
+        self.value = start
+
+    def step(self, amount=1):
+        self.value += amount
+        return self.value
+''',
+    '''def squares_{n}(values):
+    return [v * v for v in values if v % 2 == 0]
+''',
+    '''def lookup_{n}(table, key):
+    try:
+        return table[key]
+    except KeyError:
+        return None
+''',
+    '''def greet_{n}(name):
+    message = "Hello, " + name
+    print(message)
+    return message
+''',
+)
+
+def configure_environment(base_url: str, database_path: str):
+    """Point the app modules at the stand-in API and a scratch SQLite file.
+
+    Must run before database, llm_metrics or converter are imported, since they read
+    their settings at import time. Scheduler limits are only raised when not set, so a
+    benchmark can still measure the app under real limits.
+    """
+    os.environ["AI_INTEGRATIONS_ANTHROPIC_BASE_URL"] = base_url
+    os.environ.setdefault("AI_INTEGRATIONS_ANTHROPIC_API_KEY", "benchmark")
+    os.environ["DATABASE_URL"] = f"sqlite:///{database_path}"
+    os.environ.setdefault("LLM_REQUESTS_PER_MINUTE", "100000")
+    os.environ.setdefault("LLM_TOKENS_PER_MINUTE", "100000000")
+    os.environ.setdefault("LLM_MAX_CONCURRENCY", "32")
+    os.environ.setdefault("LLM_METRICS_WINDOW", "1000000")
+
+def build_module(lines: int, seed: int = 0) -> str:
+    """A deterministic Python module of roughly `lines` lines mixing the unit templates"""
+    rng = random.Random(seed)
+    parts = ["import os", ""]
+    count = 2
+    n = 0
+    while count < lines:
+        n += 1
+        unit = rng.choice(_UNIT_TEMPLATES).format(n=n)
+        parts.append(unit)
+        count += unit.count("\n") + 1
+    return "\n".join(parts)
+
+def build_corpus(sizes=CORPUS_SIZES) -> list:
+    """Return (name, code) pairs of increasing size"""
+    return [(f"module_{size}_lines", build_module(size, seed=size)) for size in sizes]
+
+def _unique(code: str) -> str:
+    # A fresh global name changes the chunk header too, so neither cache tier can answer
+    return f"_benchmark_{uuid.uuid4().hex[:12]} = 0\n{code}"
+
+def latency_stats(samples_ms: list) -> dict:
+    import llm_metrics
+
+    ordered = sorted(samples_ms)
+    return {
+        "p50_ms": llm_metrics.percentile(ordered, 0.50),
+        "p95_ms": llm_metrics.percentile(ordered, 0.95),
+        "p99_ms": llm_metrics.percentile(ordered, 0.99),
+        "max_ms": ordered[-1] if ordered else None,
+    }
+
+def _measure(func, inputs: list, concurrency: int) -> dict:
+    """Call func on every input from `concurrency` threads; report throughput, latency and AI calls"""
+    import llm_metrics
+
+    calls_before = len(llm_metrics.recorder.recent())
+    latencies, errors = [], []
+
+    def timed(value):
+        started = time.perf_counter()
+        try:
+            func(value)
+        except Exception as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, inputs))
+    elapsed = time.perf_counter() - started
+
+    calls = llm_metrics.recorder.recent()[calls_before:]
+    ttfts = sorted(call.ttft_ms for call in calls if call.ttft_ms is not None)
+    return {
+        "requests": len(inputs),
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(inputs) / elapsed, 3) if elapsed else None,
+        **{key: round(value, 1) if value is not None else None for key, value in latency_stats(latencies).items()},
+        "ai_calls": len(calls),
+        "ai_call_outcomes": {outcome: sum(1 for call in calls if call.outcome == outcome)
+                             for outcome in sorted({call.outcome for call in calls})},
+        "ttft_p50_ms": llm_metrics.percentile(ttfts, 0.50),
+        "input_tokens": sum(call.input_tokens for call in calls),
+        "output_tokens": sum(call.output_tokens for call in calls),
+        "cache_read_input_tokens": sum(call.cache_read_input_tokens for call in calls),
+    }
+
+def bench_conversion(corpus: list, requests: int, concurrency: int, stream: bool = False) -> list:
+    """Throughput and tail latency of run_conversion per corpus module, uncached then cached"""
+    import converter
+    import llm_scheduler
+
+    on_text = (lambda text: None) if stream else None
+    results = []
+    for name, code in corpus:
+        inputs = [_unique(code) for _ in range(requests)]
+        convert = lambda source: converter.run_conversion(source, on_text=on_text, priority=llm_scheduler.BATCH)
+        cold = _measure(convert, inputs, concurrency)
+        warm = _measure(convert, inputs, concurrency)
+        results.append({"input": name, "lines": code.count("\n") + 1, "chars": len(code),
+                        "uncached": cold, "cached": warm})
+    return results
+
+def bench_operations(code: str, requests: int, concurrency: int, stream: bool = False) -> dict:
+    """Throughput and tail latency of validate, debug (full and patch) and game-script generation"""
+    import converter
+
+    on_text = (lambda text: None) if stream else None
+    ahk_code = converter.run_conversion(code)
+    return {
+        "validate": _measure(
+            lambda source: converter.validate_ahk_code(source, ahk_code, on_text=on_text),
+            [_unique(code) for _ in range(requests)], concurrency),
+        "debug": _measure(
+            lambda source: converter.debug_ahk_code(source, ahk_code, on_text=on_text),
+            [_unique(code) for _ in range(requests)], concurrency),
+        "debug_patch": _measure(
+            lambda source: converter.run_debug_patch(source, ahk_code, on_text=on_text),
+            [_unique(code) for _ in range(requests)], concurrency),
+        "game_script": _measure(
+            lambda task: converter.run_game_script("Benchmark Game", task, "Auto-clicker", on_text=on_text),
+            [f"Click every second ({uuid.uuid4().hex[:8]})" for _ in range(requests)], concurrency),
+    }
+
+def _timed_calls(func, count: int) -> dict:
+    latencies = []
+    started = time.perf_counter()
+    for i in range(count):
+        call_started = time.perf_counter()
+        func(i)
+        latencies.append((time.perf_counter() - call_started) * 1000)
+    elapsed = time.perf_counter() - started
+    stats = {key: round(value, 3) if value is not None else None for key, value in latency_stats(latencies).items()}
+    return {"operations": count, "elapsed_s": round(elapsed, 3),
+            "ops_per_second": round(count / elapsed, 1) if elapsed else None, **stats}
+
+def bench_database(rows: int) -> dict:
+    """Save, bulk-save, paginated listing, search and point reads against the scratch SQLite file"""
+    import database
+
+    database.init_db()
+    corpus = build_corpus((20, 80))
+    singles = max(1, rows // 10)
+
+    def script(i):
+        _, code = corpus[i % len(corpus)]
+        return {"name": f"Benchmark script {i}", "description": f"clicker farming macro {i % 17}",
+                "python_code": code + f"\n# {i}\n", "ahk_code": f"; script {i}\nMsgBox \"{i}\"\n"}
+
+    results = {"rows": rows}
+    results["save_script"] = _timed_calls(lambda i: database.save_script(**script(i)), singles)
+    batch = 100
+    results["bulk_save_scripts"] = _timed_calls(
+        lambda i: database.bulk_save_scripts([script(singles + i * batch + j) for j in range(batch)]),
+        max(1, (rows - singles) // batch))
+    results["bulk_save_scripts"]["rows_per_second"] = round(
+        results["bulk_save_scripts"]["ops_per_second"] * batch, 1)
+
+    cursor_state = {"after": None}
+
+    def next_page(_):
+        page, cursor_state["after"] = database.list_scripts(limit=25, after=cursor_state["after"])
+
+    pages = -(-database.count_scripts() // 25)
+    results["list_scripts_page"] = _timed_calls(next_page, pages)
+    results["count_scripts"] = _timed_calls(lambda i: database.count_scripts(), 50)
+    terms = ["clicker", "farming macro", "benchmark script 1", "counter", "squares"]
+    results["search_scripts"] = _timed_calls(lambda i: database.search_scripts(terms[i % len(terms)]), 100)
+    ids = [row.id for row in database.list_scripts(limit=200)[0]]
+    results["get_script_by_id"] = _timed_calls(lambda i: database.get_script_by_id(ids[i % len(ids)]), 200)
+    return results
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run(base_url: str = None, api_config=None, sizes=CORPUS_SIZES, requests: int = 8, concurrency: int = 4,
+        db_rows: int = 2000, stream: bool = False, suites=("conversion", "operations", "database")) -> dict:
+    """Run the selected suites against the stand-in API (started here unless base_url is given).
+
+    Returns a JSON-serialisable results dict.
+    """
+    import fake_anthropic
+
+    fake_api = None
+    if base_url is None:
+        fake_api = fake_anthropic.FakeAnthropicAPI(api_config).start()
+        base_url = fake_api.base_url
+    workdir = tempfile.mkdtemp(prefix="ahk_benchmark_")
+    configure_environment(base_url, os.path.join(workdir, "benchmark.db"))
+    import converter
+    import database
+
+    database.init_db()
+    corpus = build_corpus(sizes)
+    results = {
+        "format": RESULTS_FORMAT,
+        "started_at": datetime.utcnow().isoformat(),
+        "revision": _git_revision(),
+        "prompt_version": converter.PROMPT_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {"requests": requests, "concurrency": concurrency, "stream": stream, "db_rows": db_rows,
+                   "base_url": base_url if fake_api is None else "in-process stand-in"},
+        "suites": {},
+    }
+    try:
+        if "conversion" in suites:
+            results["suites"]["conversion"] = bench_conversion(corpus, requests, concurrency, stream)
+        if "operations" in suites:
+            results["suites"]["operations"] = bench_operations(corpus[min(1, len(corpus) - 1)][1], requests,
+                                                               concurrency, stream)
+        if "database" in suites:
+            results["suites"]["database"] = bench_database(db_rows)
+    finally:
+        if fake_api is not None:
+            results["fake_api"] = fake_api.snapshot()
+            fake_api.stop()
+    return results
+
+def _flatten(value, prefix: str = "") -> dict:
+    """Map "suite.input.metric" paths to numbers, keyed by input name where results are lists"""
+    flat = {}
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}{key}."))
+    elif isinstance(value, list):
+        for item in value:
+            label = item.get("input", "?") if isinstance(item, dict) else "?"
+            flat.update(_flatten(item, f"{prefix}{label}."))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        flat[prefix[:-1]] = value
+    return flat
+
+def compare(results: dict, baseline: dict, threshold: float = 0.10) -> list:
+    """Return (metric, baseline, current, change) for metrics that got worse by more than threshold"""
+    current = _flatten(results.get("suites", {}))
+    previous = _flatten(baseline.get("suites", {}))
+    regressions = []
+    for path, before in previous.items():
+        metric = path.rsplit(".", 1)[-1]
+        if metric not in COMPARED_METRICS or path not in current or not before:
+            continue
+        after = current[path]
+        change = (after - before) / before
+        worse = -change if COMPARED_METRICS[metric] else change
+        if worse > threshold:
+            regressions.append((path, before, after, change))
+    return regressions
+
+def write_results(results: dict, output: str = None):
+    text = json.dumps(results, indent=2, default=str)
+    if output in (None, "-"):
+        sys.stdout.write(text + "\n")
+    else:
+        with open(output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
@@ -0,0 +1,183 @@
+import ast
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+
+# Files at or above either threshold are converted unit by unit
+CHUNK_MIN_LINES = 150
+CHUNK_MIN_CHARS = 6000
+# Adjacent small units are merged until a chunk reaches roughly this size
+CHUNK_TARGET_CHARS = 3000
+MAX_WORKERS = 4
+
+class ChunkConversionError(RuntimeError):
+    """Raised by convert_in_chunks when some units failed; code is the output with a comment in their place"""
+
+    def __init__(self, failures: list, code: str):
+        self.failures = failures
+        self.code = code
+        details = "; ".join(f"lines {unit.start_line}-{unit.end_line} ({unit.name}): {error}"
+                            for unit, error in failures[:3])
+        more = f" and {len(failures) - 3} more" if len(failures) > 3 else ""
+        super().__init__(f"{len(failures)} part(s) could not be converted: {details}{more}")
+
+@dataclass
+class SourceUnit:
+    """A contiguous top-level slice of a Python module"""
+    kind: str
+    name: str
+    source: str
+    start_line: int
+    end_line: int
+
+def _unit_kind(node) -> str:
+    if isinstance(node, (ast.Import, ast.ImportFrom)):
+        return "imports"
+    if isinstance(node, ast.ClassDef):
+        return "class"
+    if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+        return "function"
+    return "module"
+
+def split_source(source: str) -> list:
+    """Split a module into top-level units: import blocks, classes, functions and module-body runs.
+
+    Comments and blank lines between statements stay with the unit that follows them,
+    so joining every unit's source reproduces the original file.
+    """
+    tree = ast.parse(source)
+    lines = source.splitlines(keepends=True)
+    units = []
+    next_line = 1
+
+    for node in tree.body:
+        kind = _unit_kind(node)
+        # Decorators sit between the previous unit's end and this node, so they come along
+        end = node.end_lineno
+        name = getattr(node, "name", kind)
+
+        # Consecutive imports and consecutive module statements form a single unit
+        if units and kind in ("imports", "module") and units[-1].kind == kind:
+            previous = units[-1]
+            previous.source += "".join(lines[next_line - 1:end])
+            previous.end_line = end
+        else:
+            units.append(SourceUnit(kind, name, "".join(lines[next_line - 1:end]), next_line, end))
+        next_line = end + 1
+
+    trailing = "".join(lines[next_line - 1:])
+    if trailing:
+        if units:
+            units[-1].source += trailing
+            units[-1].end_line = len(lines)
+        else:
+            units.append(SourceUnit("module", "module", trailing, 1, len(lines)))
+    return units
+
+def merge_small_units(units: list, target_chars: int = CHUNK_TARGET_CHARS) -> list:
+    """Merge neighbouring units so tiny functions do not each cost a separate request"""
+    merged = []
+    for unit in units:
+        if merged and len(merged[-1].source) + len(unit.source) <= target_chars:
+            previous = merged[-1]
+            merged[-1] = SourceUnit(
+                previous.kind if previous.kind == unit.kind else "mixed",
+                f"{previous.name}, {unit.name}",
+                previous.source + unit.source,
+                previous.start_line,
+                unit.end_line
+            )
+        else:
+            merged.append(unit)
+    return merged
+
+def _signature(node) -> str:
+    prefix = "async def" if isinstance(node, ast.AsyncFunctionDef) else "def"
+    return f"{prefix} {node.name}({ast.unparse(node.args)})"
+
+def _header_entries(tree):
+    """Yield (name, line) for the shared header; name is the global a line describes, None for imports"""
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield None, ast.unparse(node)
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            yield node.name, _signature(node)
+        elif isinstance(node, ast.ClassDef):
+            bases = ", ".join(ast.unparse(b) for b in node.bases)
+            yield node.name, f"class {node.name}({bases})" if bases else f"class {node.name}"
+            for item in node.body:
+                if isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                    yield node.name, f"    {_signature(item)}"
+        elif isinstance(node, (ast.Assign, ast.AnnAssign, ast.AugAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            for target in targets:
+                for name in ast.walk(target):
+                    if isinstance(name, ast.Name):
+                        yield name.id, f"global {name.id}"
+
+def unit_contexts(source: str, units: list) -> list:
+    """For each unit, the header lines its translation depends on.
+
+    That is every import plus the globals, functions and classes (with their method
+    signatures) that the unit refers to by name, so a changed signature elsewhere in
+    the module only affects the units that use it.
+    """
+    entries = list(_header_entries(ast.parse(source)))
+    contexts = []
+    for unit in units:
+        used = {node.id for node in ast.walk(ast.parse(unit.source)) if isinstance(node, ast.Name)}
+        contexts.append("\n".join(dict.fromkeys(line for name, line in entries if name is None or name in used)))
+    return contexts
+
+def should_chunk(source: str) -> bool:
+    """Return True when a file is large enough to benefit from chunked conversion"""
+    if source.count("\n") + 1 < CHUNK_MIN_LINES and len(source) < CHUNK_MIN_CHARS:
+        return False
+    return can_chunk(source)
+
+def can_chunk(source: str) -> bool:
+    """Return True when a module splits into more than one top-level unit"""
+    try:
+        return len(split_source(source)) > 1
+    except SyntaxError:
+        return False
+
+def convert_in_chunks(source: str, convert_unit, max_workers: int = MAX_WORKERS, on_progress=None, units: list = None) -> str:
+    """Convert a module unit by unit on a bounded thread pool and stitch the results in source order.
+
+    convert_unit(unit, context) must return the AutoHotkey text for one unit; context is the unit's
+    header from unit_contexts, so it is also what a cache key should use. on_progress, if given,
+    is called from the calling thread with the stitched in-order output finished so far.
+    Pass units to convert a precomputed split instead of the default merged one.
+    Every unit is attempted; if any failed, ChunkConversionError is raised once all are done.
+    """
+    if units is None:
+        units = merge_small_units(split_source(source))
+    contexts = unit_contexts(source, units)
+    results = [None] * len(units)
+    failures = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(convert_unit, unit, context): index
+                   for index, (unit, context) in enumerate(zip(units, contexts))}
+        for future in as_completed(futures):
+            index = futures[future]
+            try:
+                results[index] = future.result().strip("\n")
+            except Exception as e:
+                unit = units[index]
+                failures.append((unit, e))
+                # Shown in the streamed progress; the caller gets the failure as an exception
+                results[index] = f"; Error converting lines {unit.start_line}-{unit.end_line} ({unit.name}): {str(e)}"
+            if on_progress:
+                finished = []
+                for result in results:
+                    if result is None:
+                        break
+                    finished.append(result)
+                on_progress("\n\n".join(r for r in finished if r))
+
+    code = "\n\n".join(r for r in results if r)
+    if failures:
+        failures.sort(key=lambda failure: failure[0].start_line)
+        raise ChunkConversionError(failures, code)
+    return code
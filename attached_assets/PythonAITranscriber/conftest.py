@@ -0,0 +1,10 @@
+import os
+import sys
+
+# Tests never reach Claude or a database: the client gets a dummy key and an address that
+# refuses connections, and the local SQLite fallback is switched off before any module reads it
+os.environ["AI_INTEGRATIONS_ANTHROPIC_API_KEY"] = "test"
+os.environ["AI_INTEGRATIONS_ANTHROPIC_BASE_URL"] = "http://127.0.0.1:9"
+os.environ["LOCAL_DATABASE_PATH"] = ""
+os.environ.pop("DATABASE_URL", None)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
@@ -0,0 +1,430 @@
+import os
+import ast
+import hashlib
+import functools
+from dataclasses import dataclass, field
+from anthropic import Anthropic
+import llm_cache
+import llm_scheduler
+import llm_metrics
+import model_router
+import chunked_converter
+import transpiler
+import ahk_analyzer
+import ahk_patch
+import prompts
+
+# Initialize Anthropic client using Replit AI Integrations
+AI_INTEGRATIONS_ANTHROPIC_API_KEY = os.environ.get("AI_INTEGRATIONS_ANTHROPIC_API_KEY")
+AI_INTEGRATIONS_ANTHROPIC_BASE_URL = os.environ.get("AI_INTEGRATIONS_ANTHROPIC_BASE_URL")
+
+# Retries are left to llm_scheduler, which backs off across every request in the process
+client = Anthropic(
+    api_key=AI_INTEGRATIONS_ANTHROPIC_API_KEY,
+    base_url=AI_INTEGRATIONS_ANTHROPIC_BASE_URL,
+    max_retries=0
+)
+
+MODEL = model_router.DEFAULT_MODEL
+# Bump when any prompt in prompts.py changes so stale cached responses are not reused
+PROMPT_VERSION = "5"
+# AutoHotkey syntax generated when the caller does not pick one
+DEFAULT_TARGET = "v2"
+TARGET_LABELS = {"v1": "v1.1", "v2": "v2.0"}
+
+# Appended to partial output when a streamed response fails midway
+STREAM_INTERRUPTED_NOTE = "\n\n; ⚠️ Output interrupted before completion: {error}"
+# Appended when a response stops at the largest max_tokens allowed
+OUTPUT_TRUNCATED_NOTE = "\n\n; ⚠️ Output stopped at the {max_tokens}-token limit and is incomplete"
+
+def ask_claude(operation: str, content, *cache_inputs: str, system: str = prompts.SYSTEM_PROMPT, on_text=None,
+               priority: str = llm_scheduler.INTERACTIVE, route: model_router.Route = None) -> str:
+    """Send a prompt to Claude, reusing a cached response for identical inputs.
+
+    content is a prompt string or a list of content blocks from prompts.py; blocks
+    marked with cache_control form a prefix Anthropic can serve from its prompt cache.
+    When on_text is given the response is streamed and on_text is called with
+    the text received so far after every chunk. Identical requests made while one
+    is already in flight wait for it and share its response. The request waits in
+    the scheduler's priority lane for rate-limit budget and is retried on 429/5xx.
+    route (from model_router.route) picks the model and max_tokens.
+    """
+    route = route or model_router.default_route()
+    cache_key = llm_cache.make_cache_key(operation, route.model, PROMPT_VERSION, *cache_inputs)
+    cached = llm_cache.response_cache.get(cache_key)
+    if cached is not None:
+        if on_text:
+            on_text(cached)
+        return cached
+
+    request = {
+        "model": route.model,
+        "max_tokens": route.max_tokens,
+        "system": prompts.system_blocks(system),
+        "messages": [{
+            "role": "user",
+            "content": content
+        }]
+    }
+
+    def call(publish):
+        # A flight that finished just before this one started has already filled the cache
+        cached = llm_cache.response_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        return _request_claude(operation, cache_key, request, publish, priority)
+
+    return llm_cache.single_flight.do(cache_key, call, on_text=on_text)
+
+def _estimate_request_tokens(request: dict) -> int:
+    """Approximate input tokens of a request from its text, before Anthropic counts them"""
+    texts = [block["text"] for block in request["system"]]
+    for message in request["messages"]:
+        content = message["content"]
+        texts.extend([content] if isinstance(content, str) else [block.get("text", "") for block in content])
+    return sum(llm_scheduler.estimate_tokens(text) for text in texts)
+
+def _request_claude(operation: str, cache_key: str, request: dict, on_text=None,
+                    priority: str = llm_scheduler.INTERACTIVE) -> str:
+    estimated = _estimate_request_tokens(request)
+    text, usage, stop_reason = llm_scheduler.scheduler.run(
+        functools.partial(_send_request, request, on_text, operation, priority), lane=priority, estimated_tokens=estimated
+    )
+    if usage is None:
+        # A stream cut off midway keeps its partial text but is not cached
+        return text
+    # Cache reads do not count against the input-token rate limit
+    used = sum(getattr(usage, name, 0) or 0 for name in ("input_tokens", "output_tokens", "cache_creation_input_tokens"))
+    llm_scheduler.scheduler.settle(estimated, used)
+
+    truncated = stop_reason == "max_tokens"
+    model_router.record(request["model"], truncated)
+    if truncated and request["max_tokens"] < model_router.MAX_OUTPUT_TOKENS:
+        # The output estimate was too low: ask again with the full budget rather than return a cut-off answer
+        retry = {**request, "max_tokens": model_router.MAX_OUTPUT_TOKENS}
+        return _request_claude(operation, cache_key, retry, on_text, priority)
+    if truncated:
+        text += OUTPUT_TRUNCATED_NOTE.format(max_tokens=request["max_tokens"])
+        if on_text:
+            on_text(text)
+        return text
+    llm_cache.response_cache.put(cache_key, operation, request["model"], text)
+    return text
+
+def _send_request(request: dict, on_text=None, operation: str = "request", priority: str = None):
+    """Make one Claude call and return (text, usage, stop_reason); usage is None for a stream that failed midway.
+
+    Every attempt, including ones the scheduler retries, is timed and recorded in llm_metrics.
+    """
+    timer = llm_metrics.CallTimer(operation, request["model"], priority)
+    if on_text:
+        text = ""
+        try:
+            with client.messages.stream(**request) as stream:
+                for chunk in stream.text_stream:
+                    timer.first_token()
+                    text += chunk
+                    on_text(text)
+                final = stream.get_final_message()
+        except Exception as e:
+            # Nothing arrived yet: raise so the scheduler can retry the request
+            if not text:
+                timer.finish(llm_metrics.ERROR, error=e)
+                raise
+            timer.finish(llm_metrics.INTERRUPTED, error=e)
+            # Keep what already arrived instead of discarding it for an error string
+            text += STREAM_INTERRUPTED_NOTE.format(error=str(e))
+            on_text(text)
+            return text, None, None
+        _finish_timer(timer, final.usage, final.stop_reason)
+        return text, final.usage, final.stop_reason
+
+    try:
+        message = client.messages.create(**request)
+        if message.content[0].type != "text":
+            raise ValueError("Unexpected response type from AI")
+    except Exception as e:
+        timer.finish(llm_metrics.ERROR, error=e)
+        raise
+    _finish_timer(timer, message.usage, message.stop_reason)
+    return message.content[0].text, message.usage, message.stop_reason
+
+def _finish_timer(timer, usage, stop_reason: str):
+    outcome = llm_metrics.TRUNCATED if stop_reason == "max_tokens" else llm_metrics.OK
+    timer.finish(outcome, usage, stop_reason)
+
+def convert_python_unit(unit, header: str, target: str = DEFAULT_TARGET, priority: str = llm_scheduler.INTERACTIVE) -> str:
+    """Convert one top-level unit of a larger Python module.
+
+    header is the unit's context from chunked_converter.unit_contexts: the imports and the
+    signatures it uses. The response cache is keyed on it, as are incremental fragments, so an
+    edit elsewhere in the module does not invalidate this unit's cached translation.
+    """
+    content = [
+        prompts.header_block(header),
+        prompts.instructions_block(prompts.CHUNK_INSTRUCTIONS.format(
+            start_line=unit.start_line,
+            end_line=unit.end_line,
+            target=TARGET_LABELS[target],
+            source=unit.source
+        ))
+    ]
+    # Routed on the unit alone; the header is context, not code to translate
+    route = model_router.route("convert_chunk", unit.source)
+    return ask_claude("convert_chunk", content, unit.source, header, target, priority=priority, route=route)
+
+def run_conversion(python_code: str, on_text=None, target: str = DEFAULT_TARGET,
+                   priority: str = llm_scheduler.INTERACTIVE) -> str:
+    """Convert Python code to AutoHotkey, raising on failure instead of returning an error string.
+
+    The local transpiler handles the supported subset of Python. Anything else goes to
+    Claude as one request, or, for files large enough to chunk, as merged chunks of which
+    only the ones the transpiler cannot translate are sent.
+    """
+    try:
+        local = transpiler.Transpiler(python_code, target)
+    except SyntaxError:
+        local = None
+
+    if local is not None:
+        result = local.transpile()
+        if result.ok:
+            if on_text:
+                on_text(result.code)
+            return result.code
+
+    # Large files go in chunks, which also keeps every response well under the output cap
+    if chunked_converter.should_chunk(python_code):
+        # Merged like any chunked conversion, so the number of requests follows the file's size
+        # rather than its number of definitions; a chunk the transpiler handles costs none
+        units = chunked_converter.merge_small_units(chunked_converter.split_source(python_code))
+        local_chunks = {}
+        for unit in units if local is not None else ():
+            unit_result = local.transpile_source(unit.source)
+            if unit_result.ok:
+                local_chunks[unit.start_line] = unit_result.code
+
+        def convert_unit(unit, context):
+            if unit.start_line in local_chunks:
+                return local_chunks[unit.start_line]
+            return convert_python_unit(unit, context, target, priority)
+        return chunked_converter.convert_in_chunks(python_code, convert_unit, on_progress=on_text, units=units)
+
+    content = [
+        prompts.python_block(python_code),
+        prompts.instructions_block(prompts.CONVERT_INSTRUCTIONS.format(target=TARGET_LABELS[target]))
+    ]
+    return ask_claude("convert", content, python_code, target, on_text=on_text, priority=priority,
+                      route=model_router.route("convert", python_code))
+
+@dataclass
+class IncrementalConversion:
+    """Result of run_incremental_conversion; keep fragments for the next call"""
+    code: str
+    fragments: dict = field(default_factory=dict)
+    reused: int = 0
+    units: int = 0
+
+def fragment_key(source: str, target: str = DEFAULT_TARGET, context: str = "") -> str:
+    """Hash code by its syntax tree, so comment and formatting edits are not changes.
+
+    context is the header the code is translated against (see chunked_converter.unit_contexts);
+    when an import or a signature it uses changes, so does the key.
+    """
+    try:
+        normalized = ast.dump(ast.parse(source))
+    except SyntaxError:
+        normalized = " ".join(source.split())
+    return hashlib.sha256(f"{PROMPT_VERSION}\0{target}\0{context}\0{normalized}".encode("utf-8")).hexdigest()
+
+def run_incremental_conversion(python_code: str, fragments: dict = None, on_text=None, target: str = DEFAULT_TARGET,
+                               priority: str = llm_scheduler.INTERACTIVE) -> IncrementalConversion:
+    """Convert Python code, reusing the AutoHotkey of parts unchanged since the last run.
+
+    fragments is the mapping returned by the previous call (fragment_key -> AutoHotkey).
+    Files below the chunking size are converted whole, as one request, and reused only
+    when nothing but comments or formatting changed. Larger files are converted in the
+    merged chunks run_conversion uses; only new or changed chunks are translated (locally
+    when possible, otherwise by Claude) and spliced in source order, so a first conversion
+    costs the same as run_conversion.
+    """
+    fragments = fragments or {}
+    try:
+        local = transpiler.Transpiler(python_code, target)
+    except SyntaxError:
+        local = None
+    units = []
+    if local is not None and chunked_converter.should_chunk(python_code):
+        units = chunked_converter.merge_small_units(chunked_converter.split_source(python_code))
+
+    if len(units) < 2:
+        key = fragment_key(python_code, target)
+        if key in fragments:
+            if on_text:
+                on_text(fragments[key])
+            return IncrementalConversion(fragments[key], {key: fragments[key]}, reused=1, units=1)
+        code = run_conversion(python_code, on_text=on_text, target=target, priority=priority)
+        return IncrementalConversion(code, {key: code}, units=1)
+
+    result = local.transpile()
+    if result.ok:
+        if on_text:
+            on_text(result.code)
+        return IncrementalConversion(result.code, units=len(units))
+
+    contexts = chunked_converter.unit_contexts(python_code, units)
+    keys = {unit.start_line: fragment_key(unit.source, target, context) for unit, context in zip(units, contexts)}
+    converted = {key: fragments[key] for key in keys.values() if key in fragments}
+    reused = sum(1 for key in keys.values() if key in converted)
+    # The transpiler is not thread-safe, so translate what it can before the pool starts
+    for unit in units:
+        if keys[unit.start_line] not in converted:
+            unit_result = local.transpile_source(unit.source)
+            if unit_result.ok:
+                converted[keys[unit.start_line]] = unit_result.code
+
+    def convert_unit(unit, context):
+        key = keys[unit.start_line]
+        if key not in converted:
+            converted[key] = convert_python_unit(unit, context, target, priority)
+        return converted[key]
+
+    # A failed chunk raises ChunkConversionError; chunks that succeeded are in the response cache,
+    # so converting again only pays for the ones that failed
+    code = chunked_converter.convert_in_chunks(python_code, convert_unit, on_progress=on_text, units=units)
+    return IncrementalConversion(code, converted, reused, len(units))
+
+def convert_python_to_ahk(python_code: str, on_text=None, target: str = DEFAULT_TARGET) -> str:
+    """Convert Python code to AutoHotkey, using Claude AI for anything the local transpiler cannot handle"""
+    try:
+        return run_conversion(python_code, on_text=on_text, target=target)
+    except Exception as e:
+        return f"Error during conversion: {str(e)}"
+
+def run_validation(python_code: str, ahk_code: str, on_text=None, on_report=None,
+                   priority: str = llm_scheduler.INTERACTIVE) -> str:
+    """Validate the converted AutoHotkey code, raising if the AI review fails instead of returning an error string.
+
+    Local static analysis runs first and is passed to on_report as soon as it is ready.
+    Claude is only asked for a semantic review when the analyzer finds no structural errors.
+    """
+    analysis = ahk_analyzer.analyze(ahk_code)
+    report = ahk_analyzer.format_report(analysis)
+    if on_report:
+        on_report(report)
+    if analysis.errors:
+        return report + "\n\nFix the errors above (or use Debug Code), then validate again for an AI semantic review."
+
+    warnings = "\n".join(f"- Line {d.line}: {d.message}" for d in analysis.warnings) or "None"
+    route = model_router.route("validate", python_code, ahk_code)
+    content = [
+        prompts.python_block(python_code),
+        prompts.ahk_block(ahk_code),
+        prompts.instructions_block(prompts.VALIDATE_INSTRUCTIONS.format(warnings=warnings))
+    ]
+    return report + "\n\n" + ask_claude("validate", content, python_code, ahk_code, on_text=on_text,
+                                           priority=priority, route=route)
+
+def validate_ahk_code(python_code: str, ahk_code: str, on_text=None, on_report=None,
+                      priority: str = llm_scheduler.INTERACTIVE) -> str:
+    """Validate the converted AutoHotkey code: local static analysis first, then Claude AI for semantic equivalence.
+
+    on_report is called with the local analysis as soon as it is ready. Claude is only
+    asked when the analyzer finds no structural errors.
+    """
+    reports = []
+    def report_ready(report):
+        reports.append(report)
+        if on_report:
+            on_report(report)
+
+    try:
+        return run_validation(python_code, ahk_code, on_text=on_text, on_report=report_ready, priority=priority)
+    except Exception as e:
+        return "".join(report + "\n\n" for report in reports[-1:]) + f"Error during validation: {str(e)}"
+
+def run_debug(python_code: str, ahk_code: str, issue_description: str = "", on_text=None,
+              priority: str = llm_scheduler.INTERACTIVE) -> str:
+    """Debug the AutoHotkey code and provide fixes, raising on failure instead of returning an error string"""
+    issue = f"Issue reported: {issue_description}" if issue_description else "Please identify any potential issues in this conversion."
+    route = model_router.route("debug", python_code, ahk_code, issue_description)
+    content = [
+        prompts.python_block(python_code),
+        prompts.ahk_block(ahk_code),
+        prompts.instructions_block(prompts.DEBUG_INSTRUCTIONS.format(issue=issue))
+    ]
+    return ask_claude("debug", content, python_code, ahk_code, issue_description, on_text=on_text,
+                      priority=priority, route=route)
+
+def debug_ahk_code(python_code: str, ahk_code: str, issue_description: str = "", on_text=None,
+                   priority: str = llm_scheduler.INTERACTIVE) -> str:
+    """Debug the AutoHotkey code and provide fixes"""
+    try:
+        return run_debug(python_code, ahk_code, issue_description, on_text=on_text, priority=priority)
+    except Exception as e:
+        return f"Error during debugging: {str(e)}"
+
+@dataclass
+class DebugPatch:
+    """Result of run_debug_patch: the explanation and, when the fix applied cleanly, the patched code"""
+    explanation: str
+    base_code: str
+    diff: str = None
+    code: str = None
+    added: int = 0
+    removed: int = 0
+    # Why the diff could not be applied, if it could not
+    error: str = None
+    # Static-analysis errors before and after applying the fix
+    errors_before: int = 0
+    errors_after: int = 0
+
+def run_debug_patch(python_code: str, ahk_code: str, issue_description: str = "", on_text=None,
+                    priority: str = llm_scheduler.INTERACTIVE) -> DebugPatch:
+    """Debug the AutoHotkey code, asking Claude for a unified diff instead of the full corrected script.
+
+    The diff is applied locally against ahk_code, so output tokens and latency follow the
+    size of the fix rather than the size of the script. Raises if the request fails.
+    """
+    issue = f"Issue reported: {issue_description}" if issue_description else "Please identify any potential issues in this conversion."
+    route = model_router.route("debug_patch", python_code, ahk_code, issue_description)
+    content = [
+        prompts.python_block(python_code),
+        prompts.ahk_block(ahk_code),
+        prompts.instructions_block(prompts.DEBUG_PATCH_INSTRUCTIONS.format(issue=issue))
+    ]
+    response = ask_claude("debug_patch", content, python_code, ahk_code, issue_description, on_text=on_text,
+                          priority=priority, route=route)
+
+    result = DebugPatch(ahk_patch.strip_diff(response), ahk_code, diff=ahk_patch.extract_diff(response))
+    if result.diff is None:
+        return result
+    try:
+        hunks = ahk_patch.parse_unified_diff(result.diff)
+        result.code = ahk_patch.apply_hunks(ahk_code, hunks)
+    except ahk_patch.PatchError as e:
+        result.error = str(e)
+        return result
+    result.added = sum(hunk.added for hunk in hunks)
+    result.removed = sum(hunk.removed for hunk in hunks)
+    result.errors_before = len(ahk_analyzer.analyze(ahk_code).errors)
+    result.errors_after = len(ahk_analyzer.analyze(result.code).errors)
+    return result
+
+def run_game_script(game_name: str, task_description: str, script_type: str, on_text=None) -> str:
+    """Generate an AutoHotkey game automation script, raising on failure instead of returning an error string"""
+    prompt = prompts.GAME_INSTRUCTIONS.format(
+        game_name=game_name,
+        task_description=task_description,
+        script_type=script_type
+    )
+    return ask_claude("game_script", prompt, game_name, task_description, script_type,
+                      system=prompts.GAME_SYSTEM_PROMPT, on_text=on_text,
+                      route=model_router.route("game_script", prompt=prompt))
+
+def generate_game_script(game_name: str, task_description: str, script_type: str, on_text=None) -> str:
+    """Generate AutoHotkey game automation script using Claude AI"""
+    try:
+        return run_game_script(game_name, task_description, script_type, on_text=on_text)
+    except Exception as e:
+        return f"Error during script generation: {str(e)}"
@@ -1,151 +1,1070 @@
 import os
-from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime
+import re
+import zlib
+import hashlib
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, event, inspect, insert, update, delete, select, bindparam, Column, Integer, String, Text, DateTime, LargeBinary, Index, func, or_, and_, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import sessionmaker, Session
 
-DATABASE_URL = os.environ.get("DATABASE_URL")
+# Without DATABASE_URL, scripts persist to a local WAL-mode SQLite file; set LOCAL_DATABASE_PATH="" to disable
+LOCAL_DATABASE_PATH = os.environ.get(
+    "LOCAL_DATABASE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "ahk_scripts.db")
+)
+DATABASE_URL = os.environ.get("DATABASE_URL") or (f"sqlite:///{LOCAL_DATABASE_PATH}" if LOCAL_DATABASE_PATH else None)
+
+# Connection pool settings; size and overflow do not apply to SQLite
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "10"))
+DB_POOL_RECYCLE_SECONDS = int(os.environ.get("DB_POOL_RECYCLE_SECONDS", "1800"))
+DB_POOL_PRE_PING = os.environ.get("DB_POOL_PRE_PING", "true").lower() not in ("0", "false", "no")
 
 engine = None
 SessionLocal = None
 Base = declarative_base()
 
+_engine_lock = threading.Lock()
+_init_lock = threading.Lock()
+_initialized = False
+
 def is_database_available():
     """Check if database is configured and available"""
     return DATABASE_URL is not None and DATABASE_URL != ""
 
+def engine_options(url: str) -> dict:
+    """Pool settings shared by the sync engine and the async one in async_database.py"""
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE_SECONDS}
+    if not url.startswith("sqlite"):
+        options.update(pool_size=DB_POOL_SIZE, max_overflow=DB_MAX_OVERFLOW)
+    return options
+
+def configure_sqlite_connection(dbapi_connection, connection_record):
+    """WAL lets Streamlit reads continue while a job writes; busy_timeout waits out short write locks"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA busy_timeout=5000")
+    cursor.close()
+
 def get_engine():
     """Lazy initialization of database engine"""
     global engine, SessionLocal
     if engine is None:
         if not is_database_available():
             raise ValueError("Database is not configured. DATABASE_URL environment variable is not set.")
-        engine = create_engine(DATABASE_URL)
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        with _engine_lock:
+            if engine is None:
+                engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+                if engine.dialect.name == "sqlite":
+                    event.listen(engine, "connect", configure_sqlite_connection)
+                # Objects stay usable after commit, so saves need no extra refresh query
+                SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
     return engine
 
+@contextmanager
+def session_scope():
+    """Yield a session that commits on success, rolls back on error and is always closed"""
+    get_engine()
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
 class SavedScript(Base):
     __tablename__ = "saved_scripts"
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
     description = Column(Text, nullable=True)
-    python_code = Column(Text, nullable=False)
-    ahk_code = Column(Text, nullable=False)
+    # Code bodies live in code_blobs; the inline columns only hold rows not yet migrated.
+    # Loaded scripts expose the text as plain python_code / ahk_code attributes.
+    python_code_hash = Column(String(64), nullable=True)
+    ahk_code_hash = Column(String(64), nullable=True)
+    inline_python_code = Column("python_code", Text, nullable=False, default="")
+    inline_ahk_code = Column("ahk_code", Text, nullable=False, default="")
     script_type = Column(String(50), default="conversion")
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Incremented by every update; callers pass the version they loaded to detect concurrent edits
+    version = Column(Integer, nullable=False, default=1)
+    
+    # Keyset pagination walks (created_at, id) newest first, optionally within one script_type;
+    # releasing a blob looks up whether any script still references its hash
+    __table_args__ = (
+        Index("ix_saved_scripts_created_id", "created_at", "id"),
+        Index("ix_saved_scripts_type_created_id", "script_type", "created_at", "id"),
+        Index("ix_saved_scripts_python_hash", "python_code_hash"),
+        Index("ix_saved_scripts_ahk_hash", "ahk_code_hash"),
+    )
 
-def init_db():
-    """Initialize the database by creating all tables"""
-    if not is_database_available():
-        raise ValueError("Database is not configured")
-    eng = get_engine()
-    Base.metadata.create_all(bind=eng)
+class ConcurrentUpdateError(ValueError):
+    """Raised when a script changed since the caller loaded it"""
 
-def get_db():
-    """Get database session"""
+# Columns added to saved_scripts after its first release, created by init_db on older databases
+SAVED_SCRIPT_ADDED_COLUMNS = {
+    "python_code_hash": "VARCHAR(64)",
+    "ahk_code_hash": "VARCHAR(64)",
+    "version": "INTEGER NOT NULL DEFAULT 1",
+}
+# Fields bulk_update can change; code bodies go through update_script so blobs are handled
+BULK_UPDATE_FIELDS = ("name", "description", "script_type")
+
+class CodeBlob(Base):
+    __tablename__ = "code_blobs"
+    
+    hash = Column(String(64), primary_key=True)
+    # zlib, or none for code that zlib would not make any smaller
+    compression = Column(String(10), nullable=False, default="zlib")
+    data = Column(LargeBinary, nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    stored_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+BLOB_COMPRESSION_LEVEL = 6
+# Scripts migrated from inline code per transaction
+BLOB_MIGRATION_BATCH = 200
+# Rows read per round trip when exporting, and scripts inserted per transaction when importing
+EXPORT_BATCH_SIZE = 200
+IMPORT_CHUNK_SIZE = 500
+
+# Metadata returned by list_scripts; code bodies are loaded with get_script_by_id
+SCRIPT_SUMMARY_COLUMNS = (
+    SavedScript.id,
+    SavedScript.name,
+    SavedScript.description,
+    SavedScript.script_type,
+    SavedScript.created_at,
+    SavedScript.updated_at,
+    SavedScript.version,
+)
+
+# Full-text search index, maintained by save_script/update_script/delete_script.
+# Postgres keeps a weighted tsvector per script behind a GIN index; SQLite uses an FTS5 table.
+SEARCH_POSTGRES_DDL = (
+    """CREATE TABLE IF NOT EXISTS saved_script_search (
+        script_id INTEGER PRIMARY KEY REFERENCES saved_scripts(id) ON DELETE CASCADE,
+        document TSVECTOR NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS ix_saved_script_search_document ON saved_script_search USING GIN (document)",
+)
+# The FTS5 table is contentless: it keeps only the index, not another copy of every script's code.
+# Without stored content a row is removed by replaying the values it was indexed with.
+SEARCH_SQLITE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS saved_scripts_fts USING fts5(name, description, python_code, ahk_code, content='')",
+)
+# Code beyond this many characters is left out of the index (Postgres caps a tsvector at 1 MB)
+SEARCH_MAX_CODE_CHARS = 200000
+
+class CachedResponse(Base):
+    __tablename__ = "cached_responses"
+    
+    cache_key = Column(String(64), primary_key=True)
+    operation = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    response = Column(Text, nullable=False)
+    size_bytes = Column(Integer, nullable=False, default=0)
+    hit_count = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+class LLMCall(Base):
+    """One request to Claude (each retry is its own row), recorded by llm_metrics"""
+    __tablename__ = "llm_calls"
+    
+    id = Column(Integer, primary_key=True)
+    operation = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    lane = Column(String(20), nullable=True)
+    # ok, truncated (stopped at max_tokens), interrupted (stream failed midway) or error
+    outcome = Column(String(20), nullable=False)
+    stop_reason = Column(String(30), nullable=True)
+    error_class = Column(String(100), nullable=True)
+    wall_ms = Column(Integer, nullable=False)
+    ttft_ms = Column(Integer, nullable=True)
+    input_tokens = Column(Integer, nullable=False, default=0)
+    output_tokens = Column(Integer, nullable=False, default=0)
+    cache_read_input_tokens = Column(Integer, nullable=False, default=0)
+    cache_creation_input_tokens = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_llm_calls_created", "created_at"),
+    )
+
+# Fields of an llm_metrics.CallRecord that are stored in llm_calls
+LLM_CALL_FIELDS = (
+    "operation", "model", "lane", "outcome", "stop_reason", "error_class", "wall_ms", "ttft_ms",
+    "input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens", "created_at",
+)
+
+def init_db(force: bool = False):
+    """Create tables, indexes and the search index and migrate old rows, once per process"""
+    global _initialized
     if not is_database_available():
         raise ValueError("Database is not configured")
-    get_engine()
-    db = SessionLocal()
+    if _initialized and not force:
+        return
+    with _init_lock:
+        if _initialized and not force:
+            return
+        eng = get_engine()
+        Base.metadata.create_all(bind=eng)
+        # create_all skips tables that already exist, so add the columns and indexes introduced since
+        _add_missing_columns(eng)
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(bind=eng, checkfirst=True)
+        # Adds the columns introduced since the table was created before moving inline code
+        migrate_code_blobs()
+        _init_search_index(eng)
+        _initialized = True
+
+def _add_missing_columns(eng):
+    columns = {column["name"] for column in inspect(eng).get_columns("saved_scripts")}
+    with eng.begin() as conn:
+        for name, ddl in SAVED_SCRIPT_ADDED_COLUMNS.items():
+            if name not in columns:
+                conn.execute(text(f"ALTER TABLE saved_scripts ADD COLUMN {name} {ddl}"))
+
+def _blob_hash(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest()
+
+def _encode_blob(code: str):
+    """Return (compression, data, size_bytes) for a code body, keeping it raw if zlib does not shrink it"""
+    raw = code.encode("utf-8")
+    data = zlib.compress(raw, BLOB_COMPRESSION_LEVEL)
+    if len(data) >= len(raw):
+        return "none", raw, len(raw)
+    return "zlib", data, len(raw)
+
+def _decode_blob(compression: str, data: bytes) -> str:
+    return (zlib.decompress(data) if compression == "zlib" else data).decode("utf-8")
+
+def _store_blob(db, code: str):
+    """Store code once by content hash and return the hash; empty code is stored as None"""
+    if not code:
+        return None
+    digest = _blob_hash(code)
+    # The key-share lock (a no-op on SQLite) holds off _release_blobs deleting the blob before
+    # this transaction commits the script that references it
+    existing = db.execute(
+        select(CodeBlob.hash).where(CodeBlob.hash == digest).with_for_update(read=True, key_share=True)
+    ).first()
+    if existing is not None:
+        return digest
+    compression, data, size = _encode_blob(code)
     try:
-        return db
-    finally:
+        # A savepoint keeps a concurrent insert of the same blob from failing the whole save
+        with db.begin_nested():
+            db.add(CodeBlob(hash=digest, compression=compression, data=data, size_bytes=size, stored_bytes=len(data)))
+    except IntegrityError:
         pass
+    return digest
+
+def _store_blobs(db, codes) -> list:
+    """Store many code bodies with one lookup and one executemany insert; returns their hashes"""
+    hashes = [_blob_hash(code) if code else None for code in codes]
+    pending = {digest: code for digest, code in zip(hashes, codes) if digest}
+    if pending:
+        existing = {row[0] for row in db.execute(
+            select(CodeBlob.hash).where(CodeBlob.hash.in_(list(pending)))
+            .order_by(CodeBlob.hash).with_for_update(read=True, key_share=True)
+        )}
+        rows = []
+        for digest, code in pending.items():
+            if digest in existing:
+                continue
+            compression, data, size = _encode_blob(code)
+            rows.append({"hash": digest, "compression": compression, "data": data,
+                         "size_bytes": size, "stored_bytes": len(data), "created_at": datetime.utcnow()})
+        if rows:
+            db.execute(_insert_blobs_statement(db), rows)
+    return hashes
+
+def _insert_blobs_statement(db):
+    """INSERT into code_blobs that skips any hash a concurrent save stored first"""
+    name = db.get_bind().dialect.name
+    if name == "postgresql":
+        return postgresql.insert(CodeBlob).on_conflict_do_nothing(index_elements=["hash"])
+    if name == "sqlite":
+        return sqlite.insert(CodeBlob).on_conflict_do_nothing(index_elements=["hash"])
+    return insert(CodeBlob)
+
+def _release_blobs(db, hashes):
+    """Delete blobs that no script references any more"""
+    candidates = list(set(h for h in hashes if h))
+    if not candidates:
+        return
+    # Locking the blobs first waits out any save that is re-using one, so the check below sees its script
+    candidates = [row[0] for row in db.execute(
+        select(CodeBlob.hash).where(CodeBlob.hash.in_(candidates)).order_by(CodeBlob.hash).with_for_update()
+    )]
+    if not candidates:
+        return
+    in_use = {row[0] for row in db.execute(
+        select(SavedScript.python_code_hash).where(SavedScript.python_code_hash.in_(candidates))
+        .union(select(SavedScript.ahk_code_hash).where(SavedScript.ahk_code_hash.in_(candidates)))
+    )}
+    unused = [digest for digest in candidates if digest not in in_use]
+    if unused:
+        db.execute(delete(CodeBlob).where(CodeBlob.hash.in_(unused)))
+
+def _attach_code(db, scripts):
+    """Fill python_code / ahk_code on loaded scripts with one blob query for the whole batch"""
+    hashes = {h for script in scripts for h in (script.python_code_hash, script.ahk_code_hash) if h}
+    blobs = {}
+    if hashes:
+        for digest, compression, data in db.execute(
+            select(CodeBlob.hash, CodeBlob.compression, CodeBlob.data).where(CodeBlob.hash.in_(hashes))
+        ):
+            blobs[digest] = _decode_blob(compression, data)
+    for script in scripts:
+        script.python_code = blobs.get(script.python_code_hash, "") if script.python_code_hash else (script.inline_python_code or "")
+        script.ahk_code = blobs.get(script.ahk_code_hash, "") if script.ahk_code_hash else (script.inline_ahk_code or "")
+    return scripts
+
+def migrate_code_blobs():
+    """Move inline code of older rows into code_blobs and return how many scripts were migrated"""
+    # Databases created before blob storage lack the hash columns
+    _add_missing_columns(get_engine())
+    table = SavedScript.__table__
+    # Moving the code is not an edit: updated_at is set to itself so onupdate leaves it alone
+    statement = table.update().where(table.c.id == bindparam("b_id")).values(
+        python_code_hash=bindparam("b_python_code_hash"), ahk_code_hash=bindparam("b_ahk_code_hash"),
+        python_code="", ahk_code="", updated_at=table.c.updated_at,
+    )
+    migrated = 0
+    with session_scope() as db:
+        while True:
+            batch = db.execute(
+                select(table.c.id, table.c.python_code_hash, table.c.ahk_code_hash,
+                       table.c.python_code, table.c.ahk_code).where(
+                    or_(
+                        and_(table.c.python_code_hash.is_(None), table.c.python_code != ""),
+                        and_(table.c.ahk_code_hash.is_(None), table.c.ahk_code != "")
+                    )
+                ).order_by(table.c.id).limit(BLOB_MIGRATION_BATCH)
+            ).all()
+            if not batch:
+                break
+            db.execute(statement, [{
+                "b_id": row.id,
+                "b_python_code_hash": row.python_code_hash or _store_blob(db, row.python_code),
+                "b_ahk_code_hash": row.ahk_code_hash or _store_blob(db, row.ahk_code),
+            } for row in batch])
+            # Commit per batch so a large migration does not hold one huge transaction
+            db.commit()
+            migrated += len(batch)
+    return migrated
+
+def get_storage_report():
+    """Compare the bytes scripts would take inline with what the deduplicated, compressed blobs use"""
+    with session_scope() as db:
+        scripts = db.query(func.count(SavedScript.id)).scalar()
+        logical = 0
+        for column in (SavedScript.python_code_hash, SavedScript.ahk_code_hash):
+            logical += db.query(func.coalesce(func.sum(CodeBlob.size_bytes), 0)).select_from(SavedScript).join(
+                CodeBlob, CodeBlob.hash == column
+            ).scalar()
+        blobs, unique_bytes, stored_bytes = db.query(
+            func.count(CodeBlob.hash),
+            func.coalesce(func.sum(CodeBlob.size_bytes), 0),
+            func.coalesce(func.sum(CodeBlob.stored_bytes), 0)
+        ).one()
+        return {
+            "scripts": scripts,
+            "blobs": blobs,
+            "logical_bytes": logical,
+            "unique_bytes": unique_bytes,
+            "stored_bytes": stored_bytes,
+            "saved_bytes": logical - stored_bytes,
+            "dedup_ratio": logical / unique_bytes if unique_bytes else 1.0,
+            "compression_ratio": unique_bytes / stored_bytes if stored_bytes else 1.0,
+        }
+
+def _search_backend(bind):
+    """Return the full-text search flavour of an engine or session: postgresql, sqlite or None"""
+    name = (bind.get_bind() if hasattr(bind, "get_bind") else bind).dialect.name
+    return name if name in ("postgresql", "sqlite") else None
+
+def _init_search_index(eng):
+    backend = _search_backend(eng)
+    if backend is None:
+        return
+    statements = SEARCH_POSTGRES_DDL if backend == "postgresql" else SEARCH_SQLITE_DDL
+    index_table = "saved_script_search" if backend == "postgresql" else "saved_scripts_fts"
+    with eng.begin() as conn:
+        if backend == "sqlite":
+            existing = conn.execute(text(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'saved_scripts_fts'"
+            )).scalar()
+            if existing and "content=''" not in existing:
+                # Older databases stored full copies of the code in the index; rebuilt below
+                conn.execute(text("DROP TABLE saved_scripts_fts"))
+        for statement in statements:
+            conn.execute(text(statement))
+        indexed = conn.execute(text(f"SELECT COUNT(*) FROM {index_table}")).scalar()
+        stored = conn.execute(text("SELECT COUNT(*) FROM saved_scripts")).scalar()
+    # Backfill scripts saved before the index existed
+    if indexed < stored:
+        rebuild_search_index()
+
+# Called with (documents, removed_ids) after every commit that saved, changed or deleted scripts
+_script_listeners = []
+
+def add_script_listener(listener):
+    """Register listener(documents, removed_ids) for committed script changes in this process.
+
+    documents are the (id, name, description, python_code, ahk_code) tuples written to the
+    search index. Changes rolled back are never reported.
+    """
+    if listener not in _script_listeners:
+        _script_listeners.append(listener)
+
+def _queue_script_changes(db, documents=(), removed_ids=()):
+    if _script_listeners:
+        pending = db.info.setdefault("script_changes", ([], []))
+        pending[0].extend(documents)
+        pending[1].extend(removed_ids)
+
+@event.listens_for(Session, "after_commit")
+def _notify_script_listeners(session):
+    pending = session.info.pop("script_changes", None)
+    if not pending:
+        return
+    for listener in list(_script_listeners):
+        try:
+            listener(*pending)
+        except Exception:
+            # The change is already committed; a failing listener must not look like a failed save
+            pass
+
+@event.listens_for(Session, "after_rollback")
+def _discard_script_changes(session):
+    session.info.pop("script_changes", None)
+
+def _index_script(db, script_id: int, name: str, description: str, python_code: str, ahk_code: str):
+    """Index a script that has no search document yet, inside the caller's transaction"""
+    _index_scripts(db, [(script_id, name, description, python_code, ahk_code)])
+
+def _search_params(documents) -> list:
+    return [{
+        "script_id": script_id,
+        "name": name or "",
+        "description": description or "",
+        "python_code": (python_code or "")[:SEARCH_MAX_CODE_CHARS],
+        "ahk_code": (ahk_code or "")[:SEARCH_MAX_CODE_CHARS],
+    } for script_id, name, description, python_code, ahk_code in documents]
+
+def _search_documents(db, script_ids) -> list:
+    """The documents the search index currently holds for these scripts, read before they change.
+
+    Only SQLite's contentless index needs them (to remove the old entries); elsewhere this is empty.
+    """
+    script_ids = list(script_ids)
+    if not script_ids or _search_backend(db) != "sqlite":
+        return []
+    rows = db.execute(select(*SCRIPT_RETURNING_COLUMNS).where(SavedScript.id.in_(script_ids))).all()
+    scripts = _attach_code(db, [_script_from_row(row) for row in rows])
+    return [(script.id, script.name, script.description, script.python_code, script.ahk_code) for script in scripts]
+
+def _remove_sqlite_documents(db, previous):
+    params = _search_params(previous)
+    if params:
+        db.execute(text("""
+            INSERT INTO saved_scripts_fts (saved_scripts_fts, rowid, name, description, python_code, ahk_code)
+            VALUES ('delete', :script_id, :name, :description, :python_code, :ahk_code)
+        """), params)
+
+def _index_scripts(db, documents, previous=()):
+    """Add or replace many search documents with one executemany per statement.
+
+    previous are the documents from _search_documents for scripts that were already indexed.
+    """
+    backend = _search_backend(db)
+    params = _search_params(documents)
+    if not params:
+        return
+    _queue_script_changes(db, documents=documents)
+    if backend == "postgresql":
+        db.execute(text("""
+            INSERT INTO saved_script_search (script_id, document)
+            VALUES (:script_id,
+                    setweight(to_tsvector('simple', :name), 'A') ||
+                    setweight(to_tsvector('simple', :description), 'B') ||
+                    setweight(to_tsvector('simple', :python_code || ' ' || :ahk_code), 'C'))
+            ON CONFLICT (script_id) DO UPDATE SET document = EXCLUDED.document
+        """), params)
+    elif backend == "sqlite":
+        _remove_sqlite_documents(db, previous)
+        db.execute(text("""
+            INSERT INTO saved_scripts_fts (rowid, name, description, python_code, ahk_code)
+            VALUES (:script_id, :name, :description, :python_code, :ahk_code)
+        """), params)
+
+def _unindex_scripts(db, script_ids, previous=()):
+    """Remove search documents; SQLite needs the previous documents from _search_documents"""
+    params = [{"script_id": script_id} for script_id in script_ids]
+    if not params:
+        return
+    _queue_script_changes(db, removed_ids=script_ids)
+    backend = _search_backend(db)
+    if backend == "postgresql":
+        db.execute(text("DELETE FROM saved_script_search WHERE script_id = :script_id"), params)
+    elif backend == "sqlite":
+        _remove_sqlite_documents(db, previous)
+
+def _search_terms(query: str) -> list:
+    """Split a search box entry into index tokens; punctuation and operators are dropped"""
+    return re.findall(r"[^\W_]+", query.lower())
+
+def get_db():
+    """Get a database session; the caller must close it (prefer session_scope)"""
+    get_engine()
+    return SessionLocal()
+
+# Script operations are split into a session-taking implementation, shared with the async
+# path in async_database.py through AsyncSession.run_sync, and the public sync wrapper.
+def _save_script(db, name: str, python_code: str, ahk_code: str, description: str = "", script_type: str = "conversion"):
+    script = SavedScript(
+        name=name,
+        description=description,
+        python_code_hash=_store_blob(db, python_code),
+        ahk_code_hash=_store_blob(db, ahk_code),
+        script_type=script_type
+    )
+    db.add(script)
+    db.flush()
+    _index_script(db, script.id, name, description, python_code, ahk_code)
+    script.python_code = python_code or ""
+    script.ahk_code = ahk_code or ""
+    return script
 
 def save_script(name: str, python_code: str, ahk_code: str, description: str = "", script_type: str = "conversion"):
     """Save a script to the database"""
-    if not is_database_available():
-        raise ValueError("Database is not configured")
-    get_engine()
-    db = SessionLocal()
-    try:
-        script = SavedScript(
-            name=name,
-            description=description,
-            python_code=python_code,
-            ahk_code=ahk_code,
-            script_type=script_type
-        )
-        db.add(script)
-        db.commit()
-        db.refresh(script)
-        return script
-    except Exception as e:
-        db.rollback()
-        raise e
-    finally:
-        db.close()
+    with session_scope() as db:
+        return _save_script(db, name, python_code, ahk_code, description, script_type)
+
+def _get_all_scripts(db, script_type: str = None):
+    query = db.query(SavedScript)
+    if script_type:
+        query = query.filter(SavedScript.script_type == script_type)
+    return _attach_code(db, query.order_by(SavedScript.created_at.desc()).all())
 
 def get_all_scripts(script_type: str = None):
     """Get all saved scripts, optionally filtered by type"""
-    if not is_database_available():
-        raise ValueError("Database is not configured")
-    get_engine()
-    db = SessionLocal()
-    try:
-        query = db.query(SavedScript)
+    with session_scope() as db:
+        return _get_all_scripts(db, script_type)
+
+def list_scripts(script_type: str = None, limit: int = 25, after: tuple = None):
+    """Get one page of script metadata (no code bodies), newest first.
+
+    after is the cursor returned with the previous page. Returns (rows, next_cursor),
+    where next_cursor is None on the last page.
+    """
+    with session_scope() as db:
+        query = db.query(*SCRIPT_SUMMARY_COLUMNS)
         if script_type:
             query = query.filter(SavedScript.script_type == script_type)
-        return query.order_by(SavedScript.created_at.desc()).all()
-    finally:
-        db.close()
+        if after:
+            created_at, script_id = after
+            query = query.filter(or_(
+                SavedScript.created_at < created_at,
+                and_(SavedScript.created_at == created_at, SavedScript.id < script_id)
+            ))
+        rows = query.order_by(SavedScript.created_at.desc(), SavedScript.id.desc()).limit(limit + 1).all()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1].created_at, rows[-1].id)
+        return rows, next_cursor
+
+def get_script_summaries(script_ids, script_type: str = None) -> dict:
+    """Metadata (no code bodies) of the given scripts in one query, as {id: row}; missing ids are left out"""
+    script_ids = list(script_ids)
+    if not script_ids:
+        return {}
+    with session_scope() as db:
+        query = db.query(*SCRIPT_SUMMARY_COLUMNS).filter(SavedScript.id.in_(script_ids))
+        if script_type:
+            query = query.filter(SavedScript.script_type == script_type)
+        return {row.id: row for row in query.all()}
+
+def count_scripts(script_type: str = None):
+    """Count saved scripts, optionally filtered by type"""
+    with session_scope() as db:
+        query = db.query(func.count(SavedScript.id))
+        if script_type:
+            query = query.filter(SavedScript.script_type == script_type)
+        return query.scalar()
+
+def search_scripts(query: str, script_type: str = None, limit: int = 20, offset: int = 0):
+    """Full-text search over name, description and code, best matches first.
+
+    Every word must match (the last one as a prefix, for search-as-you-type).
+    Returns (rows, has_more); rows carry the list_scripts metadata plus a rank.
+    """
+    terms = _search_terms(query)
+    if not terms:
+        return [], False
+    with session_scope() as db:
+        backend = _search_backend(db)
+        params = {"script_type": script_type, "limit": limit + 1, "offset": offset}
+        type_filter = "AND s.script_type = :script_type" if script_type else ""
+        if backend == "postgresql":
+            params["query"] = " & ".join(terms[:-1] + [terms[-1] + ":*"])
+            statement = f"""
+                SELECT s.id, s.name, s.description, s.script_type, s.created_at, s.updated_at, s.version,
+                       ts_rank_cd(f.document, q) AS rank
+                FROM saved_script_search f
+                JOIN saved_scripts s ON s.id = f.script_id,
+                     to_tsquery('simple', :query) q
+                WHERE f.document @@ q {type_filter}
+                ORDER BY rank DESC, s.id DESC
+                LIMIT :limit OFFSET :offset
+            """
+        elif backend == "sqlite":
+            params["query"] = " ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+            # bm25 weights name, description, python_code, ahk_code; lower scores are better
+            statement = f"""
+                SELECT s.id, s.name, s.description, s.script_type, s.created_at, s.updated_at, s.version,
+                       -bm25(saved_scripts_fts, 10.0, 5.0, 1.0, 1.0) AS rank
+                FROM saved_scripts_fts f
+                JOIN saved_scripts s ON s.id = f.rowid
+                WHERE saved_scripts_fts MATCH :query {type_filter}
+                ORDER BY rank DESC, s.id DESC
+                LIMIT :limit OFFSET :offset
+            """
+        else:
+            # No native full-text index: fall back to a substring scan of names and descriptions
+            for position, term in enumerate(terms):
+                params[f"term{position}"] = f"%{term}%"
+            matches = " AND ".join(
+                f"(LOWER(s.name) LIKE :term{i} OR LOWER(COALESCE(s.description, '')) LIKE :term{i})"
+                for i in range(len(terms))
+            )
+            statement = f"""
+                SELECT s.id, s.name, s.description, s.script_type, s.created_at, s.updated_at, s.version, 0 AS rank
+                FROM saved_scripts s
+                WHERE {matches} {type_filter}
+                ORDER BY s.created_at DESC, s.id DESC
+                LIMIT :limit OFFSET :offset
+            """
+        # Typed columns so raw SQLite results come back as datetimes like the ORM queries
+        statement = text(statement).columns(created_at=DateTime, updated_at=DateTime)
+        rows = db.execute(statement, params).all()
+        return rows[:limit], len(rows) > limit
+
+def rebuild_search_index():
+    """Re-index every saved script, e.g. after restoring a backup"""
+    with session_scope() as db:
+        if _search_backend(db) == "sqlite":
+            # Every entry is rewritten, so the contentless index can start empty
+            db.execute(text("INSERT INTO saved_scripts_fts (saved_scripts_fts) VALUES ('delete-all')"))
+        last_id = 0
+        while True:
+            batch = db.query(SavedScript).filter(SavedScript.id > last_id).order_by(SavedScript.id).limit(200).all()
+            if not batch:
+                break
+            for script in _attach_code(db, batch):
+                _index_script(db, script.id, script.name, script.description, script.python_code, script.ahk_code)
+            last_id = batch[-1].id
+            db.expunge_all()
+
+def _get_script_by_id(db, script_id: int):
+    script = db.query(SavedScript).filter(SavedScript.id == script_id).first()
+    if script:
+        _attach_code(db, [script])
+    return script
 
 def get_script_by_id(script_id: int):
     """Get a specific script by ID"""
-    if not is_database_available():
-        raise ValueError("Database is not configured")
-    get_engine()
-    db = SessionLocal()
-    try:
-        return db.query(SavedScript).filter(SavedScript.id == script_id).first()
-    finally:
-        db.close()
+    with session_scope() as db:
+        return _get_script_by_id(db, script_id)
 
-def delete_script(script_id: int):
-    """Delete a script by ID"""
-    if not is_database_available():
-        raise ValueError("Database is not configured")
-    get_engine()
-    db = SessionLocal()
-    try:
-        script = db.query(SavedScript).filter(SavedScript.id == script_id).first()
-        if script:
-            db.delete(script)
-            db.commit()
-            return True
+# Columns an UPDATE/DELETE ... RETURNING hands back, enough to rebuild the script without a reload
+SCRIPT_RETURNING_COLUMNS = (
+    SavedScript.id,
+    SavedScript.name,
+    SavedScript.description,
+    SavedScript.python_code_hash,
+    SavedScript.ahk_code_hash,
+    SavedScript.inline_python_code,
+    SavedScript.inline_ahk_code,
+    SavedScript.script_type,
+    SavedScript.created_at,
+    SavedScript.updated_at,
+    SavedScript.version,
+)
+
+def _script_from_row(row):
+    """Build a detached SavedScript from a RETURNING row"""
+    return SavedScript(**{column.key: value for column, value in zip(SCRIPT_RETURNING_COLUMNS, row)})
+
+def _check_version_conflict(db, script_id: int, expected_version: int):
+    """Raise ConcurrentUpdateError if a versioned write matched nothing because the row moved on"""
+    if expected_version is None:
+        return
+    current = db.execute(select(SavedScript.version).where(SavedScript.id == script_id)).scalar()
+    if current is not None:
+        raise ConcurrentUpdateError(
+            f"Script {script_id} was changed by someone else (version {current}, expected {expected_version})"
+        )
+
+def _delete_script(db, script_id: int, expected_version: int = None):
+    previous = _search_documents(db, [script_id])
+    statement = delete(SavedScript).where(SavedScript.id == script_id)
+    if expected_version is not None:
+        statement = statement.where(SavedScript.version == expected_version)
+    row = db.execute(
+        statement.returning(SavedScript.python_code_hash, SavedScript.ahk_code_hash)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        _check_version_conflict(db, script_id, expected_version)
         return False
-    except Exception as e:
-        db.rollback()
-        raise e
-    finally:
-        db.close()
+    _unindex_scripts(db, [script_id], previous)
+    _release_blobs(db, list(row))
+    return True
 
-def update_script(script_id: int, name: str = None, description: str = None, python_code: str = None, ahk_code: str = None):
-    """Update an existing script"""
-    if not is_database_available():
-        raise ValueError("Database is not configured")
-    get_engine()
-    db = SessionLocal()
-    try:
-        script = db.query(SavedScript).filter(SavedScript.id == script_id).first()
-        if script:
-            if name:
-                script.name = name
-            if description is not None:
-                script.description = description
-            if python_code:
-                script.python_code = python_code
-            if ahk_code:
-                script.ahk_code = ahk_code
-            script.updated_at = datetime.utcnow()
-            db.commit()
-            db.refresh(script)
-            return script
+def delete_script(script_id: int, expected_version: int = None):
+    """Delete a script by ID.
+
+    With expected_version, raises ConcurrentUpdateError if the script was changed since it was loaded.
+    """
+    with session_scope() as db:
+        return _delete_script(db, script_id, expected_version)
+
+def _update_script(db, script_id: int, name: str = None, description: str = None, python_code: str = None,
+                   ahk_code: str = None, expected_version: int = None):
+    values = {"version": SavedScript.version + 1, "updated_at": datetime.utcnow()}
+    if name:
+        values["name"] = name
+    if description is not None:
+        values["description"] = description
+
+    previous = _search_documents(db, [script_id])
+    # Only code that actually changed writes a new blob and is released afterwards
+    replaced = []
+    stored = []
+    if python_code or ahk_code:
+        old = db.execute(
+            select(SavedScript.python_code_hash, SavedScript.ahk_code_hash).where(SavedScript.id == script_id)
+        ).first()
+        if old is None:
+            return None
+        for code, old_hash, hash_key, inline_key in (
+            (python_code, old.python_code_hash, "python_code_hash", "inline_python_code"),
+            (ahk_code, old.ahk_code_hash, "ahk_code_hash", "inline_ahk_code"),
+        ):
+            if code and _blob_hash(code) != old_hash:
+                values[hash_key] = _store_blob(db, code)
+                values[inline_key] = ""
+                stored.append(values[hash_key])
+                replaced.append(old_hash)
+
+    statement = update(SavedScript).where(SavedScript.id == script_id)
+    if expected_version is not None:
+        statement = statement.where(SavedScript.version == expected_version)
+    row = db.execute(
+        statement.values(**values).returning(*SCRIPT_RETURNING_COLUMNS)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        _check_version_conflict(db, script_id, expected_version)
+        _release_blobs(db, stored)
         return None
-    except Exception as e:
-        db.rollback()
-        raise e
-    finally:
-        db.close()
+
+    script = _script_from_row(row)
+    _attach_code(db, [script])
+    _index_scripts(db, [(script.id, script.name, script.description, script.python_code, script.ahk_code)], previous)
+    _release_blobs(db, replaced)
+    return script
+
+def update_script(script_id: int, name: str = None, description: str = None, python_code: str = None,
+                  ahk_code: str = None, expected_version: int = None):
+    """Update an existing script with a single UPDATE ... RETURNING.
+
+    With expected_version, the update only applies if nobody changed the script since it was
+    loaded; otherwise ConcurrentUpdateError is raised instead of overwriting their edit.
+    """
+    with session_scope() as db:
+        return _update_script(db, script_id, name, description, python_code, ahk_code, expected_version)
+
+def _bulk_save_scripts(db, scripts):
+    scripts = list(scripts)
+    if not scripts:
+        return []
+    python_hashes = _store_blobs(db, [script.get("python_code") for script in scripts])
+    ahk_hashes = _store_blobs(db, [script.get("ahk_code") for script in scripts])
+    now = datetime.utcnow()
+    rows = [{
+        "name": script["name"],
+        "description": script.get("description", ""),
+        "python_code_hash": python_hash,
+        "ahk_code_hash": ahk_hash,
+        "python_code": "",
+        "ahk_code": "",
+        "script_type": script.get("script_type", "conversion"),
+        "created_at": script.get("created_at") or now,
+        "updated_at": now,
+        "version": 1,
+    } for script, python_hash, ahk_hash in zip(scripts, python_hashes, ahk_hashes)]
+    table = SavedScript.__table__
+    ids = list(db.execute(
+        table.insert().returning(table.c.id, sort_by_parameter_order=True), rows
+    ).scalars())
+    _index_scripts(db, [
+        (script_id, script["name"], script.get("description", ""), script.get("python_code"), script.get("ahk_code"))
+        for script_id, script in zip(ids, scripts)
+    ])
+    return ids
+
+def bulk_save_scripts(scripts):
+    """Save many scripts in one transaction and return their ids in input order.
+
+    Each item is a dict with name, python_code, ahk_code and optional description,
+    script_type and created_at. Blobs, rows and search documents are each written with one executemany.
+    """
+    with session_scope() as db:
+        return _bulk_save_scripts(db, scripts)
+
+def _bulk_delete_scripts(db, script_ids):
+    script_ids = list(set(script_ids))
+    if not script_ids:
+        return []
+    previous = _search_documents(db, script_ids)
+    rows = db.execute(
+        delete(SavedScript).where(SavedScript.id.in_(script_ids))
+        .returning(SavedScript.id, SavedScript.python_code_hash, SavedScript.ahk_code_hash)
+        .execution_options(synchronize_session=False)
+    ).all()
+    deleted = [row.id for row in rows]
+    _unindex_scripts(db, deleted, previous)
+    _release_blobs(db, [h for row in rows for h in (row.python_code_hash, row.ahk_code_hash)])
+    return deleted
+
+def bulk_delete_scripts(script_ids):
+    """Delete many scripts with one DELETE ... RETURNING; returns the ids that existed"""
+    with session_scope() as db:
+        return _bulk_delete_scripts(db, script_ids)
+
+def _bulk_update(db, updates):
+    updates = list(updates)
+    groups = {}
+    for item in updates:
+        fields = tuple(sorted(key for key in item if key not in ("id", "version")))
+        unknown = [key for key in fields if key not in BULK_UPDATE_FIELDS]
+        if unknown:
+            raise ValueError(f"bulk_update cannot change {', '.join(unknown)}; use update_script for code")
+        if not fields:
+            continue
+        groups.setdefault((fields, item.get("version") is not None), []).append(item)
+
+    # The search documents hold name and description, so refresh them for the rows that change
+    reindex = {item["id"] for item in updates if "name" in item or "description" in item}
+    previous = _search_documents(db, reindex)
+    table = SavedScript.__table__
+    sane_rowcount = db.get_bind().dialect.supports_sane_multi_rowcount
+    now = datetime.utcnow()
+    updated = 0
+    for (fields, versioned), items in groups.items():
+        statement = table.update().where(table.c.id == bindparam("b_id"))
+        if versioned:
+            statement = statement.where(table.c.version == bindparam("b_version"))
+        statement = statement.values(
+            {field: bindparam(f"b_{field}") for field in fields},
+        ).values(version=table.c.version + 1, updated_at=now)
+        params = [{"b_id": item["id"], "b_version": item.get("version"),
+                   **{f"b_{field}": item[field] for field in fields}} for item in items]
+        if not sane_rowcount:
+            # Without a reliable executemany rowcount, update and count each row on its own
+            for param in params:
+                rowcount = db.execute(statement, param).rowcount
+                if versioned and rowcount == 0:
+                    _check_version_conflict(db, param["b_id"], param["b_version"])
+                    raise ConcurrentUpdateError(f"Script {param['b_id']} was deleted by someone else")
+                updated += rowcount
+        else:
+            result = db.execute(statement, params)
+            if versioned and result.rowcount != len(params):
+                raise ConcurrentUpdateError(
+                    f"{len(params) - result.rowcount} of {len(params)} scripts were changed or deleted by someone else"
+                )
+            updated += result.rowcount
+
+    if reindex:
+        rows = db.execute(select(*SCRIPT_RETURNING_COLUMNS).where(SavedScript.id.in_(reindex))).all()
+        scripts = _attach_code(db, [_script_from_row(row) for row in rows])
+        _index_scripts(db, [(script.id, script.name, script.description, script.python_code, script.ahk_code)
+                            for script in scripts], previous)
+    return updated
+
+def bulk_update(updates):
+    """Change name, description or script_type of many scripts in one transaction.
+
+    Each item is a dict with id, the fields to change and an optional version. Items with the
+    same fields share one executemany UPDATE. If any versioned item was changed or deleted by
+    someone else, ConcurrentUpdateError is raised and nothing is applied; unversioned items
+    whose script no longer exists are skipped. Returns how many scripts were updated.
+    """
+    with session_scope() as db:
+        return _bulk_update(db, updates)
+
+def iter_scripts(script_type: str = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """Yield every script (oldest first) with its code, reading batch_size rows at a time.
+
+    Rows are streamed from a server-side cursor and code bodies are fetched with one blob
+    query per batch, so memory stays flat however large the library is.
+    """
+    with session_scope() as db:
+        # Plain column rows, not ORM entities, so nothing piles up in the session's identity map
+        statement = select(*SCRIPT_RETURNING_COLUMNS).order_by(SavedScript.created_at, SavedScript.id)
+        if script_type:
+            statement = statement.where(SavedScript.script_type == script_type)
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for batch in result.partitions():
+            yield from _attach_code(db, [_script_from_row(row) for row in batch])
+
+def _import_scripts(db, scripts, seen: set):
+    """Insert scripts whose code is not stored yet; returns (inserted ids, skipped count)"""
+    keys = [tuple(_blob_hash(code) if code else None for code in (script.get("python_code"), script.get("ahk_code")))
+            for script in scripts]
+    python_hashes = [key[0] for key in keys if key[0]]
+    ahk_hashes = [key[1] for key in keys if key[1]]
+    existing = set(db.execute(
+        select(SavedScript.python_code_hash, SavedScript.ahk_code_hash).where(or_(
+            SavedScript.python_code_hash.in_(python_hashes),
+            SavedScript.ahk_code_hash.in_(ahk_hashes),
+        ))
+    ).tuples()) if python_hashes or ahk_hashes else set()
+
+    fresh = []
+    for script, key in zip(scripts, keys):
+        # The same code may also appear twice in one import
+        if key in existing or key in seen:
+            continue
+        seen.add(key)
+        fresh.append(script)
+    return _bulk_save_scripts(db, fresh), len(scripts) - len(fresh)
+
+def import_scripts(scripts, chunk_size: int = IMPORT_CHUNK_SIZE, on_progress=None):
+    """Bulk-insert an iterable of script dicts, skipping ones whose code is already saved.
+
+    Each chunk of chunk_size scripts is committed on its own, so an interrupted import keeps
+    what it finished and re-running it only adds the rest. on_progress(summary) is called
+    after every chunk. Returns a summary dict with read, imported and skipped counts.
+    """
+    summary = {"read": 0, "imported": 0, "skipped": 0}
+    seen = set()
+    chunk = []
+
+    def flush():
+        with session_scope() as db:
+            ids, skipped = _import_scripts(db, chunk, seen)
+        summary["imported"] += len(ids)
+        summary["skipped"] += skipped
+        chunk.clear()
+        if on_progress:
+            on_progress(dict(summary))
+
+    for script in scripts:
+        chunk.append(script)
+        summary["read"] += 1
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return summary
+
+def save_llm_calls(records):
+    """Insert LLM call records (dicts with LLM_CALL_FIELDS) with one executemany"""
+    rows = [{name: record.get(name) for name in LLM_CALL_FIELDS} for record in records]
+    if rows:
+        with session_scope() as db:
+            db.execute(insert(LLMCall), rows)
+
+def get_llm_calls(since: datetime = None, limit: int = 50000):
+    """Return recorded LLM calls (newest first) as rows with LLM_CALL_FIELDS"""
+    with session_scope() as db:
+        query = db.query(*(getattr(LLMCall, name) for name in LLM_CALL_FIELDS))
+        if since is not None:
+            query = query.filter(LLMCall.created_at >= since)
+        return query.order_by(LLMCall.created_at.desc()).limit(limit).all()
+
+def prune_llm_calls(retention_days: int):
+    """Delete LLM call records older than retention_days and return how many were removed"""
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    with session_scope() as db:
+        return db.execute(delete(LLMCall).where(LLMCall.created_at < cutoff)).rowcount
+
+def get_cached_response(cache_key: str, ttl_seconds: int = None):
+    """Get a cached AI response by key, or None if missing or expired"""
+    entry = get_cached_entry(cache_key, ttl_seconds)
+    return entry[0] if entry else None
+
+def get_cached_entry(cache_key: str, ttl_seconds: int = None):
+    """Get (response, created_at) of a cached AI response, or None if missing or expired"""
+    with session_scope() as db:
+        entry = db.query(CachedResponse).filter(CachedResponse.cache_key == cache_key).first()
+        if entry is None:
+            return None
+        now = datetime.utcnow()
+        if ttl_seconds and entry.created_at < now - timedelta(seconds=ttl_seconds):
+            db.delete(entry)
+            return None
+        entry.hit_count = (entry.hit_count or 0) + 1
+        entry.last_accessed_at = now
+        return entry.response, entry.created_at
+
+def save_cached_response(cache_key: str, operation: str, model: str, response: str):
+    """Store (or replace) a cached AI response"""
+    with session_scope() as db:
+        now = datetime.utcnow()
+        entry = db.query(CachedResponse).filter(CachedResponse.cache_key == cache_key).first()
+        if entry is None:
+            entry = CachedResponse(cache_key=cache_key)
+            db.add(entry)
+        entry.operation = operation
+        entry.model = model
+        entry.response = response
+        entry.size_bytes = len(response.encode("utf-8"))
+        entry.created_at = now
+        entry.last_accessed_at = now
+
+def evict_cached_responses(ttl_seconds: int = None, max_entries: int = None, max_bytes: int = None):
+    """Remove expired cache entries, then the least recently used ones until under the size limits"""
+    with session_scope() as db:
+        removed = 0
+        if ttl_seconds:
+            cutoff = datetime.utcnow() - timedelta(seconds=ttl_seconds)
+            removed += db.query(CachedResponse).filter(CachedResponse.created_at < cutoff).delete(synchronize_session=False)
+        
+        if max_entries is not None or max_bytes is not None:
+            count, total = db.query(func.count(CachedResponse.cache_key), func.coalesce(func.sum(CachedResponse.size_bytes), 0)).one()
+            over_entries = max_entries is not None and count > max_entries
+            over_bytes = max_bytes is not None and total > max_bytes
+            if over_entries or over_bytes:
+                rows = db.query(CachedResponse.cache_key, CachedResponse.size_bytes).order_by(CachedResponse.last_accessed_at.desc()).all()
+                kept_entries, kept_bytes = 0, 0
+                stale_keys = []
+                for key, size in rows:
+                    if (max_entries is not None and kept_entries >= max_entries) or (max_bytes is not None and kept_bytes + size > max_bytes):
+                        stale_keys.append(key)
+                    else:
+                        kept_entries += 1
+                        kept_bytes += size
+                for start in range(0, len(stale_keys), 500):
+                    batch = stale_keys[start:start + 500]
+                    removed += db.query(CachedResponse).filter(CachedResponse.cache_key.in_(batch)).delete(synchronize_session=False)
+        return removed
@@ -0,0 +1,253 @@
+import re
+import json
+import time
+import uuid
+import random
+import hashlib
+import threading
+from dataclasses import dataclass, asdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Same rough text-to-token ratio as llm_scheduler.estimate_tokens
+CHARS_PER_TOKEN = 4
+# Tokens sent per streamed text delta
+STREAM_CHUNK_TOKENS = 8
+# Generated code is this many times the tokens of the Python it was asked to convert
+CODE_OUTPUT_RATIO = 1.6
+PROSE_OUTPUT_TOKENS = 400
+
+@dataclass
+class FakeAPIConfig:
+    """Behaviour of the stand-in Messages API"""
+    latency: float = 0.4                  # seconds before the first token
+    jitter: float = 0.25                  # latency varies by up to this fraction either way
+    output_tokens_per_second: float = 150.0
+    rate_limit_probability: float = 0.0   # chance that any request gets a 429
+    requests_per_minute: int = 0          # 429 once more requests than this arrive in a minute; 0 = no limit
+    retry_after: float = 1.0              # seconds sent in the retry-after header of a 429
+    seed: int = None
+
+class FakeAnthropicAPI:
+    """Local HTTP stand-in for POST /v1/messages, for load tests and benchmarks without API spend.
+
+    Responses are plausible AutoHotkey code (when the prompt asks for code only) or a short
+    review, sized from the request. Latency, output speed, streaming (SSE) and 429s follow
+    FakeAPIConfig; blocks marked cache_control are reported as prompt-cache writes the first
+    time and cache reads afterwards. Point the app at it with
+    AI_INTEGRATIONS_ANTHROPIC_BASE_URL=http://host:port.
+    """
+
+    def __init__(self, config: FakeAPIConfig = None, host: str = "127.0.0.1", port: int = 0):
+        self.config = config or FakeAPIConfig()
+        self._random = random.Random(self.config.seed)
+        self._lock = threading.Lock()
+        self._cached_prefixes = set()
+        self._recent = []
+        self.stats = {"requests": 0, "streamed": 0, "rate_limited": 0, "truncated": 0, "output_tokens": 0}
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serve from a background thread and return self"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-anthropic", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {**self.stats, "config": asdict(self.config)}
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def _rate_limited(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            self.stats["requests"] += 1
+            if self._random.random() < self.config.rate_limit_probability:
+                return True
+            if self.config.requests_per_minute:
+                self._recent = [t for t in self._recent if now - t < 60]
+                if len(self._recent) >= self.config.requests_per_minute:
+                    return True
+                self._recent.append(now)
+        return False
+
+    def _first_token_delay(self) -> float:
+        jitter = self.config.jitter
+        with self._lock:
+            return max(0.0, self.config.latency * self._random.uniform(1 - jitter, 1 + jitter))
+
+    def _usage(self, request: dict) -> dict:
+        """Input token counts, split into uncached, cache-read and cache-write like the real API"""
+        blocks = list(request.get("system") or [])
+        for message in request.get("messages", []):
+            content = message.get("content")
+            blocks.extend([{"type": "text", "text": content}] if isinstance(content, str) else content)
+
+        usage = {"input_tokens": 0, "cache_read_input_tokens": 0, "cache_creation_input_tokens": 0}
+        prefix = hashlib.sha256(request.get("model", "").encode("utf-8"))
+        pending = 0
+        for block in blocks:
+            text = block.get("text", "")
+            prefix.update(text.encode("utf-8"))
+            pending += len(text) // CHARS_PER_TOKEN + 1
+            if block.get("cache_control"):
+                key = prefix.hexdigest()
+                with self._lock:
+                    hit = key in self._cached_prefixes
+                    self._cached_prefixes.add(key)
+                usage["cache_read_input_tokens" if hit else "cache_creation_input_tokens"] += pending
+                pending = 0
+        usage["input_tokens"] = pending
+        return usage
+
+    def _response_text(self, request: dict) -> str:
+        """AutoHotkey code sized from the Python in the prompt, or a short review"""
+        texts = []
+        for message in request.get("messages", []):
+            content = message.get("content")
+            texts.extend([content] if isinstance(content, str) else [block.get("text", "") for block in content])
+        prompt = "\n".join(texts)
+        if "ONLY the AutoHotkey code" not in prompt:
+            return _review_text(PROSE_OUTPUT_TOKENS)
+        # The last Python block is the code to convert; a chunk's module header comes before it
+        blocks = re.findall(r"```python\n(.*?)```", prompt, re.S)
+        python = blocks[-1] if blocks else prompt
+        tag = hashlib.sha256(python.encode("utf-8")).hexdigest()[:8]
+        return _ahk_text(int(len(python) / CHARS_PER_TOKEN * CODE_OUTPUT_RATIO) + 50, tag)
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, status: int, body: dict, headers: dict = None):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    request = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json(400, _error("invalid_request_error", "Body is not valid JSON"))
+                    return
+                if not self.path.rstrip("/").endswith("/v1/messages"):
+                    self._send_json(404, _error("not_found_error", f"No route for {self.path}"))
+                    return
+                if api._rate_limited():
+                    api._count("rate_limited")
+                    self._send_json(429, _error("rate_limit_error", "Rate limited by the fake API"),
+                                    {"retry-after": f"{api.config.retry_after:g}"})
+                    return
+
+                usage = api._usage(request)
+                text = api._response_text(request)
+                max_tokens = int(request.get("max_tokens") or 4096)
+                stop_reason = "end_turn"
+                if len(text) // CHARS_PER_TOKEN > max_tokens:
+                    text = text[:max_tokens * CHARS_PER_TOKEN]
+                    stop_reason = "max_tokens"
+                    api._count("truncated")
+                output_tokens = len(text) // CHARS_PER_TOKEN + 1
+                api._count("output_tokens", output_tokens)
+
+                time.sleep(api._first_token_delay())
+                message_id = f"msg_fake_{uuid.uuid4().hex[:20]}"
+                if request.get("stream"):
+                    api._count("streamed")
+                    self._stream(message_id, request, text, usage, output_tokens, stop_reason)
+                    return
+                time.sleep(output_tokens / api.config.output_tokens_per_second)
+                self._send_json(200, {
+                    "id": message_id,
+                    "type": "message",
+                    "role": "assistant",
+                    "model": request.get("model"),
+                    "content": [{"type": "text", "text": text}],
+                    "stop_reason": stop_reason,
+                    "stop_sequence": None,
+                    "usage": {**usage, "output_tokens": output_tokens},
+                })
+
+            def _event(self, name: str, data: dict):
+                self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+
+            def _stream(self, message_id, request, text, usage, output_tokens, stop_reason):
+                # No Content-Length, so the end of the event stream is marked by closing the connection
+                self.close_connection = True
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                self._event("message_start", {"type": "message_start", "message": {
+                    "id": message_id, "type": "message", "role": "assistant", "model": request.get("model"),
+                    "content": [], "stop_reason": None, "stop_sequence": None,
+                    "usage": {**usage, "output_tokens": 1},
+                }})
+                self._event("content_block_start", {"type": "content_block_start", "index": 0,
+                                                    "content_block": {"type": "text", "text": ""}})
+                step = STREAM_CHUNK_TOKENS * CHARS_PER_TOKEN
+                for start in range(0, len(text), step):
+                    self._event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                        "delta": {"type": "text_delta", "text": text[start:start + step]}})
+                    time.sleep(STREAM_CHUNK_TOKENS / api.config.output_tokens_per_second)
+                self._event("content_block_stop", {"type": "content_block_stop", "index": 0})
+                self._event("message_delta", {"type": "message_delta",
+                                               "delta": {"stop_reason": stop_reason, "stop_sequence": None},
+                                               "usage": {"output_tokens": output_tokens}})
+                self._event("message_stop", {"type": "message_stop"})
+
+        return Handler
+
+def _error(error_type: str, message: str) -> dict:
+    return {"type": "error", "error": {"type": error_type, "message": message}}
+
+def _ahk_text(tokens: int, tag: str) -> str:
+    """Valid AutoHotkey v2 of roughly `tokens` tokens; tag keeps function names unique across chunks"""
+    lines = ["; Generated by the offline benchmark stand-in", "#Requires AutoHotkey v2.0", ""]
+    size = sum(len(line) + 1 for line in lines)
+    index = 0
+    while size < tokens * CHARS_PER_TOKEN:
+        index += 1
+        block = [
+            f"Step_{tag}_{index}(value) {{",
+            f"    ; mirrors helper {index} of the original module",
+            "    total := value * 2",
+            "    return total",
+            "}",
+            "",
+        ]
+        lines.extend(block)
+        size += sum(len(line) + 1 for line in block)
+    return "\n".join(lines)
+
+def _review_text(tokens: int) -> str:
+    sentence = "The conversion preserves the behaviour of the original code and needs no changes here. "
+    return "**Assessment:** " + sentence * max(1, tokens * CHARS_PER_TOKEN // len(sentence))
@@ -0,0 +1,173 @@
+import os
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+# Worker threads shared by every browser session in this process
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "4"))
+# Queued plus running jobs a single user may have at once
+JOB_PER_USER_LIMIT = int(os.environ.get("JOB_PER_USER_LIMIT", "2"))
+# Finished jobs are kept this long so a refreshed page can still pick up their results
+JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", "3600"))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+class JobLimitError(ValueError):
+    """Raised when a user already has the maximum number of active jobs"""
+
+# The job each worker thread is running, so long jobs can notice a cancel between steps
+_current = threading.local()
+
+def cancel_requested() -> bool:
+    """Whether the job running on this thread has been cancelled; False outside a job"""
+    job = getattr(_current, "job", None)
+    return job is not None and job.cancel_requested
+
+@dataclass
+class Job:
+    """One background unit of work and everything the UI needs to show and apply it"""
+    id: str
+    owner: str
+    kind: str
+    payload: dict
+    state: str = QUEUED
+    progress: str = ""
+    result: object = None
+    error: str = ""
+    created_at: float = field(default_factory=time.time)
+    started_at: float = None
+    finished_at: float = None
+    cancel_requested: bool = False
+
+    @property
+    def active(self) -> bool:
+        return self.state in ACTIVE_STATES
+
+    @property
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+class JobManager:
+    """Process-wide bounded worker pool whose job states and results live outside any Streamlit session"""
+
+    def __init__(self, max_workers: int = JOB_WORKERS, per_user_limit: int = JOB_PER_USER_LIMIT,
+                 retention_seconds: int = JOB_RETENTION_SECONDS):
+        self.max_workers = max_workers
+        self.per_user_limit = per_user_limit
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+
+    def submit(self, owner: str, kind: str, func, *args, payload: dict = None, **kwargs) -> Job:
+        """Queue func(*args, on_text=..., **kwargs) for owner and return its Job.
+
+        on_text records streamed output as the job's progress. Raises JobLimitError
+        when owner already has per_user_limit queued or running jobs.
+        """
+        with self._lock:
+            self._prune()
+            active = sum(1 for job in self._jobs.values() if job.owner == owner and job.active)
+            if active >= self.per_user_limit:
+                self._rejected += 1
+                raise JobLimitError(f"You already have {active} job(s) running; wait for one to finish")
+            job = Job(uuid.uuid4().hex, owner, kind, payload or {})
+            self._jobs[job.id] = job
+
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def _run(self, job: Job, func, args, kwargs):
+        with self._lock:
+            if job.cancel_requested:
+                job.state = CANCELLED
+                job.finished_at = time.time()
+                return
+            job.state = RUNNING
+            job.started_at = time.time()
+
+        def on_text(text):
+            job.progress = text
+
+        _current.job = job
+        try:
+            result = func(*args, on_text=on_text, **kwargs)
+        except Exception as e:
+            with self._lock:
+                job.state = FAILED
+                job.error = str(e)
+                job.finished_at = time.time()
+                self._failed += 1
+            return
+        finally:
+            _current.job = None
+
+        with self._lock:
+            # A cancelled job may still finish its request; its result is simply not applied
+            job.state = CANCELLED if job.cancel_requested else DONE
+            job.result = result
+            job.finished_at = time.time()
+            if job.state == DONE:
+                self._completed += 1
+
+    def get(self, job_id: str) -> Job:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self, owner: str, kind: str) -> Job:
+        """Return the most recently submitted job of a kind for owner, if any"""
+        with self._lock:
+            jobs = [job for job in self._jobs.values() if job.owner == owner and job.kind == kind]
+        return max(jobs, key=lambda job: job.created_at) if jobs else None
+
+    def active_jobs(self, owner: str) -> list:
+        with self._lock:
+            return sorted((job for job in self._jobs.values() if job.owner == owner and job.active),
+                          key=lambda job: job.created_at)
+
+    def cancel(self, job_id: str):
+        """Stop a queued job from starting; a running job finishes, or stops early if it checks
+        cancel_requested(), and its result is not applied (a cancelled upload keeps its partial zip)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.active:
+                job.cancel_requested = True
+
+    def metrics(self) -> dict:
+        """Return queue depth and job counters for the whole process"""
+        with self._lock:
+            queued = sum(1 for job in self._jobs.values() if job.state == QUEUED)
+            running = sum(1 for job in self._jobs.values() if job.state == RUNNING)
+            users = len({job.owner for job in self._jobs.values() if job.active})
+            return {
+                "workers": self.max_workers,
+                "per_user_limit": self.per_user_limit,
+                "queue_depth": queued,
+                "running": running,
+                "active_users": users,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "tracked_jobs": len(self._jobs),
+            }
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if not job.active and job.finished_at is not None and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+job_manager = JobManager()
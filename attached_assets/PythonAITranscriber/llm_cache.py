@@ -0,0 +1,211 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import timezone
+import database
+
+# Cache limits can be tuned through environment variables
+CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", "256"))
+CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+CACHE_DB_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_DB_MAX_ENTRIES", "5000"))
+CACHE_DB_MAX_BYTES = int(os.environ.get("LLM_CACHE_DB_MAX_BYTES", str(50 * 1024 * 1024)))
+CACHE_EVICT_EVERY = 50
+
+def normalize_source(text: str) -> str:
+    """Normalize code or prompt text so cosmetic whitespace changes hit the same cache entry"""
+    if not text:
+        return ""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+    return "\n".join(line.rstrip() for line in lines).strip("\n")
+
+def make_cache_key(operation: str, model: str, prompt_version: str, *inputs: str) -> str:
+    """Build a content-addressed key from the operation, model, prompt version and normalized inputs"""
+    digest = hashlib.sha256()
+    for part in (operation, model, str(prompt_version)) + tuple(normalize_source(i) for i in inputs):
+        encoded = part.encode("utf-8")
+        # Length-prefix every part so ("ab", "c") and ("a", "bc") never collide
+        digest.update(str(len(encoded)).encode("ascii") + b":" + encoded)
+    return digest.hexdigest()
+
+class ResponseCache:
+    """Two-tier cache for AI responses: a bounded in-process LRU backed by the database"""
+
+    def __init__(self, max_entries: int = CACHE_MAX_ENTRIES, ttl_seconds: int = CACHE_TTL_SECONDS,
+                 db_max_entries: int = CACHE_DB_MAX_ENTRIES, db_max_bytes: int = CACHE_DB_MAX_BYTES):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_max_entries = db_max_entries
+        self.db_max_bytes = db_max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._writes_since_evict = 0
+        self._counters = {
+            "memory_hits": 0,
+            "persistent_hits": 0,
+            "misses": 0,
+            "writes": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._counters[name] += amount
+
+    def _remember(self, key: str, value: str, stored_at: float = None):
+        # stored_at is when the response was first cached, so a copy loaded from the
+        # database does not outlive the database entry
+        with self._lock:
+            self._entries[key] = (value, time.time() if stored_at is None else stored_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def get(self, key: str):
+        """Look up a response, checking memory first and then the database"""
+        with self._lock:
+            if key in self._entries:
+                value, stored_at = self._entries[key]
+                if self.ttl_seconds and time.time() - stored_at > self.ttl_seconds:
+                    del self._entries[key]
+                else:
+                    self._entries.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    return value
+
+        if database.is_database_available():
+            try:
+                entry = database.get_cached_entry(key, ttl_seconds=self.ttl_seconds)
+            except Exception:
+                self._count("errors")
+                entry = None
+            if entry is not None:
+                value, created_at = entry
+                self._count("persistent_hits")
+                self._remember(key, value, created_at.replace(tzinfo=timezone.utc).timestamp() if created_at else None)
+                return value
+
+        self._count("misses")
+        return None
+
+    def put(self, key: str, operation: str, model: str, value: str):
+        """Store a response in both tiers"""
+        self._remember(key, value)
+        self._count("writes")
+
+        if not database.is_database_available():
+            return
+        try:
+            database.save_cached_response(key, operation, model, value)
+            with self._lock:
+                self._writes_since_evict += 1
+                run_eviction = self._writes_since_evict >= CACHE_EVICT_EVERY
+                if run_eviction:
+                    self._writes_since_evict = 0
+            if run_eviction:
+                removed = database.evict_cached_responses(
+                    ttl_seconds=self.ttl_seconds,
+                    max_entries=self.db_max_entries,
+                    max_bytes=self.db_max_bytes
+                )
+                self._count("evictions", removed)
+        except Exception:
+            self._count("errors")
+
+    def clear(self):
+        """Drop every entry from the in-process tier"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        """Return hit/miss counters and the current in-process size"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["memory_entries"] = len(self._entries)
+        lookups = stats["memory_hits"] + stats["persistent_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["persistent_hits"]) / lookups if lookups else 0.0
+        return stats
+
+class _Flight:
+    """One in-flight call and everyone waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.listeners = []
+        self.text = ""
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """Coalesce concurrent calls with the same key into one execution whose result every caller receives"""
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {"leaders": 0, "coalesced": 0}
+
+    def do(self, key: str, func, on_text=None):
+        """Run func(publish) once per key at a time and return its result.
+
+        Callers that arrive while a call with the same key is running wait for it instead.
+        publish(text) forwards streamed text to every caller that passed on_text; it is
+        None when the first caller did not ask for streaming, and later callers then
+        receive only the final result.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._counters["leaders"] += 1
+            else:
+                self._counters["coalesced"] += 1
+            if on_text:
+                flight.listeners.append(on_text)
+                text_so_far = flight.text
+            else:
+                text_so_far = ""
+
+        if not leader:
+            if text_so_far:
+                on_text(text_so_far)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            if on_text and flight.result != flight.text:
+                on_text(flight.result)
+            return flight.result
+
+        def publish(text):
+            with self._lock:
+                flight.text = text
+                listeners = list(flight.listeners)
+            for listener in listeners:
+                listener(text)
+
+        try:
+            flight.result = func(publish if on_text else None)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self) -> dict:
+        """Return how many upstream calls ran and how many callers were folded into them"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["in_flight"] = len(self._flights)
+        return stats
+
+# Process-wide cache shared by every Streamlit session and rerun
+response_cache = ResponseCache()
+# Identical requests that are already running are joined instead of sent again
+single_flight = SingleFlight()
@@ -0,0 +1,199 @@
+import os
+import math
+import time
+import threading
+from collections import deque
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+import database
+
+# Calls kept in memory for the Metrics tab, and how long the llm_calls table keeps them
+METRICS_WINDOW = int(os.environ.get("LLM_METRICS_WINDOW", "1000"))
+METRICS_RETENTION_DAYS = int(os.environ.get("LLM_METRICS_RETENTION_DAYS", "30"))
+METRICS_PRUNE_EVERY = 500
+
+OK = "ok"
+TRUNCATED = "truncated"
+INTERRUPTED = "interrupted"
+ERROR = "error"
+
+# Shown first, in this order; any other operation follows alphabetically
+OPERATIONS = ("convert", "convert_chunk", "validate", "debug", "debug_patch", "game_script")
+USAGE_FIELDS = ("input_tokens", "output_tokens", "cache_read_input_tokens", "cache_creation_input_tokens")
+
+@dataclass
+class CallRecord:
+    """Timing, usage and outcome of one request to Claude"""
+    operation: str
+    model: str
+    lane: str
+    outcome: str
+    wall_ms: int
+    ttft_ms: int = None
+    stop_reason: str = None
+    error_class: str = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_input_tokens: int = 0
+    cache_creation_input_tokens: int = 0
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+def _empty_usage() -> dict:
+    return {"requests": 0, **{name: 0 for name in USAGE_FIELDS}}
+
+class MetricsRecorder:
+    """Rolling in-memory window of recent calls, each also written to the llm_calls table.
+
+    Token totals for every answered call since the process started are kept alongside it.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW, retention_days: int = METRICS_RETENTION_DAYS):
+        self.retention_days = retention_days
+        self._records = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._since_prune = 0
+        self._usage = {**_empty_usage(), "by_operation": {}}
+        self.errors = 0
+
+    def record(self, record: CallRecord):
+        with self._lock:
+            self._records.append(record)
+            if record.outcome in (OK, TRUNCATED):
+                by_operation = self._usage["by_operation"].setdefault(record.operation, _empty_usage())
+                for totals in (self._usage, by_operation):
+                    totals["requests"] += 1
+                    for name in USAGE_FIELDS:
+                        totals[name] += getattr(record, name)
+            self._since_prune += 1
+            prune = self._since_prune >= METRICS_PRUNE_EVERY
+            if prune:
+                self._since_prune = 0
+        if not database.is_database_available():
+            return
+        try:
+            database.save_llm_calls([asdict(record)])
+            if prune:
+                database.prune_llm_calls(self.retention_days)
+        except Exception:
+            # Telemetry must never fail the request it describes
+            with self._lock:
+                self.errors += 1
+
+    def recent(self) -> list:
+        with self._lock:
+            return list(self._records)
+
+    def usage(self) -> dict:
+        """Requests and tokens of every answered call in this process, overall and per operation"""
+        with self._lock:
+            snapshot = dict(self._usage)
+            snapshot["by_operation"] = {op: dict(totals) for op, totals in self._usage["by_operation"].items()}
+            return snapshot
+
+recorder = MetricsRecorder()
+
+class CallTimer:
+    """Times one request: call first_token() when output starts arriving and finish() once at the end"""
+
+    def __init__(self, operation: str, model: str, lane: str = None):
+        self.operation = operation
+        self.model = model
+        self.lane = lane
+        self.started = time.perf_counter()
+        self.ttft_ms = None
+
+    def _elapsed_ms(self) -> int:
+        return int((time.perf_counter() - self.started) * 1000)
+
+    def first_token(self):
+        if self.ttft_ms is None:
+            self.ttft_ms = self._elapsed_ms()
+
+    def finish(self, outcome: str, usage=None, stop_reason: str = None, error: Exception = None) -> CallRecord:
+        record = CallRecord(
+            operation=self.operation,
+            model=self.model,
+            lane=self.lane,
+            outcome=outcome,
+            wall_ms=self._elapsed_ms(),
+            ttft_ms=self.ttft_ms,
+            stop_reason=stop_reason,
+            error_class=type(error).__name__ if error is not None else None,
+            **{name: getattr(usage, name, 0) or 0 for name in USAGE_FIELDS},
+        )
+        recorder.record(record)
+        return record
+
+def percentile(values: list, fraction: float):
+    """Nearest-rank percentile of an already sorted list, or None when it is empty"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, math.ceil(fraction * len(values)) - 1))]
+
+def summarize(records) -> dict:
+    """Latency percentiles, token totals and truncation/error rates per operation.
+
+    records are CallRecords or llm_calls rows; the result is ordered like OPERATIONS.
+    """
+    grouped = {}
+    for record in records:
+        grouped.setdefault(record.operation, []).append(record)
+
+    summary = {}
+    for operation in sorted(grouped, key=lambda op: (OPERATIONS.index(op) if op in OPERATIONS else len(OPERATIONS), op)):
+        calls = grouped[operation]
+        walls = sorted(call.wall_ms for call in calls)
+        ttfts = sorted(call.ttft_ms for call in calls if call.ttft_ms is not None)
+        answered = [call for call in calls if call.outcome != ERROR]
+        summary[operation] = {
+            "calls": len(calls),
+            "errors": sum(1 for call in calls if call.outcome == ERROR),
+            "error_rate": sum(1 for call in calls if call.outcome == ERROR) / len(calls),
+            "truncation_rate": (sum(1 for call in answered if call.outcome == TRUNCATED) / len(answered)) if answered else 0.0,
+            "p50_ms": percentile(walls, 0.50),
+            "p95_ms": percentile(walls, 0.95),
+            "p99_ms": percentile(walls, 0.99),
+            "ttft_p50_ms": percentile(ttfts, 0.50),
+            "ttft_p95_ms": percentile(ttfts, 0.95),
+            "total_ms": sum(walls),
+            **{name: sum(getattr(call, name) or 0 for call in calls) for name in USAGE_FIELDS},
+            "models": sorted({call.model for call in calls}),
+        }
+    return summary
+
+def prometheus_text(records) -> str:
+    """Render summarize(records) in the Prometheus text exposition format"""
+    summary = summarize(records)
+    lines = [
+        "# HELP ahk_llm_call_duration_seconds Wall time of Claude calls in the reported window",
+        "# TYPE ahk_llm_call_duration_seconds summary",
+    ]
+    for operation, stats in summary.items():
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            lines.append(f'ahk_llm_call_duration_seconds{{operation="{operation}",quantile="{quantile}"}} {stats[key] / 1000:.3f}')
+        lines.append(f'ahk_llm_call_duration_seconds_sum{{operation="{operation}"}} {stats["total_ms"] / 1000:.3f}')
+        lines.append(f'ahk_llm_call_duration_seconds_count{{operation="{operation}"}} {stats["calls"]}')
+
+    lines += [
+        "# HELP ahk_llm_time_to_first_token_seconds Time until the first streamed text arrived",
+        "# TYPE ahk_llm_time_to_first_token_seconds gauge",
+    ]
+    for operation, stats in summary.items():
+        for quantile, key in (("0.5", "ttft_p50_ms"), ("0.95", "ttft_p95_ms")):
+            if stats[key] is not None:
+                lines.append(f'ahk_llm_time_to_first_token_seconds{{operation="{operation}",quantile="{quantile}"}} {stats[key] / 1000:.3f}')
+
+    lines += ["# HELP ahk_llm_tokens Tokens used by Claude calls in the reported window", "# TYPE ahk_llm_tokens gauge"]
+    for operation, stats in summary.items():
+        for name in USAGE_FIELDS:
+            kind = name[:-len("_tokens")]
+            lines.append(f'ahk_llm_tokens{{operation="{operation}",kind="{kind}"}} {stats[name]}')
+
+    lines += ["# HELP ahk_llm_calls Claude calls in the reported window by outcome", "# TYPE ahk_llm_calls gauge"]
+    outcomes = {}
+    for record in records:
+        key = (record.operation, record.outcome)
+        outcomes[key] = outcomes.get(key, 0) + 1
+    for (operation, outcome), count in sorted(outcomes.items()):
+        lines.append(f'ahk_llm_calls{{operation="{operation}",outcome="{outcome}"}} {count}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,267 @@
+import os
+import time
+import random
+import threading
+import contextvars
+from collections import deque
+import anthropic
+from llm_metrics import percentile
+
+# Account-level limits the scheduler keeps this process under
+LLM_REQUESTS_PER_MINUTE = int(os.environ.get("LLM_REQUESTS_PER_MINUTE", "50"))
+LLM_TOKENS_PER_MINUTE = int(os.environ.get("LLM_TOKENS_PER_MINUTE", "80000"))
+# Requests allowed in flight at once across every session and background pool
+LLM_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+LLM_MAX_RETRIES = int(os.environ.get("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_BASE_SECONDS = float(os.environ.get("LLM_BACKOFF_BASE_SECONDS", "1.0"))
+LLM_BACKOFF_MAX_SECONDS = float(os.environ.get("LLM_BACKOFF_MAX_SECONDS", "60"))
+
+# Priority lanes, most urgent first: clicks in the UI, then background validation, then CLI batches
+INTERACTIVE = "interactive"
+SPECULATIVE = "speculative"
+BATCH = "batch"
+LANES = (INTERACTIVE, SPECULATIVE, BATCH)
+
+# Queue-wait samples kept per lane for the latency percentiles
+LATENCY_SAMPLES = 500
+# Rough prompt size in tokens, used before the real count is known
+CHARS_PER_TOKEN = 4
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, overloads, 5xx responses and dropped connections are worth retrying"""
+    if isinstance(error, (anthropic.RateLimitError, anthropic.APIConnectionError, anthropic.InternalServerError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(error, anthropic.APIStatusError) and (status in (408, 409, 429) or status >= 500)
+
+def retry_after_seconds(error: Exception):
+    """Return the server's requested wait from retry-after(-ms) headers, or None"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        # retry-after may also be an HTTP date; fall back to exponential backoff
+        return None
+    return None
+
+class TokenBucket:
+    """Continuously refilling budget of `rate` units per minute.
+
+    The level may go negative when actual usage exceeds what was reserved, which
+    delays later requests until the overdraft has refilled.
+    """
+
+    def __init__(self, rate_per_minute: int):
+        self.capacity = float(rate_per_minute)
+        self.rate = rate_per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until amount (capped at capacity) can be taken"""
+        self._refill(now)
+        needed = min(amount, self.capacity) - self.level
+        return max(0.0, needed / self.rate) if self.rate else float("inf")
+
+    def take(self, amount: float, now: float):
+        self._refill(now)
+        self.level -= amount
+
+class RequestGroup:
+    """Requests made by one piece of background work, whose lane can be raised while they wait.
+
+    Requests run through run_in_group use the group's lane instead of the one they ask for;
+    LLMScheduler.promote moves them, including ones already queued, to a more urgent lane.
+    """
+
+    def __init__(self, lane: str):
+        self.lane = lane
+
+_current_group = contextvars.ContextVar("llm_request_group", default=None)
+
+def run_in_group(group: RequestGroup, func, *args, **kwargs):
+    """Call func(*args, **kwargs) with every scheduler request it makes belonging to group"""
+    token = _current_group.set(group)
+    try:
+        return func(*args, **kwargs)
+    finally:
+        _current_group.reset(token)
+
+class _Ticket:
+    def __init__(self, lane: str, group: RequestGroup = None):
+        self.lane = lane
+        self.group = group
+        self.enqueued_at = time.monotonic()
+
+class LLMScheduler:
+    """Process-wide gate every Claude request passes through.
+
+    Requests wait in priority lanes until a concurrency slot and enough request and
+    token budget are free; the most urgent non-empty lane always goes first. Failed
+    calls that are worth retrying are re-queued in the same lane after a jittered
+    exponential backoff, or after the server's retry-after, which also pauses every
+    other request so the whole process backs off together.
+    """
+
+    def __init__(self, requests_per_minute: int = LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = LLM_TOKENS_PER_MINUTE, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 max_retries: int = LLM_MAX_RETRIES, backoff_base: float = LLM_BACKOFF_BASE_SECONDS,
+                 backoff_max: float = LLM_BACKOFF_MAX_SECONDS):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._requests = TokenBucket(requests_per_minute)
+        self._tokens = TokenBucket(tokens_per_minute)
+        self._cond = threading.Condition()
+        self._queues = {lane: deque() for lane in LANES}
+        self._in_flight = 0
+        self._paused_until = 0.0
+        self._stats = {lane: {"submitted": 0, "completed": 0, "failed": 0, "retries": 0,
+                              "waits": deque(maxlen=LATENCY_SAMPLES)} for lane in LANES}
+        self._rate_limited = 0
+
+    def run(self, func, lane: str = INTERACTIVE, estimated_tokens: int = 0):
+        """Call func() once the lane's turn comes up, retrying transient failures.
+
+        estimated_tokens is reserved from the token budget before each attempt; call
+        settle() with the real usage once it is known. Inside run_in_group, each attempt
+        queues in the group's current lane.
+        """
+        if lane not in self._queues:
+            raise ValueError(f"Unknown priority lane '{lane}'")
+        stats = self._stats[lane]
+        with self._cond:
+            stats["submitted"] += 1
+
+        group = _current_group.get()
+        attempt = 0
+        while True:
+            self._acquire(group.lane if group is not None else lane, estimated_tokens, group)
+            try:
+                result = func()
+            except Exception as e:
+                self._release()
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    with self._cond:
+                        stats["failed"] += 1
+                    raise
+                delay = self._backoff(e, attempt)
+                attempt += 1
+                with self._cond:
+                    stats["retries"] += 1
+                time.sleep(delay)
+                continue
+            self._release()
+            with self._cond:
+                stats["completed"] += 1
+            return result
+
+    def settle(self, estimated_tokens: int, used_tokens: int):
+        """Charge the difference between a request's reserved and actual token usage"""
+        with self._cond:
+            self._tokens.take(used_tokens - estimated_tokens, time.monotonic())
+            self._cond.notify_all()
+
+    def _backoff(self, error: Exception, attempt: int) -> float:
+        retry_after = retry_after_seconds(error)
+        if retry_after is not None:
+            # A little jitter so every waiter does not retry in the same instant
+            delay = retry_after + random.uniform(0, min(1.0, retry_after * 0.1))
+        else:
+            # Full jitter: anywhere between zero and the exponential cap
+            delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if isinstance(error, anthropic.RateLimitError) or getattr(error, "status_code", None) == 429:
+            with self._cond:
+                self._rate_limited += 1
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+        return delay
+
+    def promote(self, group: RequestGroup, lane: str):
+        """Move group's queued and future requests to lane, e.g. once a user waits on them"""
+        if lane not in self._queues:
+            raise ValueError(f"Unknown priority lane '{lane}'")
+        with self._cond:
+            group.lane = lane
+            for queue in self._queues.values():
+                for ticket in [ticket for ticket in queue if ticket.group is group and ticket.lane != lane]:
+                    queue.remove(ticket)
+                    ticket.lane = lane
+                    self._queues[lane].append(ticket)
+            self._cond.notify_all()
+
+    def _acquire(self, lane: str, estimated_tokens: int, group: RequestGroup = None):
+        ticket = _Ticket(lane, group)
+        with self._cond:
+            self._queues[lane].append(ticket)
+            while True:
+                now = time.monotonic()
+                wait = self._wait_time(ticket, estimated_tokens, now)
+                if wait == 0:
+                    break
+                self._cond.wait(timeout=wait)
+            # promote() may have moved the ticket to another lane while it waited
+            self._queues[ticket.lane].popleft()
+            self._requests.take(1, now)
+            self._tokens.take(estimated_tokens, now)
+            self._in_flight += 1
+            self._stats[ticket.lane]["waits"].append(now - ticket.enqueued_at)
+            # The next ticket in line may be able to go as well
+            self._cond.notify_all()
+
+    def _wait_time(self, ticket: _Ticket, estimated_tokens: int, now: float):
+        """0 when ticket may start now, otherwise how long to sleep before checking again"""
+        head_lane = next(lane for lane in LANES if self._queues[lane])
+        if head_lane != ticket.lane or self._queues[ticket.lane][0] is not ticket:
+            return None
+        if self._in_flight >= self.max_concurrency:
+            return None
+        return max(self._paused_until - now,
+                   self._requests.wait_time(1, now),
+                   self._tokens.wait_time(estimated_tokens, now),
+                   0.0)
+
+    def _release(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        """Return queue depth, retries and queue-wait percentiles (in ms) per lane"""
+        with self._cond:
+            now = time.monotonic()
+            lanes = {}
+            for lane in LANES:
+                stats = self._stats[lane]
+                waits = sorted(stats["waits"])
+                lanes[lane] = {
+                    "queued": len(self._queues[lane]),
+                    "submitted": stats["submitted"],
+                    "completed": stats["completed"],
+                    "failed": stats["failed"],
+                    "retries": stats["retries"],
+                    "wait_p50_ms": (percentile(waits, 0.50) or 0.0) * 1000,
+                    "wait_p95_ms": (percentile(waits, 0.95) or 0.0) * 1000,
+                }
+            return {
+                "in_flight": self._in_flight,
+                "max_concurrency": self.max_concurrency,
+                "rate_limited": self._rate_limited,
+                "paused_for": max(0.0, self._paused_until - now),
+                "lanes": lanes,
+            }
+
+scheduler = LLMScheduler()
@@ -1,6 +1,425 @@
-def main():
-    print("Hello from repl-nix-workspace!")
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+import threading
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+DEFAULT_CHECKPOINT = ".ahk_convert_checkpoint.json"
+# Large real-world scripts shipped at the repository root, used to benchmark the static analyzer
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+ANALYZER_CORPUS = [
+    os.path.join(REPO_ROOT, "Auto Appraisal V8.ahk"),
+    os.path.join(REPO_ROOT, "Treasure Appraisal.ahk"),
+    os.path.join(REPO_ROOT, "Main-2.ahk"),
+]
+
+def collect_sources(paths, manifest: str = None) -> list:
+    """Expand directories, files and an optional manifest into a sorted list of .py files"""
+    sources = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if not d.startswith(".") and d != "__pycache__")
+                sources.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(".py"))
+        elif os.path.isfile(path):
+            sources.append(path)
+        else:
+            print(f"Skipping missing path: {path}", file=sys.stderr)
+
+    if manifest:
+        base_dir = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    sources.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+
+    return sorted(dict.fromkeys(os.path.abspath(s) for s in sources))
+
+class Checkpoint:
+    """Progress file recording which sources (by content hash) were already converted"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def is_done(self, source: str, digest: str) -> bool:
+        entry = self.entries.get(source)
+        return entry is not None and entry.get("sha256") == digest
+
+    def mark_done(self, source: str, digest: str, target: str):
+        with self.lock:
+            self.entries[source] = {"sha256": digest, "target": target, "finished_at": time.time()}
+            # Write to a temp file and swap it in so an interrupted run never leaves a corrupt checkpoint
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_path, self.path)
+
+def output_path(source: str, out_dir: str = None, root: str = None) -> str:
+    """Place the .ahk next to its source, or mirror the source tree inside out_dir"""
+    stem = os.path.splitext(source)[0]
+    if not out_dir:
+        return stem + ".ahk"
+    relative = os.path.relpath(stem, root) if root else os.path.basename(stem)
+    return os.path.join(out_dir, relative + ".ahk")
+
+def convert_file(source: str, args, root: str) -> str:
+    """Convert one file and store the result, returning where it was written"""
+    from converter import run_conversion
+    import database
+    import llm_scheduler
+
+    with open(source, encoding="utf-8") as f:
+        python_code = f.read()
+    # Batch files wait behind conversions users are waiting for in the app
+    ahk_code = run_conversion(python_code, target=args.target, priority=llm_scheduler.BATCH)
+
+    if args.output == "database":
+        name = os.path.relpath(source, root) if root else os.path.basename(source)
+        script = database.save_script(
+            name=name,
+            python_code=python_code,
+            ahk_code=ahk_code,
+            description=f"Batch conversion of {name}",
+            script_type="conversion"
+        )
+        return f"saved_scripts#{script.id}"
+
+    target = output_path(source, args.out_dir, root)
+    os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+    with open(target, "w", encoding="utf-8") as f:
+        f.write(ahk_code)
+    return target
+
+def run_batch(args) -> int:
+    """Convert every selected file on a worker pool, resuming from the checkpoint"""
+    import llm_metrics
+    import database
+
+    sources = collect_sources(args.paths, args.manifest)
+    if not sources:
+        print("No Python files found.", file=sys.stderr)
+        return 1
+
+    if args.output == "database":
+        if not database.is_database_available():
+            print("DATABASE_URL is not set; use --output files instead.", file=sys.stderr)
+            return 1
+        database.init_db()
+
+    root = os.path.commonpath(sources) if len(sources) > 1 else os.path.dirname(sources[0])
+    checkpoint = Checkpoint(args.checkpoint)
+
+    pending = []
+    skipped = 0
+    for source in sources:
+        with open(source, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        if not args.force and checkpoint.is_done(source, digest):
+            skipped += 1
+        else:
+            pending.append((source, digest))
+
+    print(f"Converting {len(pending)} file(s) with {args.workers} worker(s); {skipped} already done")
+    usage_before = llm_metrics.recorder.usage()
+    started = time.perf_counter()
+    converted, failures = 0, []
+
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        futures = {executor.submit(convert_file, source, args, root): (source, digest) for source, digest in pending}
+        for done, future in enumerate(as_completed(futures), 1):
+            source, digest = futures[future]
+            label = os.path.relpath(source, root)
+            try:
+                target = future.result()
+                checkpoint.mark_done(source, digest, target)
+                converted += 1
+                print(f"[{done}/{len(pending)}] ok     {label} -> {target}")
+            except Exception as e:
+                failures.append((source, str(e)))
+                print(f"[{done}/{len(pending)}] FAILED {label}: {str(e)}")
+
+    elapsed = time.perf_counter() - started
+    usage_after = llm_metrics.recorder.usage()
+    tokens = (usage_after["input_tokens"] - usage_before["input_tokens"]) + \
+             (usage_after["output_tokens"] - usage_before["output_tokens"])
+
+    print("")
+    print("Summary")
+    print(f"  converted: {converted}  skipped: {skipped}  failed: {len(failures)}")
+    print(f"  elapsed:   {elapsed:.1f}s")
+    print(f"  files/s:   {converted / elapsed if elapsed else 0:.2f}")
+    print(f"  tokens/s:  {tokens / elapsed if elapsed else 0:.1f} ({tokens} tokens)")
+    for source, error in failures:
+        print(f"  failed: {source}: {error}")
+    return 1 if failures else 0
+
+def run_analyze(args) -> int:
+    """Statically analyze AutoHotkey files and report diagnostics and analyzer throughput"""
+    import ahk_analyzer
+
+    paths = args.paths or ANALYZER_CORPUS
+    total_lines, total_ms, error_count = 0, 0.0, 0
+    for path in paths:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            code = f.read()
+        timings = []
+        for _ in range(args.repeat):
+            result = ahk_analyzer.analyze(code, version=args.target)
+            timings.append(result.elapsed_ms)
+        best = min(timings)
+        total_lines += result.line_count
+        total_ms += best
+        error_count += len(result.errors)
+        print(f"{os.path.basename(path)}: AutoHotkey {result.version}, {result.line_count} lines, "
+              f"{best:.1f} ms (best of {args.repeat}), {len(result.errors)} error(s), {len(result.warnings)} warning(s)")
+        for d in result.diagnostics:
+            print(f"  {d.line}:{d.column} {d.severity} {d.code} {d.message}")
+
+    if total_ms:
+        print(f"\nAnalyzed {total_lines} lines in {total_ms:.1f} ms ({total_lines / total_ms * 1000:,.0f} lines/s)")
+    return 1 if error_count else 0
+
+def run_storage(args) -> int:
+    """Migrate inline code into blob storage and report how much space it saves"""
+    import database
+
+    if not database.is_database_available():
+        print("DATABASE_URL is not set.", file=sys.stderr)
+        return 1
+    # init_db moves any inline code left by older versions into code_blobs
+    database.init_db()
+    report = database.get_storage_report()
+    print(f"  scripts:      {report['scripts']}")
+    print(f"  code blobs:   {report['blobs']}")
+    print(f"  as saved:     {report['logical_bytes']:,} bytes")
+    print(f"  unique:       {report['unique_bytes']:,} bytes ({report['dedup_ratio']:.1f}x deduplication)")
+    print(f"  stored:       {report['stored_bytes']:,} bytes ({report['compression_ratio']:.1f}x compression)")
+    print(f"  saved:        {report['saved_bytes']:,} bytes")
+    return 0
+
+def run_export(args) -> int:
+    """Stream the saved script library to a file (or stdout with "-")"""
+    import database
+    import script_archive
+
+    if not database.is_database_available():
+        print("DATABASE_URL is not set.", file=sys.stderr)
+        return 1
+    database.init_db()
+    fmt = args.format or script_archive.detect_format(args.output)
+    started = time.perf_counter()
+    if args.output == "-":
+        count = script_archive.export_scripts(sys.stdout.buffer, fmt, args.type, args.batch_size)
+    else:
+        with open(args.output, "wb") as f:
+            count = script_archive.export_scripts(f, fmt, args.type, args.batch_size)
+    elapsed = time.perf_counter() - started
+    print(f"Exported {count} script(s) as {fmt} in {elapsed:.1f}s", file=sys.stderr)
+    return 0
+
+def run_import(args) -> int:
+    """Bulk-import an export, skipping scripts whose code is already saved"""
+    import database
+    import script_archive
+
+    if not database.is_database_available():
+        print("DATABASE_URL is not set.", file=sys.stderr)
+        return 1
+    database.init_db()
+    fmt = args.format or script_archive.detect_format(args.input)
+    started = time.perf_counter()
+
+    def on_progress(summary):
+        print(f"  {summary['read']} read, {summary['imported']} imported, {summary['skipped']} duplicates skipped",
+              file=sys.stderr)
+
+    try:
+        with open(args.input, "rb") as f:
+            summary = script_archive.import_scripts(f, fmt, args.chunk_size, on_progress)
+    except ValueError as e:
+        print(f"Import stopped: {e}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - started
+    print(f"Imported {summary['imported']} of {summary['read']} script(s) in {elapsed:.1f}s "
+          f"({summary['skipped']} duplicates skipped)")
+    return 0
+
+def run_metrics(args) -> int:
+    """Summarise recorded Claude calls per operation as a table, JSON or Prometheus text"""
+    import database
+    import llm_metrics
+
+    if not database.is_database_available():
+        print("DATABASE_URL is not set.", file=sys.stderr)
+        return 1
+    database.init_db()
+    since = datetime.utcnow() - timedelta(hours=args.hours)
+    records = database.get_llm_calls(since=since)
+    if args.format == "prometheus":
+        sys.stdout.write(llm_metrics.prometheus_text(records))
+        return 0
+    summary = llm_metrics.summarize(records)
+    if args.format == "json":
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    if not summary:
+        print(f"No AI calls recorded in the last {args.hours}h.")
+        return 0
+    print(f"{'operation':<14} {'calls':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'in/call':>8} {'out/call':>8} {'trunc':>6} {'errors':>6}")
+    for operation, stats in summary.items():
+        print(f"{operation:<14} {stats['calls']:>6} {stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8} "
+              f"{stats['input_tokens'] // stats['calls']:>8} {stats['output_tokens'] // stats['calls']:>8} "
+              f"{stats['truncation_rate']:>6.1%} {stats['error_rate']:>6.1%}")
+    return 0
+
+def _fake_api_config(args):
+    import fake_anthropic
+
+    return fake_anthropic.FakeAPIConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        output_tokens_per_second=args.tokens_per_second,
+        rate_limit_probability=args.rate_limit_probability,
+        requests_per_minute=args.api_rpm,
+        seed=args.seed,
+    )
+
+def run_fake_api(args) -> int:
+    """Serve the stand-in Messages API until interrupted"""
+    import fake_anthropic
+
+    api = fake_anthropic.FakeAnthropicAPI(_fake_api_config(args), args.host, args.port)
+    print(f"Fake Anthropic API listening on {api.base_url}")
+    print(f"Start the app with AI_INTEGRATIONS_ANTHROPIC_BASE_URL={api.base_url}")
+    try:
+        api.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api.stop()
+    return 0
+
+def run_benchmark(args) -> int:
+    """Benchmark conversions and database access offline and write the results as JSON"""
+    import benchmark
+
+    sizes = [int(size) for size in args.sizes.split(",")] if args.sizes else benchmark.CORPUS_SIZES
+    started = time.perf_counter()
+    results = benchmark.run(
+        base_url=args.base_url,
+        api_config=_fake_api_config(args),
+        sizes=sizes,
+        requests=args.requests,
+        concurrency=args.concurrency,
+        db_rows=args.db_rows,
+        stream=args.stream,
+        suites=args.suite or ("conversion", "operations", "database"),
+    )
+    benchmark.write_results(results, args.output)
+    print(f"Benchmark finished in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = benchmark.compare(results, baseline, args.threshold)
+    for path, before, after, change in regressions:
+        print(f"  regression: {path} {before} -> {after} ({change:+.0%})", file=sys.stderr)
+    print(f"{len(regressions)} regression(s) beyond {args.threshold:.0%} against {args.baseline}", file=sys.stderr)
+    return 1 if regressions else 0
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Python to AutoHotkey converter command-line tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert = subparsers.add_parser("convert", help="Batch-convert Python files to AutoHotkey")
+    convert.add_argument("paths", nargs="*", help="Python files or directories to convert")
+    convert.add_argument("--manifest", help="Text file listing one Python file per line")
+    convert.add_argument("--workers", type=int, default=4, help="Number of files converted concurrently")
+    convert.add_argument("--output", choices=["files", "database"], default="files",
+                         help="Write .ahk files or save SavedScript rows")
+    convert.add_argument("--out-dir", help="Directory for .ahk files (default: next to each source)")
+    convert.add_argument("--target", choices=["v2", "v1"], default="v2", help="AutoHotkey version to generate")
+    convert.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT, help="Progress file used to resume runs")
+    convert.add_argument("--force", action="store_true", help="Reconvert files already in the checkpoint")
+    convert.set_defaults(handler=run_batch)
+
+    analyze = subparsers.add_parser("analyze", help="Statically check AutoHotkey files without calling the AI")
+    analyze.add_argument("paths", nargs="*", help="AutoHotkey files (default: the repository's large sample scripts)")
+    analyze.add_argument("--target", choices=["v2", "v1"], help="Force the AutoHotkey version instead of detecting it")
+    analyze.add_argument("--repeat", type=int, default=1, help="Run each file N times and report the best time")
+    analyze.set_defaults(handler=run_analyze)
+
+    storage = subparsers.add_parser("storage", help="Migrate saved scripts to blob storage and report space saved")
+    storage.set_defaults(handler=run_storage)
+
+    export = subparsers.add_parser("export", help="Export saved scripts as NDJSON or a zip/tar of code files")
+    export.add_argument("output", help="Output file (.ndjson, .zip, .tar.gz), or - for stdout")
+    export.add_argument("--format", choices=["ndjson", "zip", "tar"], help="Archive format (default: from the file name)")
+    export.add_argument("--type", choices=["conversion", "game_helper"], help="Only export scripts of this type")
+    export.add_argument("--batch-size", type=int, default=200, help="Rows read from the database per round trip")
+    export.set_defaults(handler=run_export)
+
+    import_ = subparsers.add_parser("import", help="Import an export, skipping scripts that are already saved")
+    import_.add_argument("input", help="File written by the export command")
+    import_.add_argument("--format", choices=["ndjson", "zip", "tar"], help="Archive format (default: from the file name)")
+    import_.add_argument("--chunk-size", type=int, default=500, help="Scripts inserted per transaction")
+    import_.set_defaults(handler=run_import)
+
+    metrics = subparsers.add_parser("metrics", help="Report latency, tokens and truncation of recorded AI calls")
+    metrics.add_argument("--hours", type=int, default=24, help="Only include calls from the last N hours")
+    metrics.add_argument("--format", choices=["table", "json", "prometheus"], default="table", help="Output format")
+    metrics.set_defaults(handler=run_metrics)
+
+    def add_fake_api_arguments(command):
+        command.add_argument("--latency", type=float, default=0.4, help="Seconds before the first token")
+        command.add_argument("--jitter", type=float, default=0.25, help="Latency varies by up to this fraction")
+        command.add_argument("--tokens-per-second", type=float, default=150.0, help="Output token rate")
+        command.add_argument("--rate-limit-probability", type=float, default=0.0,
+                             help="Chance that a request is answered with a 429")
+        command.add_argument("--api-rpm", type=int, default=0,
+                             help="Answer with 429 beyond this many requests per minute (0 = unlimited)")
+        command.add_argument("--seed", type=int, help="Random seed for latency and 429 injection")
+
+    fake_api = subparsers.add_parser("fake-api", help="Serve a local stand-in for the Anthropic Messages API")
+    fake_api.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    fake_api.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    add_fake_api_arguments(fake_api)
+    fake_api.set_defaults(handler=run_fake_api)
+
+    bench = subparsers.add_parser("benchmark", help="Measure conversion and database performance without API spend")
+    bench.add_argument("--suite", action="append", choices=["conversion", "operations", "database"],
+                       help="Suite to run; repeat for several (default: all)")
+    bench.add_argument("--sizes", help="Comma-separated corpus sizes in lines (default: 20,80,320,1280)")
+    bench.add_argument("--requests", type=int, default=8, help="Requests per corpus input and operation")
+    bench.add_argument("--concurrency", type=int, default=4, help="Requests in flight at once")
+    bench.add_argument("--stream", action="store_true", help="Stream responses, as the app does")
+    bench.add_argument("--db-rows", type=int, default=2000, help="Scripts saved for the database suite")
+    bench.add_argument("--base-url", help="Use an already running API instead of the in-process stand-in")
+    bench.add_argument("--output", help="JSON results file (default: stdout)")
+    bench.add_argument("--baseline", help="Earlier results file; exit 1 if any metric regressed")
+    bench.add_argument("--threshold", type=float, default=0.10, help="Relative change counted as a regression")
+    add_fake_api_arguments(bench)
+    bench.set_defaults(handler=run_benchmark)
+
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.handler(args)
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -0,0 +1,138 @@
+import os
+import ast
+import threading
+from dataclasses import dataclass
+import llm_scheduler
+
+# Large or complex code goes to the default model; small, simple code to the faster one
+DEFAULT_MODEL = os.environ.get("LLM_MODEL", "claude-sonnet-4-5")
+FAST_MODEL = os.environ.get("LLM_FAST_MODEL", "claude-haiku-4-5")
+# Set LLM_ROUTING=off to send everything to DEFAULT_MODEL
+ROUTING_ENABLED = os.environ.get("LLM_ROUTING", "on").lower() not in ("0", "off", "false", "no")
+
+# Hard ceiling for max_tokens. Conversions are chunked well below it (see chunked_converter.should_chunk),
+# so only a file that cannot be split can reach it, and its response is then marked as truncated
+MAX_OUTPUT_TOKENS = int(os.environ.get("LLM_MAX_OUTPUT_TOKENS", "8192"))
+MIN_OUTPUT_TOKENS = 1024
+# max_tokens is the expected output times this, so an estimate that runs short is not cut off
+OUTPUT_HEADROOM = 1.5
+
+# Python code at or under both limits counts as small and simple
+FAST_MAX_INPUT_TOKENS = int(os.environ.get("LLM_FAST_MAX_INPUT_TOKENS", "1500"))
+FAST_MAX_COMPLEXITY = int(os.environ.get("LLM_FAST_MAX_COMPLEXITY", "12"))
+
+# AutoHotkey runs longer than the Python it came from, plus a header and comments
+CONVERT_OUTPUT_RATIO = 1.6
+CONVERT_OUTPUT_OVERHEAD = 200
+# Reviews are prose of a fairly stable length; debug output also repeats the fixed code
+REVIEW_OUTPUT_TOKENS = 1500
+# A debug patch repeats only the changed lines and their context, whatever the script's size
+PATCH_OUTPUT_TOKENS = 2000
+GAME_SCRIPT_OUTPUT_TOKENS = 3000
+
+# Constructs that tend to need careful translation, and what each adds to the complexity score
+_COMPLEX_NODES = {
+    ast.ClassDef: 3,
+    ast.AsyncFunctionDef: 4,
+    ast.Await: 2,
+    ast.Yield: 3,
+    ast.YieldFrom: 3,
+    ast.Lambda: 1,
+    ast.ListComp: 1,
+    ast.SetComp: 1,
+    ast.DictComp: 1,
+    ast.GeneratorExp: 2,
+    ast.Try: 2,
+    ast.With: 1,
+    ast.Global: 1,
+    ast.Nonlocal: 2,
+    ast.Match: 3,
+}
+
+@dataclass(frozen=True)
+class Route:
+    """Model and output budget picked for one request, with the estimates behind them"""
+    model: str
+    max_tokens: int
+    input_tokens: int
+    output_tokens: int
+    complexity: int
+    reason: str
+
+def complexity(python_code: str) -> int:
+    """Score how hard code is to translate: weighted constructs plus nesting beyond two levels.
+
+    Code that does not parse gets a score above FAST_MAX_COMPLEXITY.
+    """
+    try:
+        tree = ast.parse(python_code)
+    except SyntaxError:
+        return FAST_MAX_COMPLEXITY + 1
+
+    score = 0
+    def visit(node, depth):
+        nonlocal score
+        score += _COMPLEX_NODES.get(type(node), 0)
+        nested = isinstance(node, (ast.For, ast.While, ast.If, ast.With, ast.Try, ast.FunctionDef,
+                                   ast.AsyncFunctionDef, ast.ClassDef))
+        if nested and depth >= 2:
+            score += 1
+        for child in ast.iter_child_nodes(node):
+            visit(child, depth + 1 if nested else depth)
+    visit(tree, 0)
+    return score
+
+def _max_tokens(output_tokens: int) -> int:
+    return max(MIN_OUTPUT_TOKENS, min(MAX_OUTPUT_TOKENS, int(output_tokens * OUTPUT_HEADROOM)))
+
+def route(operation: str, python_code: str = "", ahk_code: str = "", prompt: str = "") -> Route:
+    """Pick the model and max_tokens for an operation from local size and complexity estimates"""
+    input_tokens = sum(llm_scheduler.estimate_tokens(text) for text in (python_code, ahk_code, prompt) if text)
+    # The model follows the Python alone, not the AutoHotkey or issue text, so validate and debug
+    # stay on the model that converted the code: Anthropic's prompt cache is per model, and the
+    # cached system prompt and Python block are only reused if the follow-up goes to the same one
+    python_tokens = llm_scheduler.estimate_tokens(python_code) if python_code else 0
+    if operation in ("convert", "convert_chunk"):
+        output_tokens = int(llm_scheduler.estimate_tokens(python_code) * CONVERT_OUTPUT_RATIO) + CONVERT_OUTPUT_OVERHEAD
+    elif operation == "debug":
+        output_tokens = llm_scheduler.estimate_tokens(ahk_code) + REVIEW_OUTPUT_TOKENS
+    elif operation == "debug_patch":
+        output_tokens = PATCH_OUTPUT_TOKENS
+    elif operation == "game_script":
+        output_tokens = GAME_SCRIPT_OUTPUT_TOKENS
+    else:
+        output_tokens = REVIEW_OUTPUT_TOKENS
+
+    score = complexity(python_code) if python_code else 0
+    if not ROUTING_ENABLED:
+        model, reason = DEFAULT_MODEL, "routing disabled"
+    elif operation == "game_script":
+        # Open-ended generation from a short description benefits from the stronger model
+        model, reason = DEFAULT_MODEL, "open-ended generation"
+    elif python_tokens > FAST_MAX_INPUT_TOKENS:
+        model, reason = DEFAULT_MODEL, f"~{python_tokens} tokens of Python"
+    elif score > FAST_MAX_COMPLEXITY:
+        model, reason = DEFAULT_MODEL, f"complexity {score}"
+    else:
+        model, reason = FAST_MODEL, "small, simple code"
+    return Route(model, _max_tokens(output_tokens), input_tokens, output_tokens, score, reason)
+
+def default_route() -> Route:
+    """The unrouted behaviour: default model with the full output budget"""
+    return Route(DEFAULT_MODEL, MAX_OUTPUT_TOKENS, 0, 0, 0, "default")
+
+_lock = threading.Lock()
+_routed = {}
+_truncated = 0
+
+def record(model: str, truncated: bool = False):
+    """Count a request sent to model, and whether it stopped at max_tokens"""
+    global _truncated
+    with _lock:
+        _routed[model] = _routed.get(model, 0) + 1
+        if truncated:
+            _truncated += 1
+
+def stats() -> dict:
+    with _lock:
+        return {"requests_by_model": dict(_routed), "truncated": _truncated}
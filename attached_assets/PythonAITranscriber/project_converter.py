@@ -0,0 +1,242 @@
+import os
+import posixpath
+import zipfile
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import jobs
+import llm_scheduler
+from converter import run_conversion, DEFAULT_TARGET
+
+# Largest single .py file and largest total of Python read from one upload (after decompression)
+MAX_FILE_BYTES = int(os.environ.get("UPLOAD_MAX_FILE_BYTES", str(1024 * 1024)))
+MAX_TOTAL_BYTES = int(os.environ.get("UPLOAD_MAX_TOTAL_BYTES", str(20 * 1024 * 1024)))
+MAX_FILES = int(os.environ.get("UPLOAD_MAX_FILES", "500"))
+# Files converted at once for one upload; each worker's requests still go through llm_scheduler
+PROJECT_WORKERS = int(os.environ.get("UPLOAD_WORKERS", "4"))
+# Summary written into the output zip next to the .ahk files
+REPORT_NAME = "CONVERSION_REPORT.txt"
+CANCELLED_REASON = "the conversion was cancelled"
+
+QUEUED = "queued"
+CONVERTING = "converting"
+CONVERTED = "converted"
+FAILED = "failed"
+SKIPPED = "skipped"
+STATUS_ICONS = {QUEUED: "⏳", CONVERTING: "🔄", CONVERTED: "✅", FAILED: "❌", SKIPPED: "⏭️"}
+
+class UploadLimitError(ValueError):
+    """Raised when an upload holds more Python than MAX_TOTAL_BYTES or MAX_FILES allow"""
+
+@dataclass
+class SourceFile:
+    """One Python file read from an upload, or the reason it was not"""
+    path: str
+    code: str = None
+    skipped: str = None
+    size: int = 0
+
+@dataclass
+class ProjectConversion:
+    """Result of convert_project: a zip on disk plus what happened to each file"""
+    output_path: str
+    statuses: dict = field(default_factory=dict)
+    errors: dict = field(default_factory=dict)
+    bytes_read: int = 0
+    stopped: str = None
+
+    def count(self, status: str) -> int:
+        return sum(1 for value in self.statuses.values() if value == status)
+
+def _safe_path(name: str) -> str:
+    """An archive entry name as a relative path that cannot climb out of the output zip's root"""
+    parts = [part for part in posixpath.normpath(name.replace("\\", "/")).split("/") if part not in ("", ".", "..")]
+    return "/".join(parts)
+
+def _wanted(path: str) -> bool:
+    parts = path.split("/")
+    return (path.endswith(".py") and "__pycache__" not in parts and "__MACOSX" not in parts
+            and not any(part.startswith(".") for part in parts))
+
+def _decode(data: bytes, path: str) -> SourceFile:
+    try:
+        return SourceFile(path, data.decode("utf-8-sig"), size=len(data))
+    except UnicodeDecodeError:
+        return SourceFile(path, skipped="not UTF-8 text")
+
+def _read_limited(fileobj, path: str) -> SourceFile:
+    # Read one byte past the limit rather than trusting a declared size
+    data = fileobj.read(MAX_FILE_BYTES + 1)
+    if len(data) > MAX_FILE_BYTES:
+        return SourceFile(path, skipped=f"larger than {MAX_FILE_BYTES:,} bytes")
+    return _decode(data, path)
+
+def _zip_sources(name: str, fileobj):
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise ValueError(f"{name} is not a zip archive")
+    prefix = _safe_path(os.path.splitext(name)[0])
+    with archive:
+        for info in archive.infolist():
+            path = _safe_path(info.filename)
+            if info.is_dir() or not _wanted(path):
+                continue
+            path = f"{prefix}/{path}"
+            if info.file_size > MAX_FILE_BYTES:
+                yield SourceFile(path, skipped=f"larger than {MAX_FILE_BYTES:,} bytes")
+                continue
+            with archive.open(info) as entry:
+                yield _read_limited(entry, path)
+
+def iter_sources(uploads):
+    """Yield a SourceFile per .py file in uploads, which are (name, binary file object) pairs.
+
+    Uploads may be .py files or zip archives of a project; archive entries keep their
+    paths under a folder named after the archive. Files are read one at a time as the
+    caller asks for them. Oversized or undecodable files are yielded as skipped; raises
+    UploadLimitError once more than MAX_FILES files or MAX_TOTAL_BYTES of Python are read.
+    """
+    total = 0
+    files = 0
+    seen = set()
+    for name, fileobj in uploads:
+        if name.lower().endswith(".zip"):
+            sources = _zip_sources(name, fileobj)
+        else:
+            sources = iter([_read_limited(fileobj, _safe_path(name))])
+        for source in sources:
+            # Two uploads of the same name (e.g. main.py from two projects) both get an output
+            stem, number = os.path.splitext(source.path)[0], 1
+            while source.path in seen:
+                number += 1
+                source.path = f"{stem}_{number}.py"
+            seen.add(source.path)
+            if source.code is not None:
+                files += 1
+                total += source.size
+                if files > MAX_FILES:
+                    raise UploadLimitError(f"The upload has more than {MAX_FILES} Python files")
+                if total > MAX_TOTAL_BYTES:
+                    raise UploadLimitError(f"The upload holds more than {MAX_TOTAL_BYTES:,} bytes of Python")
+            yield source
+
+def progress_markdown(result: ProjectConversion, limit: int = 50) -> str:
+    """Counts plus one line per file (the most recent `limit` of them) for the job progress area"""
+    counts = " · ".join(f"{result.count(status)} {status}" for status in STATUS_ICONS if result.count(status))
+    lines = [f"**{len(result.statuses)} file(s)**: {counts or 'reading upload'}", ""]
+    items = list(result.statuses.items())
+    if len(items) > limit:
+        lines.append(f"- … {len(items) - limit} earlier file(s)")
+    for path, status in items[-limit:]:
+        error = result.errors.get(path)
+        lines.append(f"- {STATUS_ICONS[status]} `{path}`" + (f" — {error}" if error else ""))
+    return "\n".join(lines)
+
+def _report(result: ProjectConversion) -> str:
+    lines = [f"{result.count(CONVERTED)} converted, {result.count(FAILED)} failed, "
+             f"{result.count(SKIPPED)} skipped"]
+    if result.stopped:
+        lines.append(f"Stopped early: {result.stopped}")
+    for path, status in result.statuses.items():
+        if status != CONVERTED:
+            lines.append(f"{status}: {path}: {result.errors.get(path, '')}")
+    return "\n".join(lines) + "\n"
+
+def convert_project(uploads, target: str = DEFAULT_TARGET, workers: int = PROJECT_WORKERS,
+                    on_text=None, output_dir: str = None) -> ProjectConversion:
+    """Convert every .py file in uploads and write the .ahk outputs into a zip on disk.
+
+    Sources are read lazily and at most 2 * workers files are read but not yet written,
+    so memory use does not grow with the size of the project: each .ahk is added to the
+    zip as soon as it is converted and then dropped. on_text receives progress_markdown
+    after every change. Conversions use the batch lane so single-file conversions in the
+    app stay responsive. A failed file is recorded and the rest carry on; exceeding the
+    upload limits, or cancelling the job running this, stops reading but keeps what was
+    already converted. Files queued but not started when the job is cancelled are skipped.
+    """
+    handle, output_path = tempfile.mkstemp(prefix="ahk_project_", suffix=".zip", dir=output_dir)
+    os.close(handle)
+    result = ProjectConversion(output_path)
+    lock = threading.Lock()
+
+    def report():
+        if on_text:
+            with lock:
+                text = progress_markdown(result)
+            on_text(text)
+
+    def convert(source: SourceFile) -> str:
+        with lock:
+            result.statuses[source.path] = CONVERTING
+        report()
+        return run_conversion(source.code, target=target, priority=llm_scheduler.BATCH)
+
+    def collect(done):
+        for future in done:
+            path = pending.pop(future)
+            try:
+                ahk_code = future.result()
+            except Exception as e:
+                with lock:
+                    result.statuses[path] = FAILED
+                    result.errors[path] = str(e)
+            else:
+                archive.writestr(os.path.splitext(path)[0] + ".ahk", ahk_code)
+                with lock:
+                    result.statuses[path] = CONVERTED
+        report()
+
+    def drop_queued():
+        dropped = [future for future in pending if future.cancel()]
+        with lock:
+            for future in dropped:
+                path = pending.pop(future)
+                result.statuses[path] = SKIPPED
+                result.errors[path] = CANCELLED_REASON
+            if dropped:
+                result.stopped = CANCELLED_REASON
+        report()
+
+    pending = {}
+    try:
+        with zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED) as archive, \
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix="project") as executor:
+            try:
+                for source in iter_sources(uploads):
+                    # Checked between files; a file already being converted is finished and kept
+                    if jobs.cancel_requested():
+                        result.stopped = CANCELLED_REASON
+                        break
+                    with lock:
+                        result.bytes_read += source.size
+                        if source.skipped:
+                            result.statuses[source.path] = SKIPPED
+                            result.errors[source.path] = source.skipped
+                        else:
+                            result.statuses[source.path] = QUEUED
+                    if source.skipped:
+                        report()
+                        continue
+                    pending[executor.submit(convert, source)] = source.path
+                    # Stop reading ahead until some queued files are written out
+                    if len(pending) >= 2 * workers:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+            except UploadLimitError as e:
+                result.stopped = str(e)
+            dropped = False
+            while pending:
+                if not dropped and jobs.cancel_requested():
+                    drop_queued()
+                    dropped = True
+                    continue
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            archive.writestr(REPORT_NAME, _report(result))
+    except BaseException:
+        os.remove(output_path)
+        raise
+    report()
+    return result
@@ -0,0 +1,118 @@
+# Prompt building blocks shared by every Claude call.
+#
+# Requests are laid out as: stable system block -> cached Python block -> cached AutoHotkey
+# block -> short per-operation instructions. Convert, validate and debug on the same code
+# therefore share a byte-identical prefix that Anthropic prompt caching can reuse.
+# Any edit to the text below must be paired with a PROMPT_VERSION bump in converter.py.
+
+CACHE_CONTROL = {"type": "ephemeral"}
+
+SYSTEM_PROMPT = """You are an expert in both Python and AutoHotkey (AHK) who converts, reviews and debugs
+Python to AutoHotkey translations.
+
+General rules:
+- Keep the behaviour of the original Python code exactly, including output text, loop bounds and timing.
+- Follow AutoHotkey best practices for the requested version and never mix v1 and v2 syntax.
+- Explain non-obvious translations with short AutoHotkey comments (;) in generated code."""
+
+GAME_SYSTEM_PROMPT = """You are an expert in AutoHotkey game automation who writes complete, working,
+production-ready scripts with proper error handling, clear comments, efficient code and
+safety features such as pause and exit hotkeys."""
+
+CONVERT_INSTRUCTIONS = """Convert the Python code above to an AutoHotkey {target} (AHK) script.
+Make sure the conversion is accurate and follows AutoHotkey best practices.
+Include comments explaining the conversion where necessary.
+
+Provide ONLY the AutoHotkey code without any explanations or markdown formatting."""
+
+CHUNK_INSTRUCTIONS = """The module header above lists the imports, globals and signatures of a larger Python module.
+They are converted separately, so refer to them by name but do not redefine them.
+
+Convert this fragment of the module (lines {start_line}-{end_line}) to an AutoHotkey {target} (AHK) script:
+```python
+{source}
+```
+
+Provide ONLY the AutoHotkey code for this fragment without any explanations or markdown formatting."""
+
+VALIDATE_INSTRUCTIONS = """Review the conversion above and validate if it's correct.
+
+A local static analyzer has already checked syntax and structure (braces, strings, labels,
+hotkeys, v1/v2 mixing) and found no errors, so do not repeat those checks. Its warnings:
+{warnings}
+
+Please analyze:
+1. Is the conversion accurate?
+2. Does the AutoHotkey code preserve the functionality of the Python code?
+3. Are there semantic differences (types, string handling, loop bounds, timing)?
+4. Are there any potential runtime errors?
+
+Provide a clear assessment with specific feedback."""
+
+DEBUG_INSTRUCTIONS = """Debug the conversion above.
+
+{issue}
+
+Please:
+1. Identify the problem(s)
+2. Explain why it's occurring
+3. Provide the corrected AutoHotkey code
+4. Explain what was fixed"""
+
+DEBUG_PATCH_INSTRUCTIONS = """Debug the conversion above.
+
+{issue}
+
+Please:
+1. Identify the problem(s)
+2. Explain briefly why each occurs and what the fix changes
+3. Give the fix as ONE unified diff against the AutoHotkey code above, in a ```diff block
+
+Diff rules:
+- Use @@ -start,count +start,count @@ hunk headers with 1-based line numbers of the AutoHotkey code
+- Include up to 3 unchanged context lines around every change, copied exactly from the code
+- Change only the lines that need fixing; do not repeat the rest of the script
+- If nothing needs to change, say so and omit the diff"""
+
+GAME_INSTRUCTIONS = """Generate a complete, working AutoHotkey script for the following task:
+
+Game: {game_name}
+Task: {task_description}
+Script Type: {script_type}
+
+Create a production-ready AutoHotkey script that:
+1. Includes proper error handling
+2. Has clear comments explaining each section
+3. Uses efficient AutoHotkey coding practices
+4. Includes safety features (pause/exit hotkeys)
+5. Is ready to run without modifications
+
+Provide ONLY the AutoHotkey code without explanations or markdown formatting."""
+
+def system_blocks(text: str = SYSTEM_PROMPT) -> list:
+    """Stable system prompt, marked so it is cached together with the context that follows"""
+    return [{"type": "text", "text": text, "cache_control": CACHE_CONTROL}]
+
+def python_block(python_code: str) -> dict:
+    return {
+        "type": "text",
+        "text": f"Original Python code:\n```python\n{python_code}\n```",
+        "cache_control": CACHE_CONTROL,
+    }
+
+def ahk_block(ahk_code: str) -> dict:
+    return {
+        "type": "text",
+        "text": f"Converted AutoHotkey code:\n```ahk\n{ahk_code}\n```",
+        "cache_control": CACHE_CONTROL,
+    }
+
+def header_block(header: str) -> dict:
+    return {
+        "type": "text",
+        "text": f"Module header:\n```python\n{header}\n```",
+        "cache_control": CACHE_CONTROL,
+    }
+
+def instructions_block(text: str) -> dict:
+    return {"type": "text", "text": text}
@@ -0,0 +1,219 @@
+import os
+import re
+import io
+import json
+import shutil
+import hashlib
+import tarfile
+import zipfile
+import tempfile
+from datetime import datetime
+import database
+
+FORMATS = ("ndjson", "zip", "tar")
+FORMAT_EXTENSIONS = {"ndjson": ".ndjson", "zip": ".zip", "tar": ".tar.gz"}
+FORMAT_MIME_TYPES = {"ndjson": "application/x-ndjson", "zip": "application/zip", "tar": "application/gzip"}
+# zip and tar archives hold one .py/.ahk file per script plus this manifest of their metadata
+MANIFEST_NAME = "manifest.ndjson"
+# Largest code file accepted from an archive, so a malformed upload cannot exhaust memory
+MAX_ENTRY_BYTES = int(os.environ.get("ARCHIVE_MAX_ENTRY_BYTES", str(16 * 1024 * 1024)))
+
+def _sha256(code: str) -> str:
+    return hashlib.sha256(code.encode("utf-8")).hexdigest() if code else None
+
+def _metadata(script) -> dict:
+    return {
+        "name": script.name,
+        "description": script.description or "",
+        "script_type": script.script_type,
+        "created_at": script.created_at.isoformat() if script.created_at else None,
+        "python_sha256": _sha256(script.python_code),
+        "ahk_sha256": _sha256(script.ahk_code),
+    }
+
+def _entry_stem(script) -> str:
+    slug = re.sub(r"[^A-Za-z0-9_.-]+", "_", script.name).strip("_.")[:60] or "script"
+    return f"scripts/{script.id:06d}-{slug}"
+
+def _archive_entries(scripts, manifest):
+    """Yield (path, bytes) for each script's code files while writing its manifest line"""
+    for script in scripts:
+        record = _metadata(script)
+        stem = _entry_stem(script)
+        for code, extension, key in ((script.python_code, ".py", "python_file"), (script.ahk_code, ".ahk", "ahk_file")):
+            if code:
+                record[key] = stem + extension
+                yield record[key], code.encode("utf-8")
+        manifest.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+
+def export_scripts(fileobj, fmt: str = "ndjson", script_type: str = None,
+                   batch_size: int = database.EXPORT_BATCH_SIZE) -> int:
+    """Stream saved scripts (optionally one script_type) into a binary file object.
+
+    ndjson writes one JSON object per script with its code inline; zip and tar write
+    .py/.ahk files plus manifest.ndjson. Rows are read batch_size at a time and the
+    manifest is spooled to a temporary file, so memory use does not grow with the
+    library. Returns the number of scripts exported.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format '{fmt}'; use one of {', '.join(FORMATS)}")
+    scripts = database.iter_scripts(script_type, batch_size)
+    count = 0
+
+    def counted():
+        nonlocal count
+        for script in scripts:
+            count += 1
+            yield script
+
+    if fmt == "ndjson":
+        for script in counted():
+            record = _metadata(script)
+            record["python_code"] = script.python_code
+            record["ahk_code"] = script.ahk_code
+            fileobj.write((json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8"))
+        return count
+
+    with tempfile.TemporaryFile() as manifest:
+        if fmt == "zip":
+            with zipfile.ZipFile(fileobj, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                for path, data in _archive_entries(counted(), manifest):
+                    archive.writestr(path, data)
+                manifest.seek(0)
+                with archive.open(MANIFEST_NAME, "w") as entry:
+                    shutil.copyfileobj(manifest, entry)
+        else:
+            # "w|gz" writes a forward-only stream, so the output does not need to be seekable
+            with tarfile.open(fileobj=fileobj, mode="w|gz") as archive:
+                now = datetime.utcnow().timestamp()
+                for path, data in _archive_entries(counted(), manifest):
+                    info = tarfile.TarInfo(path)
+                    info.size = len(data)
+                    info.mtime = now
+                    archive.addfile(info, io.BytesIO(data))
+                info = tarfile.TarInfo(MANIFEST_NAME)
+                info.size = manifest.tell()
+                info.mtime = now
+                manifest.seek(0)
+                archive.addfile(info, manifest)
+    return count
+
+def detect_format(filename: str) -> str:
+    """Guess the archive format from a file name; anything unrecognised is read as NDJSON"""
+    lower = filename.lower()
+    if lower.endswith(".zip"):
+        return "zip"
+    if lower.endswith((".tar", ".tar.gz", ".tgz")):
+        return "tar"
+    return "ndjson"
+
+def _parse_record(raw, where: str) -> dict:
+    try:
+        record = json.loads(raw)
+    except ValueError:
+        raise ValueError(f"{where} is not valid JSON")
+    if not isinstance(record, dict):
+        raise ValueError(f"{where} is not a JSON object")
+    return record
+
+def _script_from_record(record: dict, python_code: str, ahk_code: str, where: str) -> dict:
+    if not record.get("name"):
+        raise ValueError(f"{where}: every script needs a name")
+    fields = {"python_code": python_code, "ahk_code": ahk_code, "description": record.get("description"),
+              "script_type": record.get("script_type"), "created_at": record.get("created_at")}
+    for key, value in fields.items():
+        if value is not None and not isinstance(value, str):
+            raise ValueError(f"{where}: {key} must be a string")
+    # Exports record a checksum of each code body; a mismatch means the file was damaged or edited
+    for key, code in (("python_sha256", python_code), ("ahk_sha256", ahk_code)):
+        if record.get(key) and record[key] != _sha256(code):
+            raise ValueError(f"{where}: the code does not match its {key}")
+    created_at = record.get("created_at")
+    try:
+        created_at = datetime.fromisoformat(created_at) if created_at else None
+    except ValueError:
+        raise ValueError(f"{where}: created_at is not an ISO date")
+    return {
+        "name": str(record["name"])[:255],
+        "description": record.get("description") or "",
+        "script_type": record.get("script_type") or "conversion",
+        "created_at": created_at,
+        "python_code": python_code or "",
+        "ahk_code": ahk_code or "",
+    }
+
+def _read_ndjson(fileobj):
+    for line_number, raw in enumerate(fileobj, 1):
+        if not raw.strip():
+            continue
+        where = f"Line {line_number}"
+        record = _parse_record(raw, where)
+        yield _script_from_record(record, record.get("python_code"), record.get("ahk_code"), where)
+
+def _read_manifest(manifest, read_entry):
+    for line_number, raw in enumerate(manifest, 1):
+        if not raw.strip():
+            continue
+        where = f"{MANIFEST_NAME} line {line_number}"
+        record = _parse_record(raw, where)
+        python_code = read_entry(record["python_file"]) if record.get("python_file") else ""
+        ahk_code = read_entry(record["ahk_file"]) if record.get("ahk_file") else ""
+        yield _script_from_record(record, python_code, ahk_code, where)
+
+def _read_zip(fileobj):
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        raise ValueError("The file is not a zip archive")
+    with archive:
+        def read_entry(path):
+            try:
+                info = archive.getinfo(path)
+            except KeyError:
+                raise ValueError(f"The archive is missing {path}")
+            if info.file_size > MAX_ENTRY_BYTES:
+                raise ValueError(f"{path} is larger than {MAX_ENTRY_BYTES:,} bytes")
+            return archive.read(info).decode("utf-8")
+
+        if MANIFEST_NAME not in archive.namelist():
+            raise ValueError(f"The archive has no {MANIFEST_NAME}")
+        with archive.open(MANIFEST_NAME) as manifest:
+            yield from _read_manifest(manifest, read_entry)
+
+def _read_tar(fileobj):
+    try:
+        archive = tarfile.open(fileobj=fileobj, mode="r:*")
+    except tarfile.TarError:
+        raise ValueError("The file is not a tar archive")
+    with archive, tempfile.TemporaryFile() as manifest:
+        members = {member.name: member for member in archive.getmembers()}
+
+        def read_entry(path):
+            member = members.get(path)
+            if member is None:
+                raise ValueError(f"The archive is missing {path}")
+            if not member.isfile() or member.size > MAX_ENTRY_BYTES:
+                raise ValueError(f"{path} is not a file of at most {MAX_ENTRY_BYTES:,} bytes")
+            return archive.extractfile(member).read().decode("utf-8")
+
+        if MANIFEST_NAME not in members:
+            raise ValueError(f"The archive has no {MANIFEST_NAME}")
+        # The manifest is the last member; copy it out so reading the code files in manifest
+        # order only seeks forward through a compressed tar instead of restarting it per script
+        shutil.copyfileobj(archive.extractfile(members[MANIFEST_NAME]), manifest)
+        manifest.seek(0)
+        yield from _read_manifest(manifest, read_entry)
+
+def read_scripts(fileobj, fmt: str = "ndjson"):
+    """Yield script dicts from a binary file object written by export_scripts"""
+    readers = {"ndjson": _read_ndjson, "zip": _read_zip, "tar": _read_tar}
+    if fmt not in readers:
+        raise ValueError(f"Unknown import format '{fmt}'; use one of {', '.join(FORMATS)}")
+    return readers[fmt](fileobj)
+
+def import_scripts(fileobj, fmt: str = "ndjson", chunk_size: int = database.IMPORT_CHUNK_SIZE, on_progress=None) -> dict:
+    """Import an export into the database in chunks, skipping scripts whose code is already saved.
+
+    Returns the read/imported/skipped summary from database.import_scripts.
+    """
+    return database.import_scripts(read_scripts(fileobj, fmt), chunk_size, on_progress)
@@ -0,0 +1,222 @@
+import os
+import re
+import random
+import threading
+from array import array
+import database
+
+# MinHash signature length and its split into LSH bands. 32 bands of 2 rows make a pair of
+# scripts a likely candidate from an estimated Jaccard similarity of about 0.2 upwards.
+NUM_HASHES = 64
+LSH_BANDS = 32
+LSH_ROWS = NUM_HASHES // LSH_BANDS
+# Matches scoring below this are not shown
+MIN_SIMILARITY = float(os.environ.get("SIMILARITY_MIN_SCORE", "0.25"))
+# Only the start of very long code is shingled, so one huge script cannot stall indexing
+MAX_CODE_TOKENS = 5000
+CODE_SHINGLE_SIZE = 4
+# Leading comment lines counted as part of a script's text
+COMMENT_LINES = 3
+
+TEXT = "text"
+CODE = "code"
+FIELDS = (TEXT, CODE)
+
+# Signatures use Python's per-process string hash, so they are only comparable within one process
+_MASK = (1 << 64) - 1
+_EMPTY = _MASK
+# Hash functions (a * x + b) mod _PRIME of the classic MinHash
+_PRIME = (1 << 61) - 1
+_random = random.Random(20240601)
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(_PRIME)) for _ in range(NUM_HASHES)]
+# Added per step when an empty one-permutation slot borrows from a filled neighbour
+_DENSIFY_OFFSET = (1 << 64) // NUM_HASHES
+
+_WORD = re.compile(r"[a-z]+|[0-9]+")
+_CAMEL = re.compile(r"([a-z])([A-Z])")
+_CODE_TOKEN = re.compile(r"[A-Za-z_]\w*|\d+|[^\s\w]")
+_STOPWORDS = frozenset("""a an and are as at be by every for from if in into is it its of on or
+so that the then this to when while with each should script""".split())
+
+def _stem(word: str) -> str:
+    for suffix in ("ing", "ed", "s"):
+        if word.endswith(suffix) and not word.endswith("ss") and len(word) > len(suffix) + 2:
+            return word[:-len(suffix)]
+    return word
+
+def text_features(text: str) -> set:
+    """Stemmed words of a description, name or comment, minus filler words.
+
+    Single words rather than phrases, so reworded requests for the same task still overlap.
+    """
+    return {_stem(word) for word in _WORD.findall(_CAMEL.sub(r"\1 \2", text or "").lower())
+            if word not in _STOPWORDS}
+
+def code_features(code: str) -> set:
+    """Overlapping runs of CODE_SHINGLE_SIZE code tokens"""
+    tokens = _CODE_TOKEN.findall(code or "")[:MAX_CODE_TOKENS]
+    if len(tokens) < CODE_SHINGLE_SIZE:
+        return {" ".join(tokens)} if tokens else set()
+    return {" ".join(tokens[i:i + CODE_SHINGLE_SIZE]) for i in range(len(tokens) - CODE_SHINGLE_SIZE + 1)}
+
+def _leading_comments(python_code: str, ahk_code: str) -> str:
+    # Generated scripts open with comments describing their task, which is what a new request resembles;
+    # later comments describe implementation details and would only dilute the match
+    lines = [line.strip()[1:] for line in (python_code or "").splitlines() if line.strip().startswith("#")]
+    lines += [line.strip()[1:] for line in (ahk_code or "").splitlines() if line.strip().startswith(";")]
+    return "\n".join(lines[:COMMENT_LINES])
+
+def minhash(features: set):
+    """Classic MinHash: the smallest value of each of NUM_HASHES hash functions, or None if empty.
+
+    Used for text, whose feature sets are small enough to hash NUM_HASHES times each.
+    """
+    if not features:
+        return None
+    values = [hash(feature) & _MASK for feature in features]
+    return array("Q", (min((a * value + b) % _PRIME for value in values) for a, b in _PERMUTATIONS))
+
+def one_permutation_minhash(features: set):
+    """One-permutation MinHash: each feature is hashed once and lands in one of NUM_HASHES slots.
+
+    Used for code, where hashing thousands of shingles NUM_HASHES times would be too slow.
+    Each slot keeps its smallest value; empty slots borrow from the next filled slot to the
+    right (rotation densification). Returns None for an empty set.
+    """
+    if not features:
+        return None
+    slots = [_EMPTY] * NUM_HASHES
+    for feature in features:
+        value = hash(feature) & _MASK
+        slot = value % NUM_HASHES
+        value //= NUM_HASHES
+        if value < slots[slot]:
+            slots[slot] = value
+    if _EMPTY in slots:
+        filled = list(slots)
+        for slot in range(NUM_HASHES):
+            if filled[slot] == _EMPTY:
+                distance = 1
+                while filled[(slot + distance) % NUM_HASHES] == _EMPTY:
+                    distance += 1
+                slots[slot] = filled[(slot + distance) % NUM_HASHES] + distance * _DENSIFY_OFFSET
+    return array("Q", slots)
+
+def text_signature(text: str):
+    return minhash(text_features(text))
+
+def code_signature(code: str):
+    return one_permutation_minhash(code_features(code))
+
+def similarity(a, b) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_HASHES
+
+class SimilarityIndex:
+    """In-memory MinHash/LSH index over saved scripts' text (name, description, comments) and code.
+
+    It is filled from the database on the first lookup and then kept current through
+    database.add_script_listener, so saves, updates and deletes are applied one script at
+    a time and the index is never rebuilt on a Streamlit rerun.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._signatures = {field: {} for field in FIELDS}
+        self._buckets = {field: [{} for _ in range(LSH_BANDS)] for field in FIELDS}
+        self._loaded = False
+
+    def __len__(self):
+        with self._lock:
+            return len(self._signatures[TEXT].keys() | self._signatures[CODE].keys())
+
+    def _bands(self, sig):
+        for band in range(LSH_BANDS):
+            yield band, sig[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()
+
+    def _remove(self, script_id: int):
+        for field in FIELDS:
+            sig = self._signatures[field].pop(script_id, None)
+            if sig is None:
+                continue
+            for band, key in self._bands(sig):
+                bucket = self._buckets[field][band].get(key)
+                if bucket is not None:
+                    bucket.discard(script_id)
+                    if not bucket:
+                        del self._buckets[field][band][key]
+
+    def _add(self, script_id: int, name: str, description: str, python_code: str, ahk_code: str):
+        self._remove(script_id)
+        sigs = {
+            TEXT: text_signature(" ".join([name or "", description or "", _leading_comments(python_code, ahk_code)])),
+            CODE: code_signature(python_code or ahk_code),
+        }
+        for field, sig in sigs.items():
+            if sig is None:
+                continue
+            self._signatures[field][script_id] = sig
+            for band, key in self._bands(sig):
+                self._buckets[field][band].setdefault(key, set()).add(script_id)
+
+    def apply_changes(self, documents, removed_ids):
+        """Listener for database.add_script_listener"""
+        with self._lock:
+            for script_id in removed_ids:
+                self._remove(script_id)
+            for document in documents:
+                self._add(*document)
+
+    def ensure_loaded(self):
+        """Index every saved script once per process"""
+        if self._loaded or not database.is_database_available():
+            return
+        with self._lock:
+            if self._loaded:
+                return
+            # Subscribe first so nothing committed during the load is missed. Changes committed
+            # meanwhile wait on the lock and are applied after the load, so they win over older rows.
+            database.add_script_listener(self.apply_changes)
+            database.init_db()
+            for script in database.iter_scripts():
+                self._add(script.id, script.name, script.description, script.python_code, script.ahk_code)
+            self._loaded = True
+
+    def query(self, text: str = "", code: str = "", limit: int = 5, min_score: float = MIN_SIMILARITY) -> list:
+        """Return up to limit (script_id, score) pairs, best first.
+
+        With both text and code the score is the mean of the two similarities.
+        """
+        self.ensure_loaded()
+        wanted = {field: sig for field, sig in ((TEXT, text_signature(text)), (CODE, code_signature(code)))
+                  if sig is not None}
+        if not wanted:
+            return []
+        with self._lock:
+            candidates = set()
+            for field, sig in wanted.items():
+                for band, key in self._bands(sig):
+                    candidates |= self._buckets[field][band].get(key, set())
+            scored = []
+            for script_id in candidates:
+                score = sum(similarity(sig, self._signatures[field][script_id])
+                            if script_id in self._signatures[field] else 0.0
+                            for field, sig in wanted.items()) / len(wanted)
+                if score >= min_score:
+                    scored.append((script_id, score))
+        scored.sort(key=lambda pair: (-pair[1], -pair[0]))
+        return scored[:limit]
+
+index = SimilarityIndex()
+
+def find_similar_scripts(text: str = "", code: str = "", script_type: str = None, limit: int = 3,
+                         min_score: float = MIN_SIMILARITY) -> list:
+    """Return up to limit (script, score) pairs of saved scripts resembling the given text and/or code.
+
+    Each script is a metadata row without code bodies; load the code of the one picked with
+    database.get_script_by_id.
+    """
+    # A few spare candidates in case some are of another script_type or were just deleted
+    ranked = index.query(text, code, limit * 4 if script_type else limit, min_score)
+    scripts = database.get_script_summaries([script_id for script_id, _ in ranked], script_type)
+    return [(scripts[script_id], score) for script_id, score in ranked if script_id in scripts][:limit]
@@ -0,0 +1,120 @@
+import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import llm_scheduler
+from converter import validate_ahk_code, debug_ahk_code, run_validation, run_debug, run_debug_patch, DebugPatch
+
+# Shared by every session; speculative work is cheap to drop, so keep the pool small
+SPECULATIVE_WORKERS = int(os.environ.get("SPECULATIVE_WORKERS", "2"))
+
+_executor = ThreadPoolExecutor(max_workers=SPECULATIVE_WORKERS, thread_name_prefix="speculative")
+
+def _fingerprint(python_code: str, ahk_code: str) -> str:
+    digest = hashlib.sha256()
+    for part in (python_code, ahk_code):
+        data = part.encode("utf-8")
+        digest.update(len(data).to_bytes(8, "big"))
+        digest.update(data)
+    return digest.hexdigest()
+
+@dataclass
+class SpeculativeRun:
+    """Validation (and optionally debugging) started in the background right after a conversion"""
+    fingerprint: str
+    validation: object
+    debug: object = None
+    discarded: bool = field(default=False)
+    # Scheduler groups of the background requests, promoted when the user waits on them
+    validation_group: object = None
+    debug_group: object = None
+
+    def matches(self, python_code: str, ahk_code: str) -> bool:
+        return not self.discarded and self.fingerprint == _fingerprint(python_code, ahk_code)
+
+    def validation_result(self, python_code: str, ahk_code: str):
+        """Return the speculative validation for this exact code, or None if it is stale, failed or not started"""
+        return self._result(self.validation, self.validation_group, python_code, ahk_code)
+
+    def debug_result(self, python_code: str, ahk_code: str):
+        """Return the speculative debug pass for this exact code, or None if there is none"""
+        return self._result(self.debug, self.debug_group, python_code, ahk_code)
+
+    def validation_ready(self, python_code: str, ahk_code: str) -> bool:
+        """Return True when a matching validation has already finished successfully"""
+        return (self.matches(python_code, ahk_code) and self.validation.done() and not self.validation.cancelled()
+                and self.validation.exception() is None)
+
+    def _result(self, future, group, python_code: str, ahk_code: str):
+        if future is None or not self.matches(python_code, ahk_code):
+            return None
+        # The user is now waiting. Work still queued in the pool is dropped so the caller makes
+        # the request itself at interactive priority; work already running has its requests
+        # moved to the interactive lane so it no longer waits behind batch and speculative calls.
+        if not future.done() and not future.cancel() and group is not None:
+            llm_scheduler.scheduler.promote(group, llm_scheduler.INTERACTIVE)
+        if future.cancelled():
+            return None
+        try:
+            return future.result()
+        except Exception:
+            # Background passes use the raising variants, so a failed call is retried by the caller
+            # rather than served as an instant "Error during ..." result
+            return None
+
+    def cancel(self):
+        """Cancel work that has not started yet and ignore whatever is already running"""
+        self.discarded = True
+        for future in (self.validation, self.debug):
+            if future is not None:
+                future.cancel()
+
+def start(python_code: str, ahk_code: str, include_debug: bool = False, debug_patch: bool = False) -> SpeculativeRun:
+    """Submit validation (and optionally debugging, as a patch or full code) of a fresh conversion to the background pool"""
+    # Runs in the speculative lane until a click on Validate or Debug waits on it and promotes it
+    validation_group = llm_scheduler.RequestGroup(llm_scheduler.SPECULATIVE)
+    validation = _executor.submit(llm_scheduler.run_in_group, validation_group, run_validation, python_code, ahk_code,
+                                  priority=llm_scheduler.SPECULATIVE)
+    debug = debug_group = None
+    if include_debug:
+        debug_group = llm_scheduler.RequestGroup(llm_scheduler.SPECULATIVE)
+        debug = _executor.submit(llm_scheduler.run_in_group, debug_group, run_debug_patch if debug_patch else run_debug,
+                                 python_code, ahk_code, priority=llm_scheduler.SPECULATIVE)
+    return SpeculativeRun(_fingerprint(python_code, ahk_code), validation, debug,
+                          validation_group=validation_group, debug_group=debug_group)
+
+def validate(python_code: str, ahk_code: str, run: SpeculativeRun = None, on_text=None) -> str:
+    """Validate a conversion, reusing a matching speculative run when there is one"""
+    result = run.validation_result(python_code, ahk_code) if run is not None else None
+    if result is not None:
+        return result
+    if on_text is None:
+        return validate_ahk_code(python_code, ahk_code)
+
+    # Show the local analysis first, then the streamed AI review below it
+    report = ""
+    def on_report(text):
+        nonlocal report
+        report = text
+        on_text(report)
+    return validate_ahk_code(python_code, ahk_code, on_text=lambda text: on_text(report + "\n\n" + text),
+                             on_report=on_report)
+
+def debug(python_code: str, ahk_code: str, issue_description: str = "", run: SpeculativeRun = None, on_text=None,
+          patch: bool = False):
+    """Debug a conversion, reusing a matching speculative pass when no issue was described.
+
+    With patch=True the result is a DebugPatch from run_debug_patch, otherwise the full review text.
+    """
+    result = None
+    # The speculative pass was run without an issue description
+    if run is not None and not issue_description:
+        result = run.debug_result(python_code, ahk_code)
+        if isinstance(result, DebugPatch) != patch:
+            result = None
+    if result is None:
+        if patch:
+            result = run_debug_patch(python_code, ahk_code, issue_description, on_text=on_text)
+        else:
+            result = debug_ahk_code(python_code, ahk_code, issue_description, on_text=on_text)
+    return result
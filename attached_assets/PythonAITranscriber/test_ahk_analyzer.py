@@ -0,0 +1,55 @@
+import pytest
+import ahk_analyzer
+
+V2 = "#Requires AutoHotkey v2.0\n"
+
+def codes(code: str, version: str = None) -> list:
+    return [(d.line, d.code) for d in ahk_analyzer.analyze(code, version).diagnostics]
+
+def test_clean_v2_script_has_no_diagnostics():
+    code = V2 + 'Greet(name) {\n    MsgBox("Hi " name)\n}\nF1::Greet("you")\n'
+    result = ahk_analyzer.analyze(code)
+    assert (result.version, result.line_count, result.diagnostics) == ("v2", 5, [])
+    assert "No structural problems" in ahk_analyzer.format_report(result)
+
+@pytest.mark.parametrize("code, expected", [
+    (V2 + "x := 1\n}\n", [(3, "E001")]),
+    (V2 + "Loop 3 {\n    Sleep(10)\n", [(2, "E002")]),
+    (V2 + "x := (1 + 2\n", [(2, "E003")]),
+    (V2 + "y := [1, 2)]\n", [(2, "E003")]),
+    (V2 + 'x := "unfinished\n', [(2, "E004")]),
+    (V2 + "F1::Sleep(1)\nF1::Sleep(2)\n", [(3, "E006")]),
+    (V2 + "Start:\nx := 1\nStart:\n", [(4, "E007")]),
+    (V2 + "Run() {\n}\nrun() {\n}\n", [(4, "E008")]),
+    (V2 + "/* never closed\nx := 1\n", [(2, "E009")]),
+])
+def test_structural_errors(code, expected):
+    assert codes(code) == expected
+
+def test_undefined_labels_in_v1():
+    code = "#Requires AutoHotkey v1.1\nGosub, Missing\nSetTimer, Tick, 100\nSetTimer, Found, 100\nFound:\nreturn\n"
+    assert codes(code) == [(2, "E005"), (3, "E005")]
+
+def test_undefined_goto_in_v2():
+    assert codes(V2 + 'Goto("Nowhere")\n') == [(2, "E005")]
+
+def test_same_hotkey_under_different_contexts_is_allowed():
+    code = V2 + '#HotIf WinActive("A")\nF1::Sleep(1)\n#HotIf\nF1::Sleep(2)\n'
+    assert codes(code) == []
+
+def test_v1_syntax_in_declared_v2_script_warns():
+    code = V2 + "MsgBox, hello\nSleep(10)\n"
+    assert codes(code) == [(2, "W102")]
+
+def test_v2_syntax_in_declared_v1_script_warns():
+    code = "#Requires AutoHotkey v1.1\nSleep, 10\nMsgBox(\"hi\")\n"
+    assert codes(code) == [(3, "W102")]
+
+def test_undeclared_mixed_script_warns_once():
+    code = "MsgBox, hello\nSleep(10)\nx := 1\n"
+    assert codes(code) == [(1, "W101")]
+
+def test_version_is_detected_from_syntax():
+    assert ahk_analyzer.detect_version(["MsgBox, hi", "Sleep, 10"]) == "1"
+    assert ahk_analyzer.detect_version(['MsgBox("hi")']) == "2"
+    assert ahk_analyzer.detect_version(["#Requires AutoHotkey v1.1", 'MsgBox("hi")']) == "1"
@@ -0,0 +1,39 @@
+import pytest
+import ahk_patch
+
+CODE = "a := 1\nb := 2\nc := 3\nd := 4\n"
+
+def test_patch_applies_by_context_even_with_wrong_line_numbers():
+    diff = "@@ -10,3 +10,3 @@\n b := 2\n-c := 3\n+c := 30\n d := 4\n"
+    assert ahk_patch.apply_patch(CODE, diff) == "a := 1\nb := 2\nc := 30\nd := 4\n"
+
+def test_several_hunks_apply_in_order():
+    diff = "--- a/x.ahk\n+++ b/x.ahk\n@@ -1 +1,2 @@\n a := 1\n+a2 := 1\n@@ -4 +5 @@\n-d := 4\n+d := 40\n"
+    assert ahk_patch.apply_patch(CODE, diff) == "a := 1\na2 := 1\nb := 2\nc := 3\nd := 40\n"
+
+def test_indentation_differences_are_tolerated():
+    code = "Loop 3 {\n    Sleep(10)\n}\n"
+    diff = "@@ -2 +2 @@\n-Sleep(10)\n+    Sleep(20)\n"
+    assert ahk_patch.apply_patch(code, diff) == "Loop 3 {\n    Sleep(20)\n}\n"
+
+def test_context_that_does_not_match_raises():
+    with pytest.raises(ahk_patch.PatchError, match="near line 2"):
+        ahk_patch.apply_patch(CODE, "@@ -2 +2 @@\n-b := 5\n+b := 6\n")
+
+def test_text_without_hunks_raises():
+    with pytest.raises(ahk_patch.PatchError):
+        ahk_patch.parse_unified_diff("no changes needed")
+
+def test_diff_is_extracted_from_a_response():
+    response = "The loop is off by one.\n\n```diff\n@@ -1 +1 @@\n-a := 1\n+a := 0\n```\nThat's all."
+    diff = ahk_patch.extract_diff(response)
+    assert diff.startswith("@@ -1 +1 @@")
+    assert ahk_patch.strip_diff(response).split() == "The loop is off by one. That's all.".split()
+    assert ahk_patch.extract_diff("Fix:\n@@ -1 +1 @@\n-a := 1\n+a := 0\nDone.") == "@@ -1 +1 @@\n-a := 1\n+a := 0\n"
+    assert ahk_patch.extract_diff("Nothing to change.") is None
+
+def test_strip_diff_removes_an_unfenced_diff():
+    response = "The loop is off by one.\n--- a/script.ahk\n+++ b/script.ahk\n@@ -1 +1 @@\n-a := 1\n+a := 0\n"
+    assert ahk_patch.strip_diff(response) == "The loop is off by one."
+    assert ahk_patch.strip_diff("Before.\n@@ -1 +1 @@\n-a\n+b\nAfter.") == "Before.\nAfter."
+    assert ahk_patch.strip_diff("No changes.\n---\nThanks") == "No changes.\n---\nThanks"
@@ -0,0 +1,35 @@
+import pytest
+import async_database
+import database
+
+pytest.importorskip("aiosqlite")
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Both data paths pointed at a fresh SQLite file for one test"""
+    monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{tmp_path / 'scripts.db'}")
+    monkeypatch.setattr(database, "engine", None)
+    monkeypatch.setattr(database, "SessionLocal", None)
+    monkeypatch.setattr(database, "_initialized", False)
+    async_database.run(async_database.init_db())
+    yield async_database
+    async_database.run(async_database.dispose())
+    database.engine.dispose()
+
+def test_async_url_uses_async_drivers():
+    assert async_database.async_database_url("sqlite:///x.db") == "sqlite+aiosqlite:///x.db"
+    assert async_database.async_database_url("postgresql://u:p@h/db?sslmode=require") == \
+        "postgresql+asyncpg://u:p@h/db?ssl=require"
+
+def test_store_script_saves_then_updates(db):
+    assert db.is_available()
+    saved = db.store_script("alpha", "x = 1", "x := 1", "first")
+    assert db.async_engine is not None
+    updated = db.store_script(None, "x = 2", "x := 2", script_id=saved.id, expected_version=saved.version)
+    assert (updated.name, updated.version) == ("alpha", saved.version + 1)
+    with pytest.raises(database.ConcurrentUpdateError):
+        db.store_script("beta", "x = 3", "x := 3", script_id=saved.id, expected_version=saved.version)
+    assert database.get_script_by_id(saved.id).python_code == "x = 2"
+    assert [script.id for script in db.run(db.get_all_scripts())] == [saved.id]
+    assert db.run(db.delete_script(saved.id))
+    assert db.store_script("gone", "", "", script_id=saved.id) is None
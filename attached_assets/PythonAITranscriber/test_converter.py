@@ -0,0 +1,118 @@
+import pytest
+import chunked_converter
+import converter
+
+LOCAL_FUNCTION = '''def step_{n}(value):
+    total = value * 2
+    print(total)
+    return total
+'''
+# Classes are outside the transpiler's subset, so these must go to Claude
+REMOTE_CLASS = '''class Counter{n}:
+    def __init__(self):
+        self.value = {n}
+'''
+
+def module(units: int) -> str:
+    return "\n".join((REMOTE_CLASS if n % 2 else LOCAL_FUNCTION).format(n=n) for n in range(units))
+
+@pytest.fixture
+def claude(monkeypatch):
+    """Record whole-file and chunk requests instead of calling Claude"""
+    calls = []
+
+    def ask_claude(operation, content, *cache_inputs, **kwargs):
+        calls.append(("convert", cache_inputs[0]))
+        return "; converted by Claude"
+
+    def convert_python_unit(unit, header, target=converter.DEFAULT_TARGET, priority=None):
+        calls.append(("convert_chunk", unit.source))
+        return f"; chunk {unit.start_line}-{unit.end_line}"
+
+    monkeypatch.setattr(converter, "ask_claude", ask_claude)
+    monkeypatch.setattr(converter, "convert_python_unit", convert_python_unit)
+    return calls
+
+def test_fully_supported_code_makes_no_requests(claude):
+    code = converter.run_conversion(LOCAL_FUNCTION.format(n=1))
+    assert "step_1(value) {" in code
+    assert claude == []
+
+def test_small_file_with_unsupported_parts_is_one_request(claude):
+    source = module(6)
+    assert not chunked_converter.should_chunk(source)
+    assert converter.run_conversion(source) == "; converted by Claude"
+    assert claude == [("convert", source)]
+
+def test_large_file_sends_merged_chunks_not_one_request_per_definition(claude):
+    source = module(120)
+    assert chunked_converter.should_chunk(source)
+    merged = chunked_converter.merge_small_units(chunked_converter.split_source(source))
+    converter.run_conversion(source)
+    assert 0 < len(claude) <= len(merged) < 60
+    assert all(operation == "convert_chunk" for operation, _ in claude)
+
+def test_chunks_the_transpiler_handles_are_not_sent(claude):
+    local_part = "\n".join(LOCAL_FUNCTION.format(n=n) for n in range(100))
+    source = local_part + "\n" + REMOTE_CLASS.format(n=999)
+    code = converter.run_conversion(source)
+    assert len(claude) == 1
+    assert "Counter999" in claude[0][1]
+    assert "step_0(value) {" in code
+    assert code.rstrip().splitlines()[-1].startswith("; chunk ")
+
+def test_failed_chunk_raises(monkeypatch, claude):
+    def fail(unit, header, target=converter.DEFAULT_TARGET, priority=None):
+        raise RuntimeError("API down")
+    monkeypatch.setattr(converter, "convert_python_unit", fail)
+    with pytest.raises(chunked_converter.ChunkConversionError, match="API down"):
+        converter.run_conversion(module(120))
+
+def test_convert_python_to_ahk_reports_failures_as_text(monkeypatch, claude):
+    def fail(*args, **kwargs):
+        raise RuntimeError("API down")
+    monkeypatch.setattr(converter, "ask_claude", fail)
+    assert converter.convert_python_to_ahk(module(4)).startswith("Error during conversion: API down")
+
+def test_first_incremental_conversion_of_a_small_file_is_one_request(claude):
+    source = module(6)
+    first = converter.run_incremental_conversion(source)
+    assert claude == [("convert", source)]
+    again = converter.run_incremental_conversion("# tidied\n" + source, first.fragments)
+    assert (again.code, again.reused, len(claude)) == (first.code, 1, 1)
+
+def test_incremental_conversion_only_sends_changed_chunks(claude):
+    source = module(120)
+    first = converter.run_incremental_conversion(source)
+    assert len(claude) == len(chunked_converter.merge_small_units(chunked_converter.split_source(source)))
+    claude.clear()
+    edited = source.replace("self.value = 61\n", "self.value = 16\n")
+    second = converter.run_incremental_conversion(edited, first.fragments)
+    assert len(claude) == 1 and "self.value = 16" in claude[0][1]
+    assert second.reused == second.units - 1
+
+def test_changed_signature_reconverts_the_chunks_that_use_it(claude):
+    user = "class User:\n    def run(self):\n        return helper(1)\n"
+    source = "def helper(a):\n    return a\n\n" + module(120) + "\n" + user
+    first = converter.run_incremental_conversion(source)
+    claude.clear()
+    converter.run_incremental_conversion(source.replace("def helper(a):", "def helper(a, b):"), first.fragments)
+    changed = [unit_source for _, unit_source in claude]
+    assert len(changed) == 2
+    assert any("def helper(a, b):" in unit_source for unit_source in changed)
+    assert any(user in unit_source for unit_source in changed)
+
+def test_chunk_requests_are_keyed_on_their_own_context(monkeypatch):
+    headers = {}
+
+    def ask_claude(operation, content, source, header, *cache_inputs, **kwargs):
+        headers[source] = header
+        return "; chunk"
+
+    monkeypatch.setattr(converter, "ask_claude", ask_claude)
+    source = "import os\n" + module(120)
+    units = chunked_converter.merge_small_units(chunked_converter.split_source(source))
+    converter.run_conversion(source)
+    expected = dict(zip((unit.source for unit in units), chunked_converter.unit_contexts(source, units)))
+    assert headers and all(header == expected[unit_source] for unit_source, header in headers.items())
+    assert all(header.startswith("import os") for header in headers.values())
@@ -0,0 +1,126 @@
+import pytest
+from sqlalchemy import inspect, text
+import database
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """database pointed at a fresh SQLite file for one test"""
+    monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{tmp_path / 'scripts.db'}")
+    monkeypatch.setattr(database, "engine", None)
+    monkeypatch.setattr(database, "SessionLocal", None)
+    monkeypatch.setattr(database, "_initialized", False)
+    database.init_db()
+    yield database
+    database.engine.dispose()
+
+def found(db, query):
+    return [row.id for row in db.search_scripts(query)[0]]
+
+def test_search_follows_updates_and_deletes(db):
+    first = db.save_script("alpha", "print('hello')", "MsgBox hello", "first")
+    second = db.save_script("beta", "x = 1", "x := 1", "second")
+    assert found(db, "alpha") == [first.id]
+
+    db.update_script(first.id, name="gamma", python_code="print('world')")
+    assert found(db, "alpha") == []
+    assert found(db, "world") == [first.id]
+    db.bulk_update([{"id": second.id, "name": "delta"}])
+    assert found(db, "beta") == []
+    assert found(db, "delta") == [second.id]
+
+    db.delete_script(first.id)
+    db.bulk_delete_scripts([second.id])
+    assert found(db, "world") == []
+    assert found(db, "delta") == []
+
+def test_search_index_holds_no_copy_of_the_code(db):
+    db.save_script("alpha", "print('hello')", "MsgBox hello")
+    with db.session_scope() as session:
+        assert session.execute(text("SELECT python_code FROM saved_scripts_fts")).scalar() is None
+        assert found(db, "hello")
+
+def test_old_search_index_is_rebuilt_without_content(db):
+    script = db.save_script("alpha", "print('hello')", "MsgBox hello")
+    with db.session_scope() as session:
+        session.execute(text("DROP TABLE saved_scripts_fts"))
+        session.execute(text("CREATE VIRTUAL TABLE saved_scripts_fts USING fts5(name, description, python_code, ahk_code)"))
+    db.init_db(force=True)
+    with db.session_scope() as session:
+        sql = session.execute(text("SELECT sql FROM sqlite_master WHERE name = 'saved_scripts_fts'")).scalar()
+    assert "content=''" in sql
+    assert found(db, "alpha") == [script.id]
+
+def test_code_zlib_cannot_shrink_is_stored_raw(db):
+    tiny = db.save_script("tiny", "x=1", "")
+    large = db.save_script("large", "print('hello')\n" * 200, "")
+    with db.session_scope() as session:
+        stored = dict(session.execute(text("SELECT size_bytes, compression FROM code_blobs")).all())
+    assert stored == {3: "none", 3000: "zlib"}
+    assert db.get_script_by_id(tiny.id).python_code == "x=1"
+    assert db.get_script_by_id(large.id).python_code == "print('hello')\n" * 200
+
+def test_blob_migration_keeps_updated_at(db):
+    with db.session_scope() as session:
+        session.execute(text(
+            "INSERT INTO saved_scripts (name, description, python_code, ahk_code, script_type, created_at, updated_at, version)"
+            " VALUES ('old', '', 'print(1)', 'MsgBox 1', 'conversion', '2020-01-01 00:00:00', '2020-01-02 00:00:00', 3)"
+        ))
+    assert db.migrate_code_blobs() == 1
+    with db.session_scope() as session:
+        row = session.execute(text("SELECT python_code, updated_at, version FROM saved_scripts")).one()
+    assert row.python_code == ""
+    assert str(row.updated_at).startswith("2020-01-02 00:00:00")
+    assert row.version == 3
+    script = db.get_all_scripts()[0]
+    assert (script.python_code, script.ahk_code) == ("print(1)", "MsgBox 1")
+
+@pytest.mark.parametrize("sane_rowcount", [True, False])
+def test_bulk_update_rejects_deleted_and_changed_scripts(db, monkeypatch, sane_rowcount):
+    monkeypatch.setattr(db.get_engine().dialect, "supports_sane_multi_rowcount", sane_rowcount)
+    kept = db.save_script("kept", "x = 1", "x := 1")
+    gone = db.save_script("gone", "y = 2", "y := 2")
+    db.delete_script(gone.id)
+    with pytest.raises(db.ConcurrentUpdateError):
+        db.bulk_update([{"id": kept.id, "version": 1, "name": "renamed"},
+                        {"id": gone.id, "version": 1, "name": "renamed"}])
+    db.update_script(kept.id, name="edited")
+    with pytest.raises(db.ConcurrentUpdateError):
+        db.bulk_update([{"id": kept.id, "version": 1, "name": "renamed"}])
+    assert db.get_script_by_id(kept.id).name == "edited"
+    assert db.bulk_update([{"id": kept.id, "version": 2, "name": "renamed"}, {"id": gone.id, "name": "renamed"}]) == 1
+    assert db.get_script_by_id(kept.id).name == "renamed"
+
+def test_old_table_gets_hash_columns_and_indexes(tmp_path, monkeypatch):
+    monkeypatch.setattr(database, "DATABASE_URL", f"sqlite:///{tmp_path / 'old.db'}")
+    monkeypatch.setattr(database, "engine", None)
+    monkeypatch.setattr(database, "SessionLocal", None)
+    monkeypatch.setattr(database, "_initialized", False)
+    with database.get_engine().begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE saved_scripts (id INTEGER PRIMARY KEY, name VARCHAR(255) NOT NULL, description TEXT,"
+            " python_code TEXT NOT NULL, ahk_code TEXT NOT NULL, script_type VARCHAR(50),"
+            " created_at DATETIME, updated_at DATETIME)"
+        ))
+    try:
+        database.init_db()
+        indexes = {index["name"] for index in inspect(database.engine).get_indexes("saved_scripts")}
+        assert {"ix_saved_scripts_python_hash", "ix_saved_scripts_ahk_hash"} <= indexes
+    finally:
+        database.engine.dispose()
+
+def test_blob_insert_skips_blobs_stored_concurrently(db):
+    with db.session_scope() as session:
+        stored = db._store_blob(session, "print('shared')")
+        rows = [{"hash": db._blob_hash(code), "compression": "none", "data": code.encode(),
+                 "size_bytes": len(code), "stored_bytes": len(code)} for code in ("print('shared')", "print('new')")]
+        # As if another save stored the first blob after this one looked for it
+        session.execute(db._insert_blobs_statement(session), rows)
+        assert session.execute(text("SELECT COUNT(*) FROM code_blobs")).scalar() == 2
+        assert db._attach_code(session, [db.SavedScript(python_code_hash=stored)])[0].python_code == "print('shared')"
+
+def test_script_summaries_skip_missing_and_other_types(db):
+    game = db.save_script("game", "", "Click", script_type="game_helper")
+    other = db.save_script("other", "x = 1", "x := 1")
+    summaries = db.get_script_summaries([game.id, other.id, 999], "game_helper")
+    assert list(summaries) == [game.id]
+    assert not hasattr(summaries[game.id], "ahk_code")
@@ -0,0 +1,17 @@
+import llm_cache
+
+def test_memory_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(llm_cache.time, "time", lambda: now[0])
+    cache = llm_cache.ResponseCache(ttl_seconds=60)
+    cache.put("key", "convert", "model", "answer")
+    now[0] += 59
+    assert cache.get("key") == "answer"
+    now[0] += 2
+    assert cache.get("key") is None
+    assert cache.stats()["memory_entries"] == 0
+
+def test_memory_entries_keep_their_database_age():
+    cache = llm_cache.ResponseCache(ttl_seconds=60)
+    cache._remember("key", "answer", stored_at=llm_cache.time.time() - 120)
+    assert cache.get("key") is None
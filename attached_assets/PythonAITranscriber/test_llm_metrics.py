@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+import llm_metrics
+
+def call(operation="convert", outcome=llm_metrics.OK, wall_ms=100, **tokens):
+    return llm_metrics.CallRecord(operation=operation, model="m", lane="interactive", outcome=outcome,
+                                  wall_ms=wall_ms, **tokens)
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 11))
+    assert llm_metrics.percentile(values, 0.50) == 5
+    assert llm_metrics.percentile(values, 0.95) == 10
+    assert llm_metrics.percentile(values, 0.10) == 1
+    assert llm_metrics.percentile(values, 0.0) == 1
+    assert llm_metrics.percentile([7], 0.99) == 7
+    assert llm_metrics.percentile([], 0.5) is None
+
+def test_summarize_groups_by_operation_in_display_order():
+    records = [call("validate", wall_ms=50), call(wall_ms=200, output_tokens=30),
+               call(wall_ms=100, output_tokens=10), call(outcome=llm_metrics.ERROR, wall_ms=5),
+               call(outcome=llm_metrics.TRUNCATED, wall_ms=300)]
+    summary = llm_metrics.summarize(records)
+    assert list(summary) == ["convert", "validate"]
+    convert = summary["convert"]
+    assert (convert["calls"], convert["errors"], convert["output_tokens"]) == (4, 1, 40)
+    assert convert["truncation_rate"] == 1 / 3
+    assert (convert["p50_ms"], convert["p99_ms"]) == (100, 300)
+    assert convert["ttft_p50_ms"] is None
+
+def test_prometheus_text_reports_each_operation():
+    text = llm_metrics.prometheus_text([call(wall_ms=1500, input_tokens=12)])
+    assert 'ahk_llm_call_duration_seconds{operation="convert",quantile="0.5"} 1.500' in text
+    assert 'ahk_llm_tokens{operation="convert",kind="input"} 12' in text
+    assert 'ahk_llm_calls{operation="convert",outcome="ok"} 1' in text
+
+def test_usage_totals_count_answered_calls(monkeypatch):
+    monkeypatch.setattr(llm_metrics.database, "is_database_available", lambda: False)
+    recorder = llm_metrics.MetricsRecorder(window=1)
+    monkeypatch.setattr(llm_metrics, "recorder", recorder)
+    for outcome in (llm_metrics.OK, llm_metrics.TRUNCATED, llm_metrics.ERROR):
+        timer = llm_metrics.CallTimer("convert", "m")
+        timer.finish(outcome, SimpleNamespace(input_tokens=10, output_tokens=5, cache_read_input_tokens=2))
+    usage = recorder.usage()
+    assert (usage["requests"], usage["input_tokens"], usage["cache_read_input_tokens"]) == (2, 20, 4)
+    assert usage["by_operation"]["convert"]["output_tokens"] == 10
+    # The totals outlive the window of recent calls
+    assert len(recorder.recent()) == 1
@@ -0,0 +1,41 @@
+import time
+import threading
+import llm_scheduler
+
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+def test_promoted_group_overtakes_its_old_lane():
+    scheduler = llm_scheduler.LLMScheduler(max_concurrency=1)
+    release = threading.Event()
+    order = []
+    queued = lambda lane: scheduler.metrics()["lanes"][lane]["queued"]
+
+    holder = threading.Thread(target=scheduler.run, args=(release.wait,))
+    holder.start()
+    wait_for(lambda: scheduler.metrics()["in_flight"] == 1)
+    other = threading.Thread(target=scheduler.run, args=(lambda: order.append("other"), llm_scheduler.SPECULATIVE))
+    other.start()
+    wait_for(lambda: queued(llm_scheduler.SPECULATIVE) == 1)
+    group = llm_scheduler.RequestGroup(llm_scheduler.SPECULATIVE)
+    grouped = threading.Thread(target=llm_scheduler.run_in_group, args=(
+        group, scheduler.run, lambda: order.append("grouped"), llm_scheduler.SPECULATIVE))
+    grouped.start()
+    wait_for(lambda: queued(llm_scheduler.SPECULATIVE) == 2)
+
+    scheduler.promote(group, llm_scheduler.INTERACTIVE)
+    assert queued(llm_scheduler.INTERACTIVE) == 1
+    release.set()
+    for thread in (holder, other, grouped):
+        thread.join(timeout=5)
+    assert order == ["grouped", "other"]
+
+def test_queue_wait_percentiles_are_nearest_rank():
+    scheduler = llm_scheduler.LLMScheduler()
+    assert scheduler.metrics()["lanes"][llm_scheduler.BATCH]["wait_p95_ms"] == 0.0
+    scheduler._stats[llm_scheduler.BATCH]["waits"].extend(n / 1000 for n in range(1, 11))
+    lane = scheduler.metrics()["lanes"][llm_scheduler.BATCH]
+    assert (round(lane["wait_p50_ms"]), round(lane["wait_p95_ms"])) == (5, 10)
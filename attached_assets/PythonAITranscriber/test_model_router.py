@@ -0,0 +1,20 @@
+import model_router
+import chunked_converter
+
+def test_follow_ups_stay_on_the_conversion_model():
+    # Small, simple Python whose AutoHotkey plus issue text alone would exceed the fast model's limit
+    python_code = "x = 1\nprint(x)\n" * 40
+    ahk_code = "x := 1\nMsgBox(x)\n" * 800
+    convert = model_router.route("convert", python_code)
+    assert convert.model == model_router.FAST_MODEL
+    for operation in ("validate", "debug", "debug_patch"):
+        assert model_router.route(operation, python_code, ahk_code, "it crashes").model == convert.model
+
+def test_large_or_complex_code_uses_the_default_model():
+    assert model_router.route("convert", "x = 1\n" * 2000).model == model_router.DEFAULT_MODEL
+    nested = "class A:\n    def f(self):\n        for i in range(3):\n            if i:\n                yield i\n" * 3
+    assert model_router.route("convert", nested).model == model_router.DEFAULT_MODEL
+
+def test_chunking_starts_before_the_output_cap():
+    largest = "x" * (chunked_converter.CHUNK_MIN_CHARS - 1)
+    assert model_router.route("convert", largest).max_tokens < model_router.MAX_OUTPUT_TOKENS
@@ -0,0 +1,72 @@
+import io
+import json
+import time
+import zipfile
+import pytest
+import converter
+import jobs
+import main
+import project_converter
+
+LOCAL = "def double(value):\n    return value * 2\n"
+# Large enough to be chunked, and made of classes the transpiler leaves to Claude
+REMOTE = "".join(f"class Counter{n}:\n    def __init__(self):\n        self.value = {n}\n\n" for n in range(120))
+
+@pytest.fixture
+def failing_claude(monkeypatch):
+    def fail(*args, **kwargs):
+        raise RuntimeError("API down")
+    monkeypatch.setattr(converter, "ask_claude", fail)
+    monkeypatch.setattr(converter, "convert_python_unit", fail)
+
+def test_file_with_failed_chunks_is_marked_failed(tmp_path, failing_claude):
+    uploads = [("ok.py", io.BytesIO(LOCAL.encode())), ("big.py", io.BytesIO(REMOTE.encode()))]
+    result = project_converter.convert_project(uploads, workers=2, output_dir=tmp_path)
+    assert result.statuses == {"ok.py": project_converter.CONVERTED, "big.py": project_converter.FAILED}
+    assert "could not be converted" in result.errors["big.py"]
+    with zipfile.ZipFile(result.output_path) as archive:
+        assert sorted(archive.namelist()) == ["CONVERSION_REPORT.txt", "ok.ahk"]
+
+def test_project_zip_keeps_folders(tmp_path, failing_claude):
+    upload = io.BytesIO()
+    with zipfile.ZipFile(upload, "w") as archive:
+        archive.writestr("pkg/util.py", LOCAL)
+        archive.writestr("pkg/__pycache__/util.py", LOCAL)
+        archive.writestr("notes.txt", "not python")
+    upload.seek(0)
+    result = project_converter.convert_project([("project.zip", upload)], output_dir=tmp_path)
+    assert result.statuses == {"project/pkg/util.py": project_converter.CONVERTED}
+    with zipfile.ZipFile(result.output_path) as archive:
+        assert "project/pkg/util.ahk" in archive.namelist()
+
+def test_batch_checkpoint_skips_failed_files(tmp_path, failing_claude):
+    (tmp_path / "ok.py").write_text(LOCAL)
+    (tmp_path / "big.py").write_text(REMOTE)
+    checkpoint = tmp_path / "checkpoint.json"
+    assert main.main(["convert", str(tmp_path), "--checkpoint", str(checkpoint)]) == 1
+    done = json.loads(checkpoint.read_text())
+    assert [entry["target"] for entry in done.values()] == [str(tmp_path / "ok.ahk")]
+    assert not (tmp_path / "big.ahk").exists()
+
+def test_cancelled_job_stops_between_files_with_a_partial_zip(tmp_path, monkeypatch):
+    manager = jobs.JobManager(max_workers=1)
+
+    def convert(code, **kwargs):
+        # Cancelled while the first file is being converted
+        manager.cancel(manager.active_jobs("owner")[0].id)
+        return "; converted"
+
+    monkeypatch.setattr(project_converter, "run_conversion", convert)
+    uploads = [(f"file{n}.py", io.BytesIO(LOCAL.encode())) for n in range(10)]
+    job = manager.submit("owner", "convert_project", project_converter.convert_project, uploads,
+                         workers=1, output_dir=str(tmp_path))
+    deadline = time.time() + 10
+    while job.active and time.time() < deadline:
+        time.sleep(0.01)
+    assert job.state == jobs.CANCELLED
+    result = job.result
+    assert result.stopped == project_converter.CANCELLED_REASON
+    assert 1 <= result.count(project_converter.CONVERTED) < 10
+    with zipfile.ZipFile(result.output_path) as archive:
+        assert "file0.ahk" in archive.namelist()
+    assert not jobs.cancel_requested()
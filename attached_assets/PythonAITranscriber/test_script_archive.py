@@ -0,0 +1,48 @@
+import io
+import json
+import zipfile
+import pytest
+import script_archive
+
+def ndjson(*records) -> io.BytesIO:
+    return io.BytesIO("".join(json.dumps(record) + "\n" for record in records).encode("utf-8"))
+
+def record(**overrides) -> dict:
+    record = {"name": "hello", "python_code": "print('hi')", "ahk_code": 'MsgBox("hi")',
+              "python_sha256": script_archive._sha256("print('hi')"),
+              "ahk_sha256": script_archive._sha256('MsgBox("hi")')}
+    record.update(overrides)
+    return record
+
+def test_ndjson_records_are_read():
+    scripts = list(script_archive.read_scripts(ndjson(record(), record(name="bye", python_sha256=None))))
+    assert [script["name"] for script in scripts] == ["hello", "bye"]
+    assert scripts[0]["ahk_code"] == 'MsgBox("hi")'
+
+@pytest.mark.parametrize("line, message", [
+    (b"[1, 2]\n", "Line 1 is not a JSON object"),
+    (b"{not json\n", "Line 1 is not valid JSON"),
+    (json.dumps({"python_code": "x = 1"}).encode() + b"\n", "needs a name"),
+    (json.dumps({"name": "a", "python_code": 1}).encode() + b"\n", "Line 1: python_code must be a string"),
+    (json.dumps({"name": "a", "ahk_code": ["x"]}).encode() + b"\n", "Line 1: ahk_code must be a string"),
+    (json.dumps({"name": "a", "created_at": 20240101}).encode() + b"\n", "Line 1: created_at must be a string"),
+    (json.dumps({"name": "a", "created_at": "yesterday"}).encode() + b"\n", "Line 1: created_at is not an ISO date"),
+])
+def test_bad_ndjson_lines_are_rejected(line, message):
+    with pytest.raises(ValueError, match=message):
+        list(script_archive.read_scripts(io.BytesIO(line)))
+
+def test_code_not_matching_its_hash_is_rejected():
+    with pytest.raises(ValueError, match="python_sha256"):
+        list(script_archive.read_scripts(ndjson(record(python_code="print('edited')"))))
+
+def test_zip_manifest_entries_are_checked():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("scripts/1.py", "print('edited')")
+        archive.writestr(script_archive.MANIFEST_NAME, json.dumps(
+            {"name": "hello", "python_file": "scripts/1.py", "python_sha256": script_archive._sha256("print('hi')")}
+        ) + "\n")
+    buffer.seek(0)
+    with pytest.raises(ValueError, match="python_sha256"):
+        list(script_archive.read_scripts(buffer, "zip"))
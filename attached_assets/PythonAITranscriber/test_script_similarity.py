@@ -0,0 +1,56 @@
+from types import SimpleNamespace
+import script_similarity
+
+CLICKER = "def click_loop():\n    while True:\n        pyautogui.click(100, 200)\n        time.sleep(0.5)\n"
+CLICKER_EDITED = CLICKER.replace("0.5", "0.25")
+OTHER = "import json\nwith open('config.json') as f:\n    settings = json.load(f)\nprint(settings['name'])\n"
+
+def test_text_features_are_stemmed_words_without_filler():
+    assert script_similarity.text_features("Clicking the mouse every 5 seconds") == {"click", "mouse", "5", "second"}
+    assert script_similarity.text_features("autoClicker") == {"auto", "clicker"}
+
+def test_code_features_are_token_shingles():
+    assert script_similarity.code_features("x = 1") == {"x = 1"}
+    assert script_similarity.code_features("a(b, c)") == {"a ( b ,", "( b , c", "b , c )"}
+    assert script_similarity.code_features("") == set()
+
+def test_signatures_estimate_jaccard_similarity():
+    same = script_similarity.code_signature(CLICKER)
+    assert script_similarity.similarity(same, script_similarity.code_signature(CLICKER)) == 1.0
+    near = script_similarity.similarity(same, script_similarity.code_signature(CLICKER_EDITED))
+    far = script_similarity.similarity(same, script_similarity.code_signature(OTHER))
+    assert near > 0.3 > far
+    assert script_similarity.code_signature("") is None
+    assert script_similarity.text_signature("the and of") is None
+
+def test_index_finds_similar_scripts_and_follows_changes():
+    index = script_similarity.SimilarityIndex()
+    index._loaded = True
+    index.apply_changes([(1, "Auto clicker", "Clicks the mouse repeatedly", CLICKER, ""),
+                         (2, "Config reader", "Prints a setting from a JSON file", OTHER, "")], [])
+    assert len(index) == 2
+    matches = index.query("mouse clicker", CLICKER_EDITED)
+    assert [script_id for script_id, _ in matches] == [1]
+    assert index.query(code=OTHER)[0] == (2, 1.0)
+
+    index.apply_changes([], [1])
+    assert len(index) == 1
+    assert index.query("mouse clicker", CLICKER_EDITED) == []
+
+def test_find_similar_scripts_loads_metadata_in_one_query(monkeypatch):
+    index = script_similarity.SimilarityIndex()
+    index._loaded = True
+    index.apply_changes([(1, "Auto clicker", "Clicks the mouse repeatedly", CLICKER, ""),
+                         (2, "Mouse clicker", "Clicks the mouse", CLICKER_EDITED, "")], [])
+    monkeypatch.setattr(script_similarity, "index", index)
+    queries = []
+
+    def get_script_summaries(script_ids, script_type=None):
+        queries.append((sorted(script_ids), script_type))
+        return {2: SimpleNamespace(id=2, name="Mouse clicker")}
+
+    monkeypatch.setattr(script_similarity.database, "get_script_summaries", get_script_summaries)
+    monkeypatch.setattr(script_similarity.database, "get_script_by_id", None)
+    matches = script_similarity.find_similar_scripts("mouse clicker", CLICKER, script_type="game_helper")
+    assert queries == [([1, 2], "game_helper")]
+    assert [script.name for script, _ in matches] == ["Mouse clicker"]
@@ -0,0 +1,55 @@
+import threading
+import converter
+import llm_scheduler
+import speculative
+
+PYTHON = "print('hi')\n"
+AHK = '#Requires AutoHotkey v2.0\nMsgBox("hi")\n'
+
+def test_failed_background_validation_is_retried(monkeypatch):
+    answers = iter([RuntimeError("API down"), "Looks right."])
+
+    def ask_claude(operation, content, *cache_inputs, **kwargs):
+        answer = next(answers)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(converter, "ask_claude", ask_claude)
+    run = speculative.start(PYTHON, AHK)
+    run.validation.exception(timeout=10)
+    assert not run.validation_ready(PYTHON, AHK)
+    result = speculative.validate(PYTHON, AHK, run=run)
+    assert result.endswith("Looks right.")
+    assert "Error during validation" not in result
+
+def test_finished_background_validation_is_reused(monkeypatch):
+    calls = []
+    monkeypatch.setattr(converter, "ask_claude", lambda *args, **kwargs: calls.append(args[0]) or "Looks right.")
+    run = speculative.start(PYTHON, AHK)
+    run.validation.result(timeout=10)
+    assert run.validation_ready(PYTHON, AHK)
+    assert speculative.validate(PYTHON, AHK, run=run).endswith("Looks right.")
+    assert calls == ["validate"]
+
+def test_background_validation_of_other_code_is_ignored(monkeypatch):
+    monkeypatch.setattr(converter, "ask_claude", lambda *args, **kwargs: "Looks right.")
+    run = speculative.start(PYTHON, AHK)
+    assert run.validation_result(PYTHON, AHK + "; edited\n") is None
+
+def test_validation_not_started_is_made_interactively(monkeypatch):
+    priorities = []
+    monkeypatch.setattr(converter, "ask_claude",
+                        lambda *args, priority=None, **kwargs: priorities.append(priority) or "Looks right.")
+    # Keep every background worker busy so the speculative validation stays queued in the pool
+    release = threading.Event()
+    blockers = [speculative._executor.submit(release.wait) for _ in range(speculative.SPECULATIVE_WORKERS)]
+    try:
+        run = speculative.start(PYTHON, AHK)
+        assert speculative.validate(PYTHON, AHK, run=run).endswith("Looks right.")
+        assert run.validation.cancelled()
+        assert priorities == [llm_scheduler.INTERACTIVE]
+    finally:
+        release.set()
+        for blocker in blockers:
+            blocker.result(timeout=10)
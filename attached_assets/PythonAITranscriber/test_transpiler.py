@@ -0,0 +1,68 @@
+import pytest
+import transpiler
+
+GREETER = '''import time
+
+def greet(name):
+    print(f"Hello, {name}!")
+    time.sleep(1)
+    return name
+
+count = 0
+for i in range(3):
+    count += i
+
+if __name__ == "__main__":
+    greet("User")
+'''
+
+def test_translates_supported_module_for_v2():
+    result = transpiler.transpile(GREETER)
+    assert result.ok
+    assert result.code.startswith("#Requires AutoHotkey v2.0")
+    assert "greet(name) {" in result.code
+    assert 'MsgBox("Hello, " . name . "!")' in result.code
+    assert "Sleep(1000)" in result.code
+    assert "Loop 3 {" in result.code
+    assert "i := A_Index - 1" in result.code
+    # The main guard is unwrapped into the auto-execute section
+    assert result.code.rstrip().endswith('greet("User")')
+
+def test_translates_supported_module_for_v1():
+    result = transpiler.transpile(GREETER, "v1")
+    assert result.ok
+    assert result.code.startswith("#Requires AutoHotkey v1.1")
+    assert 'MsgBox % "Hello, " . name . "!"' in result.code
+    assert "Sleep, 1000" in result.code
+    assert "Loop, % 3" in result.code
+
+def test_reports_each_unsupported_node_with_its_line():
+    result = transpiler.transpile("x = [1]\nclass A:\n    pass\ny = a + b\n")
+    assert not result.ok
+    assert [(node.line, node.node_type) for node in result.unsupported] == [(1, "List"), (2, "ClassDef"), (4, "BinOp")]
+    assert "; [unsupported] line 2: ClassDef statements are not supported" in result.code
+
+def test_plus_is_concatenation_only_for_strings():
+    result = transpiler.transpile('a = "x"\nb = 2\nprint(a + "y")\nprint(b + 3)\n')
+    assert result.ok
+    assert 'MsgBox(a . "y")' in result.code
+    assert "MsgBox(b + 3)" in result.code
+
+def test_transpile_source_uses_module_context():
+    source = "total = 1\n\ndef bump():\n    global total\n    total += 1\n"
+    local = transpiler.Transpiler(source)
+    result = local.transpile_source("def bump():\n    global total\n    total += 1\n")
+    assert result.ok
+    assert "global total" in result.code
+    assert "#Requires" not in result.code
+
+def test_only_whole_module_names_count_as_known_imports():
+    code = transpiler.transpile("import time\nimport t\nimport timeit\nfrom time import sleep\n").code
+    assert "; import t has no AutoHotkey equivalent" in code
+    assert "; import timeit has no AutoHotkey equivalent" in code
+    assert "import time has" not in code
+    assert "time.sleep" not in code
+
+def test_rejects_unknown_target():
+    with pytest.raises(ValueError):
+        transpiler.Transpiler("print(1)", "v3")
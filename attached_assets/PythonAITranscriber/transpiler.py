@@ -0,0 +1,505 @@
+import ast
+from dataclasses import dataclass, field
+
+SUPPORTED_TARGETS = ("v1", "v2")
+INDENT = "    "
+
+# Python callables with a direct AutoHotkey translation; importing anything else leaves a note
+KNOWN_CALLS = {"time.sleep", "print", "str", "int", "float", "len", "abs", "round", "min", "max"}
+
+class Unsupported(Exception):
+    """Raised when a node falls outside the subset the transpiler understands"""
+
+    def __init__(self, node, reason: str):
+        super().__init__(reason)
+        self.node = node
+        self.reason = reason
+
+@dataclass
+class UnsupportedNode:
+    line: int
+    node_type: str
+    reason: str
+
+@dataclass
+class TranspileResult:
+    code: str
+    unsupported: list = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.unsupported
+
+@dataclass
+class _Scope:
+    types: dict
+    params: set = field(default_factory=set)
+    globals: set = field(default_factory=set)
+    in_function: bool = False
+
+def _merge_type(types: dict, name: str, value_type):
+    if name in types and types[name] != value_type:
+        types[name] = None
+    else:
+        types[name] = value_type
+
+def _known_import(name: str) -> bool:
+    """Whether an imported module or name leads to a known call, matching whole dotted segments"""
+    parts = name.split(".")
+    return any(call.split(".")[:len(parts)] == parts for call in KNOWN_CALLS)
+
+class Transpiler:
+    """Deterministic Python to AutoHotkey translator for a small, common subset of Python.
+
+    Covers print, time.sleep, f-strings, arithmetic, simple functions, if/while and
+    for-range loops. Anything else is reported as unsupported instead of guessed at.
+    """
+
+    def __init__(self, source: str, target: str = "v2"):
+        if target not in SUPPORTED_TARGETS:
+            raise ValueError(f"Unknown AutoHotkey target: {target}")
+        self.target = target
+        self.tree = ast.parse(source)
+        self.aliases = {}
+        self.functions = {}
+        self.global_types = {}
+        self.unsupported = []
+        self._collect_module_info(self.tree.body)
+
+    # -- module pre-pass -------------------------------------------------
+
+    def _collect_module_info(self, body: list):
+        for node in body:
+            if isinstance(node, ast.Import):
+                for alias in node.names:
+                    self.aliases[alias.asname or alias.name] = alias.name
+            elif isinstance(node, ast.ImportFrom) and node.module:
+                for alias in node.names:
+                    self.aliases[alias.asname or alias.name] = f"{node.module}.{alias.name}"
+            elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                self.functions[node.name] = node
+            elif isinstance(node, (ast.Assign, ast.AnnAssign)) and node.value is not None:
+                targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+                for target in targets:
+                    if isinstance(target, ast.Name):
+                        _merge_type(self.global_types, target.id, self._expr_type(node.value, None))
+            elif isinstance(node, ast.If) and self._is_main_guard(node):
+                self._collect_module_info(node.body)
+
+    # -- public API --------------------------------------------------------
+
+    def transpile(self) -> TranspileResult:
+        """Translate the whole module, including the #Requires header"""
+        result = self._transpile_body(self.tree.body)
+        header = "#Requires AutoHotkey v2.0" if self.target == "v2" else "#Requires AutoHotkey v1.1"
+        result.code = f"{header}\n; Converted locally by the rule-based Python transpiler\n\n{result.code}"
+        return result
+
+    def transpile_source(self, source: str) -> TranspileResult:
+        """Translate a top-level slice of the module using the module-wide context"""
+        return self._transpile_body(ast.parse(source).body)
+
+    def _transpile_body(self, body: list) -> TranspileResult:
+        self.unsupported = []
+        scope = _Scope(types=dict(self.global_types))
+        lines = self._block(body, scope, 0)
+        return TranspileResult("\n".join(lines) + "\n" if lines else "", self.unsupported)
+
+    # -- statements --------------------------------------------------------
+
+    def _block(self, body: list, scope: _Scope, depth: int) -> list:
+        lines = []
+        for node in body:
+            try:
+                lines.extend(self._statement(node, scope, depth))
+            except Unsupported as e:
+                bad = e.node if hasattr(e.node, "lineno") else node
+                self.unsupported.append(UnsupportedNode(bad.lineno, type(bad).__name__, e.reason))
+                lines.append(f"{INDENT * depth}; [unsupported] line {bad.lineno}: {e.reason}")
+        return lines
+
+    def _open(self, header: str, depth: int) -> list:
+        pad = INDENT * depth
+        if self.target == "v2":
+            return [f"{pad}{header} {{"]
+        return [f"{pad}{header}", f"{pad}{{"]
+
+    def _statement(self, node, scope: _Scope, depth: int) -> list:
+        pad = INDENT * depth
+
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            prefix = f"{node.module}." if isinstance(node, ast.ImportFrom) else ""
+            unknown = [prefix + a.name for a in node.names if not _known_import(prefix + a.name)]
+            return [f"{pad}; import {', '.join(unknown)} has no AutoHotkey equivalent"] if unknown else []
+
+        if isinstance(node, ast.Expr):
+            if isinstance(node.value, ast.Constant) and isinstance(node.value.value, str):
+                return [f"{pad}; {line}".rstrip() for line in node.value.value.strip().splitlines()]
+            if isinstance(node.value, ast.Call):
+                return [pad + self._call_statement(node.value, scope)]
+            raise Unsupported(node, "only calls can be used as statements")
+
+        if isinstance(node, (ast.Assign, ast.AnnAssign)):
+            if node.value is None:
+                return []
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            value = self._expr(node.value, scope)
+            lines = []
+            for target in targets:
+                if not isinstance(target, ast.Name):
+                    raise Unsupported(target, "only plain variable assignment is supported")
+                _merge_type(scope.types, target.id, self._expr_type(node.value, scope))
+                lines.append(f"{pad}{target.id} := {value}")
+            return lines
+
+        if isinstance(node, ast.AugAssign):
+            return [pad + self._aug_assign(node, scope)]
+
+        if isinstance(node, ast.If):
+            if self._is_main_guard(node) and depth == 0 and not node.orelse:
+                return self._block(node.body, scope, depth)
+            return self._if(node, scope, depth)
+
+        if isinstance(node, ast.While):
+            if node.orelse:
+                raise Unsupported(node, "while/else has no AutoHotkey equivalent")
+            return self._open(f"while ({self._expr(node.test, scope)})", depth) + \
+                self._block(node.body, scope, depth + 1) + [f"{pad}}}"]
+
+        if isinstance(node, ast.For):
+            return self._for(node, scope, depth)
+
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            if scope.in_function:
+                raise Unsupported(node, "nested functions are not supported")
+            return self._function(node, depth)
+
+        if isinstance(node, ast.Return):
+            if not scope.in_function:
+                raise Unsupported(node, "return outside a function")
+            return [f"{pad}return" if node.value is None else f"{pad}return {self._expr(node.value, scope)}"]
+
+        if isinstance(node, ast.Global):
+            scope.globals.update(node.names)
+            return [f"{pad}global {', '.join(node.names)}"]
+
+        if isinstance(node, ast.Break):
+            return [f"{pad}break"]
+        if isinstance(node, ast.Continue):
+            return [f"{pad}continue"]
+        if isinstance(node, ast.Pass):
+            return []
+
+        raise Unsupported(node, f"{type(node).__name__} statements are not supported")
+
+    def _if(self, node: ast.If, scope: _Scope, depth: int) -> list:
+        pad = INDENT * depth
+        lines = self._open(f"if ({self._expr(node.test, scope)})", depth)
+        lines += self._block(node.body, scope, depth + 1)
+        orelse = node.orelse
+        while orelse:
+            if len(orelse) == 1 and isinstance(orelse[0], ast.If):
+                branch = orelse[0]
+                lines += self._continue_block(f"else if ({self._expr(branch.test, scope)})", depth)
+                lines += self._block(branch.body, scope, depth + 1)
+                orelse = branch.orelse
+            else:
+                lines += self._continue_block("else", depth)
+                lines += self._block(orelse, scope, depth + 1)
+                orelse = []
+        lines.append(f"{pad}}}")
+        return lines
+
+    def _continue_block(self, header: str, depth: int) -> list:
+        pad = INDENT * depth
+        if self.target == "v2":
+            return [f"{pad}}} {header} {{"]
+        return [f"{pad}}}", f"{pad}{header}", f"{pad}{{"]
+
+    def _for(self, node: ast.For, scope: _Scope, depth: int) -> list:
+        pad = INDENT * depth
+        if node.orelse:
+            raise Unsupported(node, "for/else has no AutoHotkey equivalent")
+        if not isinstance(node.target, ast.Name):
+            raise Unsupported(node.target, "only a single loop variable is supported")
+        call = node.iter
+        if not (isinstance(call, ast.Call) and self._call_name(call.func) == "range"
+                and 1 <= len(call.args) <= 3 and not call.keywords):
+            raise Unsupported(node.iter, "only for loops over range() are supported")
+
+        args = call.args
+        start = args[0] if len(args) > 1 else ast.Constant(0)
+        stop = args[1] if len(args) > 1 else args[0]
+        step = args[2] if len(args) == 3 else ast.Constant(1)
+        constants = [a.value if isinstance(a, ast.Constant) and isinstance(a.value, int) else None
+                     for a in (start, stop, step)]
+        if constants[2] == 0:
+            raise Unsupported(node.iter, "range() step must not be zero")
+
+        start_code, stop_code = self._expr(start, scope), self._expr(stop, scope)
+        step_code = self._expr(step, scope)
+        if None not in constants:
+            count = str(len(range(*constants)))
+        elif constants[2] == 1 and constants[0] == 0:
+            count = f"Max(0, {stop_code})"
+        elif constants[2] == 1:
+            count = f"Max(0, {stop_code} - {self._wrap(start, start_code)})"
+        else:
+            count = f"Max(0, Ceil(({stop_code} - {self._wrap(start, start_code)}) / {self._wrap(step, step_code)}))"
+
+        index = "(A_Index - 1)" if constants[2] != 1 else "A_Index - 1"
+        if constants[2] != 1:
+            index = f"{index} * {self._wrap(step, step_code)}"
+        value = index if constants[0] == 0 else f"{self._wrap(start, start_code)} + {index}"
+
+        scope.types[node.target.id] = "num"
+        header = f"Loop {count}" if self.target == "v2" else f"Loop, % {count}"
+        lines = self._open(header, depth)
+        lines.append(f"{pad}{INDENT}{node.target.id} := {value}")
+        lines += self._block(node.body, scope, depth + 1)
+        lines.append(f"{pad}}}")
+        return lines
+
+    def _function(self, node, depth: int) -> list:
+        pad = INDENT * depth
+        if isinstance(node, ast.AsyncFunctionDef):
+            raise Unsupported(node, "async functions are not supported")
+        if node.decorator_list:
+            raise Unsupported(node, "decorators are not supported")
+        args = node.args
+        if args.vararg or args.kwarg or args.kwonlyargs or args.posonlyargs:
+            raise Unsupported(node, "only plain positional parameters are supported")
+
+        scope = _Scope(types=dict(self.global_types), in_function=True)
+        params = []
+        defaults = [None] * (len(args.args) - len(args.defaults)) + list(args.defaults)
+        for arg, default in zip(args.args, defaults):
+            scope.params.add(arg.arg)
+            scope.types[arg.arg] = self._expr_type(default, scope) if default is not None else None
+            if default is None:
+                params.append(arg.arg)
+            elif isinstance(default, ast.Constant):
+                params.append(f"{arg.arg} := {self._expr(default, scope)}")
+            else:
+                raise Unsupported(default, "parameter defaults must be constants")
+
+        body = self._block(node.body, scope, depth + 1)
+        lines = self._open(f"{node.name}({', '.join(params)})", depth)
+        if self.target == "v1":
+            # v1 functions only see globals that are declared, unlike Python and v2
+            shared = sorted(self._globals_read(node, scope) - scope.globals)
+            if shared:
+                lines.append(f"{pad}{INDENT}global {', '.join(shared)}")
+        return lines + body + [f"{pad}}}"]
+
+    def _globals_read(self, node, scope: _Scope) -> set:
+        assigned = {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Store)}
+        loaded = {n.id for n in ast.walk(node) if isinstance(n, ast.Name) and isinstance(n.ctx, ast.Load)}
+        return {name for name in loaded - assigned - scope.params if name in self.global_types}
+
+    def _aug_assign(self, node: ast.AugAssign, scope: _Scope) -> str:
+        if not isinstance(node.target, ast.Name):
+            raise Unsupported(node.target, "only plain variable assignment is supported")
+        name = node.target.id
+        value = self._expr(node.value, scope)
+        if isinstance(node.op, ast.Add):
+            kinds = {scope.types.get(name), self._expr_type(node.value, scope)}
+            if "str" in kinds:
+                scope.types[name] = "str"
+                return f"{name} .= {value}"
+            if kinds == {"num"}:
+                return f"{name} += {value}"
+            raise Unsupported(node, "cannot tell whether += adds numbers or joins strings")
+        operators = {ast.Sub: "-=", ast.Mult: "*=", ast.Div: "/=", ast.FloorDiv: "//="}
+        if type(node.op) in operators:
+            return f"{name} {operators[type(node.op)]} {value}"
+        if isinstance(node.op, ast.Mod):
+            return f"{name} := Mod({name}, {value})"
+        raise Unsupported(node, f"{type(node.op).__name__} assignment is not supported")
+
+    # -- calls -----------------------------------------------------------
+
+    def _call_name(self, func) -> str:
+        if isinstance(func, ast.Name):
+            return self.aliases.get(func.id, func.id)
+        if isinstance(func, ast.Attribute) and isinstance(func.value, ast.Name):
+            return f"{self.aliases.get(func.value.id, func.value.id)}.{func.attr}"
+        return None
+
+    def _call_statement(self, call: ast.Call, scope: _Scope) -> str:
+        name = self._call_name(call.func)
+        if name == "print":
+            if call.keywords:
+                raise Unsupported(call, "print() keyword arguments are not supported")
+            parts = [self._expr(a, scope) for a in call.args]
+            text = ' . " " . '.join(parts) if parts else '""'
+            return f"MsgBox({text})" if self.target == "v2" else f"MsgBox % {text}"
+        if name == "time.sleep":
+            if len(call.args) != 1 or call.keywords:
+                raise Unsupported(call, "time.sleep() takes exactly one argument")
+            arg = call.args[0]
+            if isinstance(arg, ast.Constant) and isinstance(arg.value, (int, float)):
+                delay = str(round(arg.value * 1000))
+                return f"Sleep({delay})" if self.target == "v2" else f"Sleep, {delay}"
+            delay = f"Round({self._wrap(arg, self._expr(arg, scope))} * 1000)"
+            return f"Sleep({delay})" if self.target == "v2" else f"Sleep, % {delay}"
+        return self._call(call, scope)
+
+    def _call(self, call: ast.Call, scope: _Scope) -> str:
+        name = self._call_name(call.func)
+        if call.keywords or any(isinstance(a, ast.Starred) for a in call.args):
+            raise Unsupported(call, "keyword and starred arguments are not supported")
+        args = [self._expr(a, scope) for a in call.args]
+
+        if name in self.functions:
+            return f"{name}({', '.join(args)})"
+        if name in ("abs", "min", "max") and args:
+            return f"{name.capitalize()}({', '.join(args)})"
+        if name == "round" and 1 <= len(args) <= 2:
+            return f"Round({', '.join(args)})"
+        if name == "len" and len(args) == 1 and self._expr_type(call.args[0], scope) == "str":
+            return f"StrLen({args[0]})"
+        if name == "str" and len(args) == 1:
+            return f"String({args[0]})" if self.target == "v2" else f"({args[0]} . \"\")"
+        if name == "int" and len(args) == 1 and self.target == "v2":
+            return f"Integer({args[0]})"
+        if name == "float" and len(args) == 1:
+            return f"Float({args[0]})" if self.target == "v2" else f"({args[0]} + 0.0)"
+        raise Unsupported(call, f"call to {name or 'expression'}() is not supported")
+
+    # -- expressions -------------------------------------------------------
+
+    def _quote(self, text: str) -> str:
+        text = text.replace("`", "``").replace(";", "`;")
+        text = text.replace("\n", "`n").replace("\r", "`r").replace("\t", "`t")
+        if self.target == "v2":
+            return '"' + text.replace('"', '`"') + '"'
+        return '"' + text.replace('"', '""') + '"'
+
+    def _wrap(self, node, code: str) -> str:
+        if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Mod):
+            return code
+        if isinstance(node, (ast.BinOp, ast.BoolOp, ast.Compare, ast.IfExp, ast.UnaryOp, ast.JoinedStr)):
+            return f"({code})"
+        return code
+
+    def _expr_type(self, node, scope):
+        """Best-effort static type: 'str', 'num' or None when unknown"""
+        if isinstance(node, ast.Constant):
+            if isinstance(node.value, str):
+                return "str"
+            if isinstance(node.value, (int, float)):
+                return "num"
+            return None
+        if isinstance(node, ast.JoinedStr):
+            return "str"
+        if isinstance(node, ast.Name):
+            types = scope.types if scope is not None else self.global_types
+            return types.get(node.id)
+        if isinstance(node, ast.BinOp):
+            left, right = self._expr_type(node.left, scope), self._expr_type(node.right, scope)
+            if isinstance(node.op, ast.Add):
+                if "str" in (left, right):
+                    return "str"
+                return "num" if left == right == "num" else None
+            return "num"
+        if isinstance(node, ast.UnaryOp) and not isinstance(node.op, ast.Not):
+            return "num"
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name):
+            name = node.func.id
+            if name == "str":
+                return "str"
+            if name in ("int", "float", "len", "abs", "round"):
+                return "num"
+        return None
+
+    def _expr(self, node, scope: _Scope) -> str:
+        if isinstance(node, ast.Constant):
+            value = node.value
+            if isinstance(value, bool):
+                return "true" if value else "false"
+            if value is None:
+                return '""'
+            if isinstance(value, str):
+                return self._quote(value)
+            if isinstance(value, (int, float)):
+                return repr(value)
+            raise Unsupported(node, f"{type(value).__name__} literals are not supported")
+
+        if isinstance(node, ast.Name):
+            return node.id
+
+        if isinstance(node, ast.JoinedStr):
+            parts = []
+            for value in node.values:
+                if isinstance(value, ast.Constant):
+                    parts.append(self._quote(value.value))
+                elif value.conversion != -1 or value.format_spec is not None:
+                    raise Unsupported(value, "f-string format specs and conversions are not supported")
+                else:
+                    parts.append(self._wrap(value.value, self._expr(value.value, scope)))
+            return " . ".join(parts) if parts else '""'
+
+        if isinstance(node, ast.BinOp):
+            left = self._wrap(node.left, self._expr(node.left, scope))
+            right = self._wrap(node.right, self._expr(node.right, scope))
+            if isinstance(node.op, ast.Add):
+                kinds = (self._expr_type(node.left, scope), self._expr_type(node.right, scope))
+                if "str" in kinds:
+                    return f"{left} . {right}"
+                if kinds == ("num", "num"):
+                    return f"{left} + {right}"
+                raise Unsupported(node, "cannot tell whether + adds numbers or joins strings")
+            if "str" in (self._expr_type(node.left, scope), self._expr_type(node.right, scope)):
+                raise Unsupported(node, "arithmetic on strings is not supported")
+            if isinstance(node.op, ast.Mod):
+                return f"Mod({left}, {right})"
+            operators = {ast.Sub: "-", ast.Mult: "*", ast.Div: "/", ast.FloorDiv: "//", ast.Pow: "**"}
+            if type(node.op) in operators:
+                return f"{left} {operators[type(node.op)]} {right}"
+            raise Unsupported(node, f"{type(node.op).__name__} operator is not supported")
+
+        if isinstance(node, ast.UnaryOp):
+            operand = self._wrap(node.operand, self._expr(node.operand, scope))
+            operators = {ast.Not: "!", ast.USub: "-", ast.UAdd: "+"}
+            if type(node.op) in operators:
+                return f"{operators[type(node.op)]}{operand}"
+            raise Unsupported(node, f"{type(node.op).__name__} operator is not supported")
+
+        if isinstance(node, ast.BoolOp):
+            joiner = " && " if isinstance(node.op, ast.And) else " || "
+            return joiner.join(self._wrap(v, self._expr(v, scope)) for v in node.values)
+
+        if isinstance(node, ast.Compare):
+            operators = {ast.Eq: "==", ast.NotEq: "!=", ast.Lt: "<", ast.LtE: "<=", ast.Gt: ">", ast.GtE: ">="}
+            comparisons = []
+            left = node.left
+            for op, right in zip(node.ops, node.comparators):
+                if type(op) not in operators:
+                    raise Unsupported(node, f"{type(op).__name__} comparison is not supported")
+                comparisons.append(f"{self._wrap(left, self._expr(left, scope))} {operators[type(op)]} "
+                                   f"{self._wrap(right, self._expr(right, scope))}")
+                left = right
+            if len(comparisons) == 1:
+                return comparisons[0]
+            return " && ".join(f"({c})" for c in comparisons)
+
+        if isinstance(node, ast.IfExp):
+            return (f"{self._wrap(node.test, self._expr(node.test, scope))} ? "
+                    f"{self._wrap(node.body, self._expr(node.body, scope))} : "
+                    f"{self._wrap(node.orelse, self._expr(node.orelse, scope))}")
+
+        if isinstance(node, ast.Call):
+            return self._call(node, scope)
+
+        raise Unsupported(node, f"{type(node).__name__} expressions are not supported")
+
+    def _is_main_guard(self, node: ast.If) -> bool:
+        test = node.test
+        return (isinstance(test, ast.Compare) and isinstance(test.left, ast.Name) and test.left.id == "__name__"
+                and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq)
+                and isinstance(test.comparators[0], ast.Constant) and test.comparators[0].value == "__main__")
+
+def transpile(source: str, target: str = "v2") -> TranspileResult:
+    """Translate Python source to AutoHotkey, reporting any unsupported nodes"""
+    return Transpiler(source, target).transpile()